@@ -1,38 +1,47 @@
-import requests
+import asyncio
+import os
+import sys
+
 import pandas as pd
 
-# Replace with your football-data.org API key
-API_KEY = "81cf7bef380d41779cfacc9623c8aa7d"
-HEADERS = {"X-Auth-Token": API_KEY}
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+from data.fetch_data import RAW_DIR, IngestionClient, api_token, fetch_matches
+
+# The football-data.org API key is read from FOOTBALL_DATA_API_KEY
 
-def fetch_qualifiers(competition_id=2000, season=2026, output_csv="qualifiers_2026.csv"):
+def fetch_qualifiers(competition_id=2000, season=2026, output_csv=os.path.join(RAW_DIR, "qualifiers_2026.csv")):
     """
-    Fetches World Cup 2026 qualifying matches and writes to CSV.
+    Fetches World Cup 2026 matches and appends the new or changed ones to the CSV.
     Uses football-data.org API:
       https://api.football-data.org/documentation/api
-    competition_id=2000 is FIFA World Cup
+    competition_id=2000 is FIFA World Cup. Stages are fetched concurrently over one
+    connection pool, and unchanged stages cost a 304 (see src/data/fetch_data.py).
     """
-    url = f"https://api.football-data.org/v4/competitions/{competition_id}/matches?season={season}"
-    r = requests.get(url, headers=HEADERS)
-    r.raise_for_status()
-    data = r.json().get("matches", [])
-    df = pd.json_normalize(data)
-    df.to_csv(output_csv, index=False)
-    print(f"Saved qualifiers to {output_csv}")
+    return fetch_matches(path=output_csv, competition=competition_id, season=season, token=api_token())
 
-def fetch_injuries(output_csv="injuries_2026.json.csv"):
+def fetch_injuries(output_csv=os.path.join(RAW_DIR, "injuries_2026.json.csv")):
     """
     Placeholder for injury data fetch.
     Replace INJURY_API_URL with a real endpoint that returns injury info in JSON.
     """
     INJURY_API_URL = "https://example.com/api/injuries?season=2026"
-    r = requests.get(INJURY_API_URL, headers=HEADERS)
-    r.raise_for_status()
-    data = r.json()
+
+    # No API token: it is only ever sent to football-data.org
+    client = IngestionClient(scope=os.path.abspath(output_csv), defer_cache=True)
+
+    async def fetch():
+        async with client:
+            return await client.get_json(INJURY_API_URL, conditional=os.path.exists(output_csv))
+
+    data, changed = asyncio.run(fetch())
+    if not changed:
+        print(f"Injuries unchanged; kept {output_csv}")
+        return
     df = pd.json_normalize(data)
     df.to_csv(output_csv, index=False)
+    client.commit_cache()
     print(f"Saved injuries to {output_csv}")
 
 if __name__ == "__main__":
     fetch_qualifiers()
-    fetch_injuries()
\ No newline at end of file
+    fetch_injuries()
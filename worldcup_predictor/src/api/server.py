@@ -0,0 +1,232 @@
+import asyncio
+import os
+import sys
+import time
+import warnings
+from collections import deque
+from contextlib import asynccontextmanager
+
+import numpy as np
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from models.award_predictor import METRIC_MODELS, get_top_players
+from models.match_predictor import match_win_probs
+from models.registry import registry
+from monitoring.instrumentation import instruments
+
+# A batch is flushed when it reaches MAX_BATCH fixtures or MAX_WAIT seconds after its first request
+MAX_BATCH = 512
+MAX_WAIT = 0.002
+LATENCY_WINDOW = 10_000
+
+
+class Fixture(BaseModel):
+    team_a: str
+    team_b: str
+
+
+class FixtureBatch(BaseModel):
+    fixtures: list[Fixture] = Field(..., max_length=10_000)
+
+
+class LatencyStats:
+    """
+    Request latencies over the last `window` requests, for p50/p99 reporting.
+    """
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def summary(self):
+        if not self.samples:
+            return {'count': self.count, 'p50_ms': None, 'p99_ms': None}
+        p50, p99 = np.percentile(np.fromiter(self.samples, dtype=float), [50, 99]) * 1000
+        return {'count': self.count, 'p50_ms': round(p50, 3), 'p99_ms': round(p99, 3)}
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent predict requests into single predict_fn calls.
+
+    Callers await submit(rows); rows queued while a batch is forming (up to max_batch rows,
+    at most max_wait seconds after the first) are scored together. predict_fn runs in a
+    worker thread so the event loop keeps accepting requests meanwhile.
+    """
+
+    def __init__(self, predict_fn, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.n_batches = 0
+        self.n_rows = 0
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def submit(self, rows):
+        """Score a (n, n_features) array; returns the n predictions."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((np.atleast_2d(rows), future))
+        return await future
+
+    async def _collect(self):
+        items = [await self._queue.get()]
+        size = len(items[0][0])
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while size < self.max_batch:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            items.append(item)
+            size += len(item[0])
+        return items
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = await self._collect()
+            rows = np.concatenate([item_rows for item_rows, _ in items])
+            try:
+                preds = await loop.run_in_executor(None, self.predict_fn, rows)
+            except Exception as exc:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self.n_batches += 1
+            self.n_rows += len(rows)
+            # Hand each caller back its own slice of the batch
+            start = 0
+            for item_rows, future in items:
+                if not future.done():
+                    future.set_result(preds[start:start + len(item_rows)])
+                start += len(item_rows)
+
+    def stats(self):
+        return {
+            'batches': self.n_batches,
+            'rows': self.n_rows,
+            'mean_batch_size': round(self.n_rows / self.n_batches, 2) if self.n_batches else None,
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+        }
+
+
+# Matchup vectors (team_a - team_b) for the given fixtures; unknown teams raise ValueError
+def fixture_vectors(fixtures):
+    team_index = registry.get('team_index')
+    ids_a = team_index.team_ids(f.team_a for f in fixtures)
+    ids_b = team_index.team_ids(f.team_b for f in fixtures)
+    return team_index.features[ids_a] - team_index.features[ids_b]
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Keep every model resident before the first request is accepted.
+    # Award models are optional: one that is missing or fails to unpickle is reported by /health.
+    # Award queries are answered from the precomputed leaderboard, which is built (or read from cache) here.
+    registry.get('team_index')
+    registry.get('match_model')
+    registry.get('match_engine')
+    app.state.models = {'match_model': True}
+    for name in METRIC_MODELS.values():
+        try:
+            app.state.models[name] = registry.get(name) is not None
+        except Exception as e:
+            warnings.warn(f"Award model '{name}' could not be loaded: {e}")
+            app.state.models[name] = False
+    if any(app.state.models[name] for name in METRIC_MODELS.values()):
+        registry.get('award_leaderboard')
+    app.state.batcher = MicroBatcher(match_win_probs)
+    app.state.latency = LatencyStats()
+    app.state.batcher.start()
+    yield
+    await app.state.batcher.stop()
+
+
+app = FastAPI(title="World Cup Predictor API", lifespan=lifespan)
+
+
+async def score(fixtures):
+    started = time.perf_counter()
+    try:
+        rows = fixture_vectors(fixtures)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    prob_team_a_win = await app.state.batcher.submit(rows)
+    app.state.latency.add(time.perf_counter() - started)
+    return [
+        {
+            "team_a": fixture.team_a,
+            "team_b": fixture.team_b,
+            "team_a_win_prob": round(float(prob), 3),
+            "team_b_win_prob": round(1 - float(prob), 3),
+        }
+        for fixture, prob in zip(fixtures, prob_team_a_win)
+    ]
+
+
+@app.post("/predict/match")
+async def predict_match(fixture: Fixture):
+    return (await score([fixture]))[0]
+
+
+@app.post("/predict/matches")
+async def predict_matches(batch: FixtureBatch):
+    if not batch.fixtures:
+        return []
+    return await score(batch.fixtures)
+
+
+@app.get("/awards/top")
+def top_players(metric: str = 'goals', n: int = 10, position: str | None = None, nationality: str | None = None):
+    if not app.state.models.get(METRIC_MODELS.get(metric), True):
+        raise HTTPException(status_code=503, detail=f"No trained model available for metric '{metric}'.")
+    try:
+        return get_top_players(metric=metric, top_n=n, position=position, nationality=nationality).to_dict(orient='records')
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok", "teams": len(registry.get('team_index')), "models": app.state.models}
+
+
+@app.get("/metrics")
+def metrics():
+    # Per-span timings (model loads, predictions) are included when WORLDCUP_INSTRUMENT is set
+    return {"latency": app.state.latency.summary(), "batching": app.state.batcher.stats(),
+            "spans": instruments.report() if instruments.enabled else None}
+
+
+@app.get("/metrics/prometheus", response_class=PlainTextResponse)
+def metrics_prometheus():
+    return instruments.to_prometheus()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=8000)
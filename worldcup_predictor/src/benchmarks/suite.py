@@ -0,0 +1,286 @@
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from benchmarks.synthetic import (
+    N_LINEUPS,
+    N_MATCHES,
+    N_MATCHUPS,
+    N_RAW_MATCHES,
+    N_TEAMS,
+    synthetic_groups,
+    synthetic_lineups,
+    synthetic_match_model,
+    synthetic_matches,
+    synthetic_raw_matches,
+    synthetic_team_features,
+)
+from data import clean_data
+from data.build_matchup_dataset import build_matchup_dataset
+from features.feature_engineering import compute_team_features
+from features.match_events import parse_event_tokens, parse_events, player_match_features
+from models.match_predictor import predict_match, predict_matches
+from models.probability_matrix import ProbabilityMatrix
+from models.registry import registry
+from models.scoreline_model import ScorelineModel
+from simulation.monte_carlo import monte_carlo_tournament
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baselines.json')
+# Allowed slowdown relative to the baseline before a benchmark counts as a regression
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_REPEAT = 5
+
+# name -> function(scale, workdir) returning (run, items, unit); run() is the timed call
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def scaled(n, scale):
+    return max(int(round(n * scale)), 1)
+
+
+@functools.lru_cache(maxsize=None)
+def match_model(scale):
+    return synthetic_match_model(scaled(N_MATCHUPS, scale))
+
+
+@functools.lru_cache(maxsize=None)
+def team_features(scale):
+    return synthetic_team_features(scaled(N_TEAMS, scale))
+
+
+# Point the registry at the synthetic team table and model, so predict_match runs on them
+def use_synthetic_artifacts(scale):
+    registry.register('team_features', lambda: team_features(scale))
+    registry.register('match_model', lambda: match_model(scale))
+
+
+@benchmark('predict_match_single')
+def bench_predict_match_single(scale, workdir):
+    use_synthetic_artifacts(scale)
+    teams = team_features(scale)['team'].tolist()
+    pairs = [(teams[i % len(teams)], teams[(i * 7 + 1) % len(teams)]) for i in range(100)]
+    predict_match(*pairs[0])
+
+    def run():
+        for team_a, team_b in pairs:
+            predict_match(team_a, team_b)
+    return run, len(pairs), 'predictions'
+
+
+@benchmark('predict_match_batch')
+def bench_predict_match_batch(scale, workdir):
+    use_synthetic_artifacts(scale)
+    teams = team_features(scale)['team'].to_numpy()
+    rng = np.random.default_rng(0)
+    n_pairs = scaled(10_000, scale)
+    pairs = list(zip(teams[rng.integers(0, len(teams), n_pairs)], teams[rng.integers(0, len(teams), n_pairs)]))
+    return functools.partial(predict_matches, pairs), n_pairs, 'predictions'
+
+
+# The number of teams grows with sqrt(scale) so the number of pairs grows linearly with it
+@benchmark('probability_matrix')
+def bench_probability_matrix(scale, workdir):
+    model = match_model(1)
+    features = synthetic_team_features(scaled(N_TEAMS, np.sqrt(scale)))
+    return functools.partial(ProbabilityMatrix.from_model, model, features), len(features) ** 2, 'pairs'
+
+
+@benchmark('monte_carlo')
+def bench_monte_carlo(scale, workdir):
+    groups = synthetic_groups()
+    teams = [team for group in groups.values() for team in group]
+    matrix = ProbabilityMatrix.from_model(match_model(1), synthetic_team_features(len(teams)))
+    probs = matrix.match_probs(teams)
+    n_simulations = scaled(20_000, scale)
+    return functools.partial(monte_carlo_tournament, groups, probs, n_simulations, seed=0), n_simulations, 'tournaments'
+
+
+# All ordered pairs of the teams in a tournament-sized field, scored as full margin tables
+@benchmark('scoreline_pairs')
+def bench_scoreline_pairs(scale, workdir):
+    model = ScorelineModel.fit(synthetic_matches(scaled(N_MATCHES, scale), scaled(N_TEAMS, scale)))
+    teams = model.teams[:scaled(48, np.sqrt(scale))]
+    return functools.partial(model.match_probs, teams), len(teams) ** 2, 'pairs'
+
+
+@benchmark('compute_team_features')
+def bench_compute_team_features(scale, workdir):
+    matches = synthetic_matches(scaled(N_MATCHES, scale), scaled(N_TEAMS, scale))
+    return functools.partial(compute_team_features, matches), len(matches), 'matches'
+
+
+@benchmark('build_matchup_dataset')
+def bench_build_matchup_dataset(scale, workdir):
+    matches = synthetic_matches(scaled(N_MATCHES, scale), scaled(N_TEAMS, scale))
+    matches_path = os.path.join(workdir, 'matches.csv')
+    features_path = os.path.join(workdir, 'team_features.csv')
+    matches.to_csv(matches_path, index=False)
+    team_features(scale).to_csv(features_path, index=False)
+    run = functools.partial(build_matchup_dataset, matches_path, features_path, os.path.join(workdir, 'matchup.csv'))
+    return run, len(matches), 'matches'
+
+
+@benchmark('parse_match_events')
+def bench_parse_match_events(scale, workdir):
+    lineups = synthetic_lineups(scaled(N_LINEUPS, scale))
+
+    def run():
+        tokens = parse_event_tokens(lineups['event'])
+        parse_events(lineups, tokens)
+        player_match_features(lineups, tokens)
+    return run, len(lineups), 'rows'
+
+
+@benchmark('clean_csv_file')
+def bench_clean_csv_file(scale, workdir):
+    raw = synthetic_raw_matches(scaled(N_RAW_MATCHES, scale), scaled(N_TEAMS, scale))
+    raw.to_csv(os.path.join(workdir, 'WorldCupMatches.csv'), index=False)
+
+    def run():
+        processed_dir = clean_data.PROCESSED_DIR
+        clean_data.PROCESSED_DIR = workdir
+        try:
+            clean_data.clean_csv_file('WorldCupMatches.csv')
+        finally:
+            clean_data.PROCESSED_DIR = processed_dir
+    return run, len(raw), 'rows'
+
+
+@benchmark('model_load')
+def bench_model_load(scale, workdir):
+    path = os.path.join(workdir, 'match_model.pkl')
+    joblib.dump(match_model(scale), path)
+    return functools.partial(joblib.load, path), 1, 'models'
+
+
+# Best (minimum) wall time of repeat calls; the minimum is the least noisy estimate on a shared machine
+def best_time(run, repeat=DEFAULT_REPEAT):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def run_suite(scale=1, names=None, repeat=DEFAULT_REPEAT):
+    """
+    Time each benchmark on synthetic data scaled to `scale` times today's tables.
+
+    Args:
+        scale: size multiplier for the generated tables (1, 10, 100, ...).
+        names: benchmarks to run (default: all of BENCHMARKS).
+        repeat: timed calls per benchmark; the fastest is reported.
+    Returns:
+        dict mapping benchmark name to {'seconds', 'items', 'unit', 'per_second'}.
+    """
+    names = list(BENCHMARKS) if names is None else names
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks {unknown}. Available: {sorted(BENCHMARKS)}")
+
+    originals = {name: registry._specs[name] for name in ('team_features', 'match_model')}
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for name in names:
+                run, items, unit = BENCHMARKS[name](scale, workdir)
+                # Library code prints progress messages; keep the report readable
+                with contextlib.redirect_stdout(io.StringIO()):
+                    seconds = best_time(run, repeat)
+                results[name] = {'seconds': seconds, 'items': items, 'unit': unit, 'per_second': items / seconds}
+                print(f"{name:<24} {seconds * 1000:>10.2f} ms  {items / seconds:>14,.0f} {unit}/s")
+    finally:
+        for name, (loader, path, optional, depends) in originals.items():
+            registry.register(name, loader, path, optional, depends)
+    return results
+
+
+def load_baselines(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {'threshold': DEFAULT_THRESHOLD, 'thresholds': {}, 'scales': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+# Replaces the stored results for this scale; thresholds and other scales are kept
+def save_baselines(results, scale, path=BASELINE_PATH):
+    baselines = load_baselines(path)
+    baselines['scales'][str(scale)] = {
+        'machine': f"{platform.machine()} {platform.processor() or ''}".strip(),
+        'python': platform.python_version(),
+        'results': {name: {'seconds': r['seconds'], 'items': r['items']} for name, r in results.items()},
+    }
+    with open(path, 'w') as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def compare(results, baselines, scale, threshold=None):
+    """
+    Regressions of results against the stored baseline for this scale.
+
+    A benchmark regresses when it is more than `threshold` (a fraction, e.g. 0.25 = 25%)
+    slower than its baseline. The threshold comes from, in order: the argument,
+    baselines['thresholds'][name], baselines['threshold'].
+    Returns a list of (name, baseline seconds, current seconds, allowed slowdown).
+    """
+    stored = baselines['scales'].get(str(scale), {}).get('results', {})
+    regressions = []
+    for name, result in results.items():
+        if name not in stored:
+            continue
+        allowed = threshold
+        if allowed is None:
+            allowed = baselines.get('thresholds', {}).get(name, baselines.get('threshold', DEFAULT_THRESHOLD))
+        if result['seconds'] > stored[name]['seconds'] * (1 + allowed):
+            regressions.append((name, stored[name]['seconds'], result['seconds'], allowed))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the hot paths on synthetic data and check them against baselines.")
+    parser.add_argument('--scale', type=float, default=1.0, help="table size relative to today's data, e.g. 10 or 100")
+    parser.add_argument('--only', nargs='+', metavar='NAME', help=f"benchmarks to run: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--threshold', type=float, help="allowed slowdown for every benchmark (overrides baselines.json)")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    args = parser.parse_args()
+
+    scale = int(args.scale) if args.scale.is_integer() else args.scale
+    results = run_suite(scale, args.only, args.repeat)
+    if args.save_baseline:
+        save_baselines(results, scale, args.baseline)
+        print(f"Saved baseline for scale {scale} to {args.baseline}")
+        sys.exit(0)
+
+    baselines = load_baselines(args.baseline)
+    if str(scale) not in baselines['scales']:
+        print(f"No baseline for scale {scale}; run with --save-baseline to create one.")
+        sys.exit(0)
+    regressions = compare(results, baselines, scale, args.threshold)
+    for name, before, after, allowed in regressions:
+        print(f"REGRESSION {name}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms "
+              f"(+{after / before - 1:.0%}, allowed +{allowed:.0%})")
+    if regressions:
+        sys.exit(1)
+    print("No regressions.")
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+# Row counts of today's tables; benchmarks scale these by 10x / 100x
+N_TEAMS = 83
+N_MATCHES = 836
+N_RAW_MATCHES = 4572
+N_MATCHUPS = 1606
+N_LINEUPS = 37048
+
+FEATURE_COLUMNS = ['avg_goals_for', 'avg_goals_against', 'win_rate', 'recent_form']
+
+
+def team_names(n_teams):
+    return [f'Team {i:05d}' for i in range(n_teams)]
+
+
+# Cleaned match history in the WorldCupMatches_cleaned layout
+def synthetic_matches(n_matches=N_MATCHES, n_teams=N_TEAMS, seed=0):
+    rng = np.random.default_rng(seed)
+    teams = np.array(team_names(n_teams))
+    home = rng.integers(0, n_teams, n_matches)
+    away = (home + rng.integers(1, n_teams, n_matches)) % n_teams
+    days = np.sort(rng.integers(0, 365 * 90, n_matches))
+    dates = pd.Timestamp('1930-07-13') + pd.to_timedelta(days, unit='D')
+    return pd.DataFrame({
+        'year': dates.year,
+        'datetime': dates.strftime('%d %b %Y - 15:00 '),
+        'stage': 'Group 1',
+        'home_team_name': teams[home],
+        'home_team_goals': rng.poisson(1.5, n_matches).astype(float),
+        'away_team_goals': rng.poisson(1.1, n_matches).astype(float),
+        'away_team_name': teams[away],
+    })
+
+
+# Raw (uncleaned) match file with the original column names; like WorldCupMatches.csv,
+# most rows are blank and some matches appear twice
+def synthetic_raw_matches(n_rows=N_RAW_MATCHES, n_teams=N_TEAMS, seed=0):
+    n_matches = max(n_rows // 5, 1)
+    df = synthetic_matches(n_matches, n_teams, seed)
+    df.columns = ['Year', 'Datetime', 'Stage', 'Home Team Name', 'Home Team Goals', 'Away Team Goals', 'Away Team Name']
+    rng = np.random.default_rng(seed)
+    duplicates = df.sample(n_matches // 50, random_state=seed)
+    blank = pd.DataFrame(index=range(n_rows - n_matches - len(duplicates)), columns=df.columns)
+    df = pd.concat([df, duplicates, blank], ignore_index=True)
+    return df.iloc[rng.permutation(len(df))].reset_index(drop=True)
+
+
+# Lineups in the WorldCupPlayers_cleaned layout: 44 rows per match, about a quarter with events
+def synthetic_lineups(n_rows=N_LINEUPS, seed=0):
+    rng = np.random.default_rng(seed)
+    codes = np.array(['G', 'Y', 'I', 'O', 'IH', 'P', 'R', 'W'])
+    tokens = pd.Series(codes[rng.integers(0, len(codes), n_rows)]) + pd.Series(rng.integers(1, 120, n_rows)).astype(str) + "'"
+    has_event = rng.random(n_rows) < 0.25
+    two_events = rng.random(n_rows) < 0.1
+    events = tokens.where(~two_events, tokens + ' ' + tokens.sample(frac=1, random_state=seed).to_numpy())
+    return pd.DataFrame({
+        'matchid': np.arange(n_rows) // 44,
+        'team_initials': np.where(np.arange(n_rows) % 44 < 22, 'AAA', 'BBB'),
+        'line-up': np.where(np.arange(n_rows) % 22 < 11, 'S', 'N'),
+        'shirt_number': np.arange(n_rows) % 22 + 1,
+        'player_name': [f'Player {i % 5000:04d}' for i in range(n_rows)],
+        'event': events.where(has_event),
+    })
+
+
+def synthetic_team_features(n_teams=N_TEAMS, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.random((n_teams, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+    df.insert(0, 'team', team_names(n_teams))
+    return df
+
+
+# Match model of the same shape as models/match_model.pkl (100 trees on ~1600 matchups)
+def synthetic_match_model(n_rows=N_MATCHUPS, n_estimators=100, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n_rows, 4)), columns=[f'diff_{c}' for c in FEATURE_COLUMNS])
+    y = (X['diff_win_rate'] + X['diff_recent_form'] + rng.normal(size=n_rows) > 0).astype(int)
+    return RandomForestClassifier(n_estimators=n_estimators, random_state=seed).fit(X, y)
+
+
+def synthetic_groups(n_groups=12, group_size=4):
+    teams = team_names(n_groups * group_size)
+    return {chr(65 + g): teams[g * group_size:(g + 1) * group_size] for g in range(n_groups)}
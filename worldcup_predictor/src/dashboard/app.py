@@ -1,87 +1,214 @@
+import hashlib
+import os
+import sys
+import threading
+from io import BytesIO
 import streamlit as st
 import pandas as pd
-import joblib
 import numpy as np
-from io import StringIO
+import joblib
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from models.probability_matrix import ProbabilityMatrix
+from models.team_index import model_feature_columns
+from simulation.monte_carlo import TournamentForecast
+
+# Tournaments per background chunk; results on the tournament page refresh after each one
+FORECAST_CHUNK = 25_000
 
 st.set_page_config(page_title="FIFA World Cup Predictor Dashboard", layout="wide")
 st.title("🏆 FIFA World Cup Predictor Dashboard")
 
+
+# Uploads are identified by content, so re-uploading the same file (or any rerun) reuses the cached objects.
+# Arguments prefixed with "_" are not hashed by Streamlit; the digest stands in for them.
+def content_hash(uploaded_file):
+    return hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+
+
+@st.cache_resource(max_entries=4, show_spinner="Loading model...")
+def load_model(digest, _data):
+    return joblib.load(BytesIO(_data))
+
+
+@st.cache_resource(max_entries=4, show_spinner="Loading team features...")
+def load_team_features(digest, _data):
+    return pd.read_csv(BytesIO(_data))
+
+
+# Symmetric win probabilities for every pair of teams, from one batched predict_proba per upload pair
+@st.cache_resource(max_entries=4, show_spinner="Scoring every pair of teams...")
+def load_matrix(model_digest, features_digest, _model, _team_features_df):
+    return ProbabilityMatrix.from_model(_model, _team_features_df)
+
+
+# Default draw: the 32 teams with the best win rate, one per pot of 8 in each of 8 groups
+def default_groups(team_features_df, n_groups=8, group_size=4, seed=2026):
+    ranked = team_features_df.sort_values('win_rate', ascending=False)['team'].tolist()[:n_groups * group_size]
+    rng = np.random.default_rng(seed)
+    pots = [rng.permutation(ranked[p * n_groups:(p + 1) * n_groups]) for p in range(group_size)]
+    return "\n".join(f"{chr(65 + g)}: " + ", ".join(pot[g] for pot in pots) for g in range(n_groups))
+
+
+# Parses "A: Brazil, France, ..." lines into {group: [teams]} with canonical team names
+def parse_groups(text, matrix):
+    groups = {}
+    for line in text.strip().splitlines():
+        name, sep, teams = line.partition(':')
+        if not sep:
+            raise ValueError(f"Expected 'Group: team, team, ...', got '{line}'")
+        groups[name.strip()] = [matrix.index.canonical_name(team.strip()) for team in teams.split(',') if team.strip()]
+    return groups
+
+
+class ForecastJob:
+    """
+    Runs TournamentForecast.extend in a background thread so the page stays responsive.
+    Completed chunks live on the forecast, so a later job can raise the count without redoing them.
+    """
+
+    def __init__(self, forecast, n_simulations):
+        self.forecast = forecast
+        self.n_simulations = n_simulations
+        self.cancelled = threading.Event()
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            for _ in self.forecast.extend(self.n_simulations):
+                if self.cancelled.is_set():
+                    break
+        except Exception as e:
+            self.error = e
+
+    @property
+    def running(self):
+        return self.thread.is_alive()
+
+
 st.sidebar.header("Model & Data Upload")
 model_file = st.sidebar.file_uploader("Upload trained match model (joblib)", type=["pkl", "joblib"])
 team_features_file = st.sidebar.file_uploader("Upload team features (CSV)", type=["csv"])
 
 model = None
 team_features_df = None
-model_type = None
+matrix = None
 
 if model_file and team_features_file:
     st.success("Model and team features uploaded!")
-    model = joblib.load(model_file)
-    
-    # Determine model type
-    model_type = type(model).__name__
-    st.write(f"Model loaded: {model_type}")
-    
+    model_digest, features_digest = content_hash(model_file), content_hash(team_features_file)
+    model = load_model(model_digest, model_file.getvalue())
+    st.write(f"Model loaded: {type(model).__name__}")
+
     # Check if it's a classification model (has predict_proba)
     if hasattr(model, 'predict_proba'):
         st.success("✅ Classification model detected - can predict win probabilities")
     else:
         st.error("❌ Regression model detected - cannot predict win probabilities")
         st.info("Please upload the match classification model (match_model.pkl), not the award regression models")
-        model = None
-    
-    # Read CSV from uploaded file
-    team_features_df = pd.read_csv(team_features_file)
+
+    team_features_df = load_team_features(features_digest, team_features_file.getvalue())
     st.write("Team features loaded.")
+
+    # The team columns the uploaded model takes the difference of (e.g. rank and elo for the current model)
+    missing_cols = [col for col in ['team'] + model_feature_columns(model) if col not in team_features_df.columns]
+    if missing_cols:
+        st.error(f"Error: Missing required columns: {missing_cols}")
+        st.write("Available columns:", list(team_features_df.columns))
+    elif hasattr(model, 'predict_proba'):
+        matrix = load_matrix(model_digest, features_digest, model, team_features_df)
 else:
     st.info("Please upload both a trained model and team features to begin.")
 
+match_tab, grid_tab, tournament_tab = st.tabs(["Match Outcome Prediction", "Head-to-Head Grid", "Tournament Forecast"])
+
 # --- Match Prediction Section ---
-st.header("Match Outcome Prediction")
-if model is not None and team_features_df is not None and hasattr(model, 'predict_proba'):
-    # Check if 'team' column exists
-    if 'team' not in team_features_df.columns:
-        st.error("Error: 'team' column not found in the uploaded team features file.")
-        st.write("Available columns:", list(team_features_df.columns))
+with match_tab:
+    if matrix is not None:
+        # Every selection is answered from the precomputed table; no model call on reruns
+        team_a = st.selectbox("Select Team A", matrix.teams, key="team_a")
+        team_b = st.selectbox("Select Team B", matrix.teams, key="team_b")
+        prob_team_a_win = matrix.win_prob(team_a, team_b)
+        prob_team_b_win = 1 - prob_team_a_win
+        st.markdown(f"**{team_a} win probability:** {prob_team_a_win:.2%}")
+        st.markdown(f"**{team_b} win probability:** {prob_team_b_win:.2%}")
+    elif model is not None and not hasattr(model, 'predict_proba'):
+        st.error("❌ Wrong model type uploaded!")
+        st.info("""
+        **Please upload the correct model:**
+        - ✅ Use `models/match_model.pkl` (classification model for match predictions)
+        - ❌ Don't use `models/award_model_*.pkl` (regression models for player awards)
+        """)
     else:
-        teams = team_features_df['team'].unique().tolist()
-        team_a = st.selectbox("Select Team A", teams, key="team_a")
-        team_b = st.selectbox("Select Team B", teams, key="team_b")
-        if st.button("Predict Match Outcome"):
-            feature_cols = ['avg_goals_for', 'avg_goals_against', 'win_rate', 'recent_form']
-            # Check if all required feature columns exist
-            missing_cols = [col for col in feature_cols if col not in team_features_df.columns]
-            if missing_cols:
-                st.error(f"Error: Missing required columns: {missing_cols}")
-                st.write("Available columns:", list(team_features_df.columns))
-            else:
-                def get_team_row(team_name):
-                    row = team_features_df[team_features_df['team'].str.lower() == team_name.lower()]
-                    if row.empty:
-                        st.error(f"Team '{team_name}' not found in team features.")
-                        return None
-                    return row[feature_cols].values[0]
-                features_a = get_team_row(team_a)
-                features_b = get_team_row(team_b)
-                if features_a is not None and features_b is not None:
-                    input_ab = features_a - features_b
-                    input_ba = features_b - features_a
-                    prob_ab = model.predict_proba(input_ab.reshape(1, -1))[0][1]
-                    prob_ba = model.predict_proba(input_ba.reshape(1, -1))[0][1]
-                    prob_team_a_win = (prob_ab + (1 - prob_ba)) / 2
-                    prob_team_b_win = 1 - prob_team_a_win
-                    st.markdown(f"**{team_a} win probability:** {prob_team_a_win:.2%}")
-                    st.markdown(f"**{team_b} win probability:** {prob_team_b_win:.2%}")
-elif model is not None and not hasattr(model, 'predict_proba'):
-    st.error("❌ Wrong model type uploaded!")
-    st.info("""
-    **Please upload the correct model:**
-    - ✅ Use `models/match_model.pkl` (classification model for match predictions)
-    - ❌ Don't use `models/award_model_*.pkl` (regression models for player awards)
-    """)
-else:
-    st.info("Upload model and team features to enable match prediction.")
+        st.info("Upload model and team features to enable match prediction.")
+
+# --- Head-to-head grid: every team against every other at once ---
+with grid_tab:
+    if matrix is not None:
+        selected = st.multiselect("Teams (all when empty)", matrix.teams, key="grid_teams")
+        grid = matrix.to_frame(selected or None)
+        st.caption("Probability that the row team beats the column team.")
+        st.dataframe(grid.style.format("{:.0%}").background_gradient(cmap="RdYlGn", vmin=0, vmax=1),
+                     use_container_width=True)
+    else:
+        st.info("Upload model and team features to see the head-to-head grid.")
+
+# --- Tournament forecast: Monte Carlo runs streamed in background chunks ---
+@st.fragment(run_every=1.0)
+def show_forecast_progress():
+    job = st.session_state.get('forecast_job')
+    if job is None:
+        return
+    forecast = job.forecast
+    if job.error is not None:
+        st.error(f"Simulation failed: {job.error}")
+    done = min(forecast.n_simulations / job.n_simulations, 1.0)
+    status = "running" if job.running else ("cancelled" if job.cancelled.is_set() else "complete")
+    st.progress(done, text=f"{forecast.n_simulations:,} / {job.n_simulations:,} tournaments ({status})")
+    if forecast.n_simulations:
+        results = forecast.results()
+        margin = forecast.margin_of_error().loc[results.index]
+        table = results.copy()
+        table['winner ± 95%'] = margin['winner']
+        st.dataframe(table.style.format("{:.2%}"), use_container_width=True)
+
+
+with tournament_tab:
+    if matrix is not None:
+        groups_text = st.text_area("Groups (one per line)", default_groups(team_features_df), height=220)
+        n_simulations = st.select_slider("Simulations", [10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000], 100_000)
+        seed = st.number_input("Seed", value=2026, step=1)
+        start_col, stop_col = st.columns(2)
+
+        if start_col.button("Run forecast"):
+            try:
+                groups = parse_groups(groups_text, matrix)
+                # Same inputs as the previous forecast: keep its chunks and only simulate the extra runs
+                key = (model_digest, features_digest, tuple((g, tuple(t)) for g, t in groups.items()), int(seed))
+                previous = st.session_state.get('forecast_job')
+                if previous is not None:
+                    previous.cancelled.set()
+                    previous.thread.join()
+                if previous is not None and st.session_state.get('forecast_key') == key:
+                    forecast = previous.forecast
+                else:
+                    teams = [team for group in groups.values() for team in group]
+                    forecast = TournamentForecast(groups, matrix.match_probs(teams), seed=int(seed), chunk_size=FORECAST_CHUNK)
+                st.session_state['forecast_key'] = key
+                st.session_state['forecast_job'] = ForecastJob(forecast, n_simulations)
+            except ValueError as e:
+                st.error(str(e))
+
+        if stop_col.button("Cancel"):
+            job = st.session_state.get('forecast_job')
+            if job is not None:
+                job.cancelled.set()
+
+        show_forecast_progress()
+    else:
+        st.info("Upload model and team features to run tournament forecasts.")
 
 st.markdown("---")
-st.caption("Built with Streamlit. Integrate your model and data for full functionality.") 
\ No newline at end of file
+st.caption("Built with Streamlit. Integrate your model and data for full functionality.")
@@ -1,43 +1,113 @@
 import os
+import sys
+import numpy as np
 import pandas as pd
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from data.storage import TableWriter, iter_file, read_file
+from features.elo import ELO_STATE_PATH, EloRatings
+from features.feature_engineering import parse_match_dates
+from features.rankings import RANKINGS_PATH, RankingIndex
+
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), '../../data/processed')
 
-# Load cleaned match data and team features
-df_matches = pd.read_csv(os.path.join(PROCESSED_DIR, 'WorldCupMatches_cleaned.csv'))
-df_teams = pd.read_csv(os.path.join(PROCESSED_DIR, 'team_features.csv'))
+MATCHES_PATH = os.path.join(PROCESSED_DIR, 'WorldCupMatches_cleaned.csv')
+TEAM_FEATURES_PATH = os.path.join(PROCESSED_DIR, 'team_features.csv')
+OUTPUT_PATH = os.path.join(PROCESSED_DIR, 'matchup_dataset.csv')
 
-# Set up for fast lookup
-team_stats = df_teams.set_index('team')
 feature_cols = ['avg_goals_for', 'avg_goals_against', 'win_rate', 'recent_form']
+match_cols = ['home_team_name', 'away_team_name', 'home_team_goals', 'away_team_goals']
+output_cols = ['team_a', 'team_b'] + [f'diff_{col}' for col in feature_cols] + ['label']
+# With a ranking history, each side's FIFA rank and points as of kickoff are added as diffs
+ranking_match_cols = ['datetime', 'home_team_initials', 'away_team_initials']
+ranking_cols = ['diff_rank', 'diff_total_points']
+# With Elo ratings, the difference of the two sides' ratings going into the match
+elo_cols = ['diff_elo']
+
+
+# Builds both orientations of every match whose teams both have features, without a row loop.
+# rankings (a RankingIndex) and elo (EloRatings) add as-of diffs, looked up for all matches in one pass.
+def matchup_rows(df_matches, team_stats, rankings=None, elo=None):
+    home = df_matches['home_team_name']
+    away = df_matches['away_team_name']
+    known = home.isin(team_stats.index) & away.isin(team_stats.index)
+    home, away = home[known].to_numpy(), away[known].to_numpy()
+    home_goals = df_matches.loc[known, 'home_team_goals'].to_numpy()
+    away_goals = df_matches.loc[known, 'away_team_goals'].to_numpy()
 
-rows = []
-for _, row in df_matches.iterrows():
-    home = row['home_team_name']
-    away = row['away_team_name']
-    if home not in team_stats.index or away not in team_stats.index:
-        continue
-    home_stats = team_stats.loc[home, feature_cols].values
-    away_stats = team_stats.loc[away, feature_cols].values
+    # Join each side's features on team name, then take the relative strength
+    home_stats = team_stats.loc[home, feature_cols].to_numpy(dtype=float)
+    away_stats = team_stats.loc[away, feature_cols].to_numpy(dtype=float)
+    extra_cols = []
+    if rankings is not None or elo is not None:
+        dates = parse_match_dates(df_matches.loc[known, 'datetime'])
+    if rankings is not None:
+        home_stats = np.hstack([home_stats, rankings.asof(df_matches.loc[known, 'home_team_initials'], dates)])
+        away_stats = np.hstack([away_stats, rankings.asof(df_matches.loc[known, 'away_team_initials'], dates)])
+        extra_cols += ranking_cols
+    if elo is not None:
+        # Ratings before the match, so its own result never leaks into the feature
+        home_stats = np.column_stack([home_stats, elo.asof(home, dates, before=True)])
+        away_stats = np.column_stack([away_stats, elo.asof(away, dates, before=True)])
+        extra_cols += elo_cols
     diff_home_away = home_stats - away_stats
     diff_away_home = away_stats - home_stats
-    # Label: 1 if home win, 0 otherwise
-    label_home = 1 if row['home_team_goals'] > row['away_team_goals'] else 0
-    label_away = 1 if row['away_team_goals'] > row['home_team_goals'] else 0
-    # Add both orders
-    rows.append({
-        'team_a': home,
-        'team_b': away,
-        **{f'diff_{col}': d for col, d in zip(feature_cols, diff_home_away)},
-        'label': label_home
-    })
-    rows.append({
-        'team_a': away,
-        'team_b': home,
-        **{f'diff_{col}': d for col, d in zip(feature_cols, diff_away_home)},
-        'label': label_away
-    })
-
-matchup_df = pd.DataFrame(rows)
-matchup_df.to_csv(os.path.join(PROCESSED_DIR, 'matchup_dataset.csv'), index=False)
-print(f"Saved matchup dataset with {len(matchup_df)} rows.") 
\ No newline at end of file
+
+    # Label: 1 if team_a won, 0 otherwise (draws count as 0 from both sides)
+    label_home = (home_goals > away_goals).astype(int)
+    label_away = (away_goals > home_goals).astype(int)
+
+    # Interleave so each match contributes its home row followed by its away row
+    n = len(home)
+    team_a = np.column_stack([home, away]).reshape(2 * n)
+    team_b = np.column_stack([away, home]).reshape(2 * n)
+    diffs = np.stack([diff_home_away, diff_away_home], axis=1).reshape(2 * n, home_stats.shape[1])
+    labels = np.column_stack([label_home, label_away]).reshape(2 * n)
+
+    matchup_df = pd.DataFrame(diffs[:, :len(feature_cols)], columns=output_cols[2:-1])
+    matchup_df.insert(0, 'team_a', team_a)
+    matchup_df.insert(1, 'team_b', team_b)
+    matchup_df['label'] = labels
+    if extra_cols:
+        matchup_df[extra_cols] = diffs[:, len(feature_cols):]
+    return matchup_df
+
+
+def build_matchup_dataset(matches_path=MATCHES_PATH, team_features_path=TEAM_FEATURES_PATH,
+                          output_path=OUTPUT_PATH, chunksize=None, rankings_path=None, elo_path=None):
+    """
+    Write the matchup dataset (both orientations of every match) to output_path,
+    plus its Parquet copy. Only the needed columns of the match history are read.
+    With chunksize, the history is streamed in chunks of that many rows and
+    appended to the output, so memory stays bounded for arbitrarily long histories.
+    With rankings_path (the cleaned FIFA ranking history), diff_rank and diff_total_points
+    hold the difference in each side's ranking as of the match date (NaN before 1993).
+    With elo_path (saved EloRatings), diff_elo holds the difference in pre-match Elo ratings.
+    Returns the number of rows written.
+    """
+    team_stats = read_file(team_features_path).set_index('team')
+    rankings = RankingIndex.load(rankings_path) if rankings_path else None
+    elo = EloRatings.load(elo_path) if elo_path else None
+    columns, columns_out = list(match_cols), list(output_cols)
+    if rankings is not None:
+        columns += ranking_match_cols
+        columns_out += ranking_cols
+    if elo is not None:
+        columns += [col for col in ['datetime'] if col not in columns]
+        columns_out += elo_cols
+    if chunksize is None:
+        chunks = [read_file(matches_path, columns=columns)]
+    else:
+        chunks = iter_file(matches_path, chunksize, columns=columns)
+
+    with TableWriter.for_file(output_path, columns_out) as writer:
+        for df_matches in chunks:
+            writer.write(matchup_rows(df_matches, team_stats, rankings, elo))
+    return writer.n_rows
+
+
+if __name__ == "__main__":
+    # The ranking and Elo diffs are only added when their inputs have been built
+    n_rows = build_matchup_dataset(rankings_path=RANKINGS_PATH if os.path.exists(RANKINGS_PATH) else None,
+                                   elo_path=ELO_STATE_PATH if os.path.exists(ELO_STATE_PATH) else None)
+    print(f"Saved matchup dataset with {n_rows} rows.")
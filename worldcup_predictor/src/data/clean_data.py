@@ -1,7 +1,12 @@
 import os
+import sys
 import pandas as pd
 import re
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from data.storage import write_table
+from monitoring.instrumentation import instruments
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), '../../data/processed')
 
@@ -10,38 +15,114 @@ PROCESSED_DIR = os.path.join(os.path.dirname(__file__), '../../data/processed')
 def clean_column_names(columns):
     return [re.sub(r'\s+', '_', col.strip().lower()) for col in columns]
 
-# Helper to standardize date columns
+# Date layouts seen in the raw files, tried in order when inferring a column's format
+DATE_FORMATS = (
+    '%Y-%m-%d',
+    '%d/%m/%Y',
+    '%m/%d/%Y',
+    '%Y/%m/%d',
+    '%d %b %Y - %H:%M',  # WorldCupMatches: 13 Jul 1930 - 15:00
+    '%d %B %Y - %H:%M',  # WorldCupMatches: 17 June 1970 - 16:00
+    '%Y-%m-%dT%H:%M:%SZ',
+)
+DATE_SAMPLE_SIZE = 200
+MAX_DATE_FORMATS = 3
+
+
+def _parse(values, fmt):
+    return pd.to_datetime(values, format=fmt, errors='coerce')
+
+
+# Infers the format(s) of a date column from a sample of its distinct values.
+# Formats are picked greedily by how many still-unparsed sample values they cover,
+# so a column mixing e.g. "Jul" and "June" month names gets both layouts.
+def infer_date_formats(values, sample_size=DATE_SAMPLE_SIZE, formats=DATE_FORMATS, max_formats=MAX_DATE_FORMATS):
+    sample = pd.Series(values).dropna().drop_duplicates()
+    sample = sample.sample(min(sample_size, len(sample)), random_state=0).str.strip()
+    chosen = []
+    while len(sample) and len(chosen) < max_formats:
+        hits = {fmt: _parse(sample, fmt).notna() for fmt in formats if fmt not in chosen}
+        best = max(hits, key=lambda fmt: hits[fmt].sum(), default=None)
+        if best is None or not hits[best].any():
+            break
+        chosen.append(best)
+        sample = sample[~hits[best]]
+    return chosen
+
 
-def try_parse_date(val):
-    for fmt in ('%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y/%m/%d'):
-        try:
-            return datetime.strptime(str(val), fmt).strftime('%Y-%m-%d')
-        except Exception:
-            continue
-    return val
+def normalize_date_column(col, formats=None):
+    """
+    Rewrite a date column as ISO strings ('%Y-%m-%d', or '%Y-%m-%d %H:%M:%S' when the
+    source carries a time). Each distinct value is parsed once, one vectorized pass per format.
+
+    Returns:
+        (normalized column, formats used, mask of non-null rows that could not be parsed).
+        Unparseable values are kept as they were.
+    """
+    codes, uniques = pd.factorize(col)
+    raw = pd.Series(uniques, dtype='object')
+    stripped = raw.astype(str).str.strip()
+    if formats is None:
+        formats = infer_date_formats(stripped)
+    parsed = pd.Series(pd.NaT, index=raw.index, dtype='datetime64[ns]')
+    for fmt in formats:
+        todo = parsed.isna()
+        if not todo.any():
+            break
+        parsed[todo] = _parse(stripped[todo], fmt)
+
+    has_time = any('%H' in fmt for fmt in formats)
+    text = parsed.dt.strftime('%Y-%m-%d %H:%M:%S' if has_time else '%Y-%m-%d').astype(object)
+    text = text.where(parsed.notna(), raw).to_numpy()
+
+    # Broadcast the per-value results back to rows; code -1 marks missing values
+    missing = codes == -1
+    normalized = pd.Series(text[codes], index=col.index, dtype='object')
+    normalized[missing] = None
+    bad = pd.Series(parsed.isna().to_numpy()[codes] & ~missing, index=col.index)
+    return normalized, formats, bad
 
 # Main cleaning function
 
 def clean_csv_file(fname):
     path = os.path.join(PROCESSED_DIR, fname)
-    df = pd.read_csv(path)
+    df = pd.read_csv(path, low_memory=False)
+    instruments.add_rows(rows_in=len(df))
     # Standardize column names
     df.columns = clean_column_names(df.columns)
-    # Try to standardize date columns
+    # Drop fully blank rows before any per-value work
+    df = df.dropna(how='all')
+    # Standardize date columns, inferring each column's format once
     for col in df.columns:
         if 'date' in col:
-            df[col] = df[col].apply(try_parse_date)
+            df[col], formats, bad = normalize_date_column(df[col])
+            if bad.any():
+                examples = df.loc[bad, col].drop_duplicates().head(3).tolist()
+                print(f"{fname}: {bad.sum()} unparseable values in '{col}' (formats {formats}), e.g. {examples}")
     # Remove duplicates
     df = df.drop_duplicates()
+    # API ingestion appends a new row whenever a record changes; keep each id's latest version
+    if 'id' in df.columns and 'lastupdated' in df.columns:
+        df = df.drop_duplicates('id', keep='last')
     # Drop rows missing critical fields (first col, or any with 'team'/'player' in name)
     crit_cols = [df.columns[0]] + [c for c in df.columns if 'team' in c or 'player' in c]
     df = df.dropna(subset=crit_cols, how='any')
-    # Output cleaned file
-    out_path = os.path.join(PROCESSED_DIR, fname.replace('.csv', '_cleaned.csv'))
-    df.to_csv(out_path, index=False)
-    print(f"Cleaned {fname} -> {os.path.basename(out_path)}")
+    # Output cleaned table (Parquet, plus the CSV export)
+    out_name = fname.replace('.csv', '_cleaned')
+    write_table(df, out_name, processed_dir=PROCESSED_DIR)
+    print(f"Cleaned {fname} -> {out_name}")
+    return out_name
+
+
+# Cleans each file in its own worker process; files are independent so the stage scales with cores
+def clean_all(fnames, n_workers=None):
+    n_workers = min(n_workers or os.cpu_count() or 1, len(fnames))
+    if n_workers <= 1:
+        return [clean_csv_file(fname) for fname in fnames]
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        return list(pool.map(clean_csv_file, fnames))
+
 
 if __name__ == "__main__":
-    for fname in os.listdir(PROCESSED_DIR):
-        if fname.lower().endswith('.csv') and not fname.endswith('_cleaned.csv'):
-            clean_csv_file(fname) 
\ No newline at end of file
+    clean_all([fname for fname in sorted(os.listdir(PROCESSED_DIR))
+               if fname.lower().endswith('.csv') and not fname.endswith('_cleaned.csv')]) 
\ No newline at end of file
@@ -1,21 +1,301 @@
-# Placeholder for data ingestion functions 
+# Data ingestion: copies the raw files into data/processed, and pulls the live fixtures
+# and results from the football-data.org API into data/raw/qualifiers_2026.csv
 
+import argparse
+import asyncio
+import hashlib
+import json
 import os
+import shutil
+import time
+
+import httpx
 import pandas as pd
 
 RAW_DIR = os.path.join(os.path.dirname(__file__), '../../data/raw')
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), '../../data/processed')
+CACHE_DIR = os.path.join(os.path.dirname(__file__), '../../data/cache/http')
+QUALIFIERS_PATH = os.path.join(RAW_DIR, 'qualifiers_2026.csv')
 
 os.makedirs(PROCESSED_DIR, exist_ok=True)
 
+API_BASE = 'https://api.football-data.org/v4'
+# API key for football-data.org, sent as X-Auth-Token
+API_TOKEN_ENV = 'FOOTBALL_DATA_API_KEY'
+# FIFA World Cup
+COMPETITION = 2000
+SEASON = 2026
+# The matches endpoint is paged by stage; pages are fetched concurrently
+STAGES = ['GROUP_STAGE', 'LAST_32', 'LAST_16', 'QUARTER_FINALS', 'SEMI_FINALS', 'THIRD_PLACE', 'FINAL']
+
+MAX_CONNECTIONS = 4
+# Request starts allowed per period (the free API tier allows 10 per minute)
+RATE_LIMIT = 10
+RATE_PERIOD = 60.0
+TIMEOUT_SECONDS = 10.0
+MAX_RETRIES = 4
+# Retry n waits BACKOFF_SECONDS * 2 ** n (or the server's Retry-After, up to MAX_BACKOFF_SECONDS)
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
 def fetch_all_csvs():
     for fname in os.listdir(RAW_DIR):
         if fname.lower().endswith('.csv'):
-            raw_path = os.path.join(RAW_DIR, fname)
-            df = pd.read_csv(raw_path)
-            out_path = os.path.join(PROCESSED_DIR, fname)
-            df.to_csv(out_path, index=False)
+            # Byte copy: no parse / re-serialize round-trip for the raw files
+            shutil.copyfile(os.path.join(RAW_DIR, fname), os.path.join(PROCESSED_DIR, fname))
             print(f"Copied {fname} to processed directory.")
 
+
+class ResponseCache:
+    """
+    On-disk cache of JSON responses with their ETag / Last-Modified validators,
+    one file per key (the URL, optionally scoped), so a later run can ask the server
+    whether anything changed.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{hashlib.sha256(key.encode()).hexdigest()[:32]}.json")
+
+    def get(self, key):
+        try:
+            with open(self.path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def entry(url, response):
+        return {
+            'url': url,
+            'etag': response.headers.get('etag'),
+            'last_modified': response.headers.get('last-modified'),
+            'body': response.json(),
+        }
+
+    def put(self, key, entry):
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    # Conditional request headers for a cached entry
+    @staticmethod
+    def validators(entry):
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+
+class RateLimiter:
+    """
+    Spaces request starts evenly so that at most `rate` start in any `period` seconds.
+    """
+
+    def __init__(self, rate=RATE_LIMIT, period=RATE_PERIOD):
+        self.interval = period / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class IngestionClient:
+    """
+    Async JSON client over one pooled httpx connection pool.
+
+    Every GET goes through the rate limiter, is retried with exponential backoff on
+    connection errors, timeouts, 429 and 5xx, and is made conditional on the cached
+    ETag / Last-Modified, so an unchanged resource costs one 304 and no body.
+    The API token is only sent to URLs under base_url. With defer_cache=True new responses
+    are held until commit_cache(), so a caller can store them only once it has saved the
+    data; scope keeps the cache entries of different callers (e.g. output files) apart.
+    Use as an async context manager.
+    """
+
+    def __init__(self, base_url=API_BASE, token=None, cache_dir=CACHE_DIR, max_connections=MAX_CONNECTIONS,
+                 rate=RATE_LIMIT, period=RATE_PERIOD, retries=MAX_RETRIES, backoff=BACKOFF_SECONDS,
+                 timeout=TIMEOUT_SECONDS, transport=None, scope=None, defer_cache=False):
+        self.base_url = base_url
+        self.token = token
+        self.cache = ResponseCache(cache_dir)
+        self.scope = scope
+        self.defer_cache = defer_cache
+        self.pending = {}
+        self.max_connections = max_connections
+        self.limiter = RateLimiter(rate, period)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.transport = transport
+        self.client = None
+        self.stats = {'requests': 0, 'not_modified': 0, 'retries': 0}
+
+    async def __aenter__(self):
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url, timeout=self.timeout, transport=self.transport,
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections))
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.client.aclose()
+        self.client = None
+        return False
+
+    def _retry_delay(self, attempt, response=None):
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        if retry_after is not None and retry_after.isdigit():
+            return min(float(retry_after), MAX_BACKOFF_SECONDS)
+        return min(self.backoff * 2 ** attempt, MAX_BACKOFF_SECONDS)
+
+    def commit_cache(self):
+        """Store the responses held back by defer_cache."""
+        for key, entry in self.pending.items():
+            self.cache.put(key, entry)
+        self.pending.clear()
+
+    async def get_json(self, path, params=None, conditional=True):
+        """
+        GET path (relative to base_url, or an absolute URL) and decode its JSON body.
+        With conditional=False no validators are sent, so the full body is always returned.
+
+        Returns:
+            (data, changed): changed is False when the server answered 304 and data
+            comes from the cache.
+        Raises:
+            httpx.HTTPError: on a non-retryable status, or when the retries are exhausted.
+        """
+        url = str(self.client.build_request('GET', path, params=params).url)
+        key = url if self.scope is None else f"{self.scope} {url}"
+        cached = self.cache.get(key) if conditional else None
+        headers = ResponseCache.validators(cached)
+        if self.token and url.startswith(str(self.client.base_url)):
+            headers['X-Auth-Token'] = self.token
+        for attempt in range(self.retries + 1):
+            await self.limiter.wait()
+            self.stats['requests'] += 1
+            try:
+                response = await self.client.get(url, headers=headers)
+            except httpx.TransportError:
+                if attempt == self.retries:
+                    raise
+                response = None
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                break
+            if attempt == self.retries:
+                response.raise_for_status()
+            self.stats['retries'] += 1
+            await asyncio.sleep(self._retry_delay(attempt, response))
+
+        if response.status_code == 304 and cached is not None:
+            self.stats['not_modified'] += 1
+            return cached['body'], False
+        response.raise_for_status()
+        entry = ResponseCache.entry(url, response)
+        if self.defer_cache:
+            self.pending[key] = entry
+        else:
+            self.cache.put(key, entry)
+        return entry['body'], True
+
+    async def get_pages(self, path, pages, conditional=True):
+        """get_json for every params dict in pages, concurrently; results in page order."""
+        return await asyncio.gather(*(self.get_json(path, params, conditional) for params in pages))
+
+
+# Matches whose id is new or whose lastUpdated differs from the latest stored version
+def changed_matches(matches, existing):
+    if existing is None or existing.empty:
+        return matches
+    latest = existing.drop_duplicates('id', keep='last').set_index('id')['lastUpdated']
+    ids = matches['id'].astype(str)
+    stored = ids.map(latest)
+    return matches[stored.isna() | (stored != matches['lastUpdated'].astype(str))]
+
+
+def append_changed_matches(matches, path=QUALIFIERS_PATH):
+    """
+    Append the fetched matches that are new or changed to the CSV at path (created when missing).
+    Rows keep the file's column layout; a changed match gets a newer row and
+    clean_data keeps the latest version of each id.
+    Returns the number of rows appended.
+    """
+    if os.path.exists(path):
+        header = pd.read_csv(path, nrows=0).columns.tolist()
+        existing = pd.read_csv(path, usecols=['id', 'lastUpdated'], dtype=str)
+    else:
+        header, existing = matches.columns.tolist(), None
+    changed = changed_matches(matches, existing)
+    if changed.empty:
+        return 0
+    changed.reindex(columns=header).to_csv(path, mode='a', header=existing is None, index=False)
+    return len(changed)
+
+
+async def ingest_matches(path=QUALIFIERS_PATH, competition=COMPETITION, season=SEASON, stages=STAGES,
+                         **client_options):
+    """
+    Fetch every stage of a competition's season concurrently and append the new or
+    changed matches to path. When every page is unchanged (all 304s), the CSV is not read.
+
+    The cache is scoped to path and only updated once the rows are written, so a failed
+    append is retried on the next run; when path does not exist every page is fetched in full.
+    Returns the number of rows appended.
+    """
+    pages = [{'season': season, 'stage': stage} for stage in stages]
+    client = IngestionClient(scope=os.path.abspath(path), defer_cache=True, **client_options)
+    async with client:
+        pages = await client.get_pages(f'/competitions/{competition}/matches', pages,
+                                       conditional=os.path.exists(path))
+    stats = client.stats
+    print(f"Fetched {len(pages)} pages: {stats['requests']} requests, {stats['not_modified']} not modified, "
+          f"{stats['retries']} retries.")
+    n_rows = 0
+    if any(changed for _, changed in pages):
+        matches = pd.json_normalize([match for data, _ in pages for match in data.get('matches', [])])
+        if not matches.empty:
+            n_rows = append_changed_matches(matches, path)
+    client.commit_cache()
+    return n_rows
+
+
+def api_token():
+    """The football-data.org API key from the environment."""
+    token = os.environ.get(API_TOKEN_ENV)
+    if not token:
+        raise ValueError(f"Set {API_TOKEN_ENV} to your football-data.org API key.")
+    return token
+
+
+def fetch_matches(**kwargs):
+    kwargs.setdefault('token', api_token())
+    n_rows = asyncio.run(ingest_matches(**kwargs))
+    print(f"Appended {n_rows} new or changed matches.")
+    return n_rows
+
+
 if __name__ == "__main__":
-    fetch_all_csvs() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Copy the raw data files, or pull live matches from the API.")
+    parser.add_argument('--api', action='store_true',
+                        help=f"append new or changed World Cup {SEASON} matches to {os.path.basename(QUALIFIERS_PATH)} "
+                             f"(API key from ${API_TOKEN_ENV})")
+    args = parser.parse_args()
+    if args.api:
+        fetch_matches()
+    else:
+        fetch_all_csvs()
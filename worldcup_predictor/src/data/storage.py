@@ -0,0 +1,232 @@
+import os
+import sys
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # listed in requirements.txt; without it tables are stored as CSV only
+    pa = pq = None
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from monitoring.instrumentation import instruments
+
+PROCESSED_DIR = os.path.join(os.path.dirname(__file__), '../../data/processed')
+
+PARQUET_COMPRESSION = 'zstd'
+
+# Declared column types per processed table. Columns not listed keep the type pandas infers.
+# 'datetime' columns hold ISO dates and are parsed once, on write.
+TABLE_SCHEMAS = {
+    'WorldCupMatches_cleaned': {
+        'year': 'Int16', 'datetime': 'str', 'stage': 'str', 'stadium': 'str', 'city': 'str',
+        'home_team_name': 'str', 'home_team_goals': 'float64', 'away_team_goals': 'float64',
+        'away_team_name': 'str', 'win_conditions': 'str', 'attendance': 'float64',
+        'half-time_home_goals': 'float64', 'half-time_away_goals': 'float64',
+        'referee': 'str', 'assistant_1': 'str', 'assistant_2': 'str',
+        'roundid': 'Int64', 'matchid': 'Int64', 'home_team_initials': 'str', 'away_team_initials': 'str',
+    },
+    'WorldCupPlayers_cleaned': {
+        'roundid': 'int64', 'matchid': 'int64', 'team_initials': 'category', 'coach_name': 'str',
+        'line-up': 'category', 'shirt_number': 'int16', 'player_name': 'str', 'position': 'category',
+        'event': 'str',
+    },
+    'match_events': {
+        'matchid': 'int64', 'team_initials': 'str', 'player_name': 'str', 'shirt_number': 'int16',
+        'event': 'str', 'minute': 'int16', 'added': 'int16',
+    },
+    'fifa_ranking-2024-06-20_cleaned': {
+        'rank': 'float64', 'country_full': 'str', 'country_abrv': 'str', 'total_points': 'float64',
+        'previous_points': 'float64', 'rank_change': 'int32', 'confederation': 'category',
+        'rank_date': 'datetime',
+    },
+    'FIFA WC 2022 Players Stats_cleaned': {
+        'nationality': 'str', 'fifa_ranking': 'int16', 'position': 'category', 'player_name': 'str',
+    },
+    'team_features': {
+        'team': 'str', 'avg_goals_for': 'float64', 'avg_goals_against': 'float64', 'win_rate': 'float64',
+        'draw_rate': 'float64', 'loss_rate': 'float64', 'n_matches': 'int64', 'recent_form': 'float64',
+        'rank': 'float64', 'total_points': 'float64', 'elo': 'float64',
+    },
+    'player_features': {
+        'player_name': 'str', 'nationality': 'str', 'goals_scored': 'float64', 'assists_provided': 'float64',
+        'dribbles_per_90': 'float64', 'interceptions_per_90': 'float64', 'tackles_per_90': 'float64',
+        'total_duels_won_per_90': 'float64', 'save_percentage': 'float64', 'clean_sheets': 'float64',
+    },
+    'matchup_dataset': {
+        'team_a': 'str', 'team_b': 'str', 'diff_avg_goals_for': 'float64', 'diff_avg_goals_against': 'float64',
+        'diff_win_rate': 'float64', 'diff_recent_form': 'float64', 'label': 'int8',
+        'diff_rank': 'float64', 'diff_total_points': 'float64', 'diff_elo': 'float64',
+    },
+}
+
+
+def table_path(name, processed_dir=PROCESSED_DIR, fmt='parquet'):
+    return os.path.join(processed_dir, f'{name}.{fmt}')
+
+
+# Table name and directory for a path such as data/processed/team_features.csv
+def split_path(path):
+    return os.path.splitext(os.path.basename(path))[0], os.path.dirname(path)
+
+
+# Casts the declared columns of a table to their schema types
+def apply_schema(df, name):
+    df = df.copy(deep=False)
+    for col, dtype in TABLE_SCHEMAS.get(name, {}).items():
+        if col not in df.columns:
+            continue
+        if dtype == 'datetime':
+            if not pd.api.types.is_datetime64_any_dtype(df[col]):
+                df[col] = pd.to_datetime(df[col], format='ISO8601', errors='coerce')
+        elif df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def _parquet_is_current(name, processed_dir):
+    # A CSV edited by hand after the last write takes precedence over the columnar copy
+    parquet_path = table_path(name, processed_dir)
+    csv_path = table_path(name, processed_dir, 'csv')
+    if pq is None or not os.path.exists(parquet_path):
+        return False
+    return not os.path.exists(csv_path) or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+
+
+def write_table(df, name, processed_dir=PROCESSED_DIR, export_csv=True):
+    """
+    Store a processed table as compressed Parquet with its declared schema.
+    A CSV copy is written alongside for humans (always, when pyarrow is unavailable).
+    """
+    df = apply_schema(df, name)
+    instruments.add_rows(rows_out=len(df))
+    if export_csv or pq is None:
+        df.to_csv(table_path(name, processed_dir, 'csv'), index=False)
+    if pq is not None:
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), table_path(name, processed_dir),
+                       compression=PARQUET_COMPRESSION)
+    return df
+
+
+# write_table for a path to a processed CSV
+def write_file(df, path, export_csv=True):
+    name, processed_dir = split_path(path)
+    return write_table(df, name, processed_dir=processed_dir, export_csv=export_csv)
+
+
+def read_table(name, columns=None, processed_dir=PROCESSED_DIR, memory_map=True):
+    """
+    Load a processed table, reading only the requested columns.
+    Uses the memory-mapped Parquet file when it is current, otherwise parses the CSV
+    and applies the declared schema.
+    """
+    if _parquet_is_current(name, processed_dir):
+        df = pq.read_table(table_path(name, processed_dir), columns=columns, memory_map=memory_map).to_pandas()
+    else:
+        df = apply_schema(pd.read_csv(table_path(name, processed_dir, 'csv'), usecols=columns, low_memory=False), name)
+    instruments.add_rows(rows_in=len(df))
+    return df
+
+
+# read_table for a path to a processed CSV, preferring its Parquet sibling when current
+def read_file(path, columns=None):
+    name, processed_dir = split_path(path)
+    return read_table(name, columns=columns, processed_dir=processed_dir)
+
+
+def iter_table(name, chunksize, columns=None, processed_dir=PROCESSED_DIR):
+    """
+    Yield a processed table in DataFrame chunks of at most chunksize rows,
+    so arbitrarily large tables can be processed with bounded memory.
+    """
+    if _parquet_is_current(name, processed_dir):
+        parquet_file = pq.ParquetFile(table_path(name, processed_dir), memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            instruments.add_rows(rows_in=batch.num_rows)
+            yield batch.to_pandas()
+        return
+    for chunk in pd.read_csv(table_path(name, processed_dir, 'csv'), usecols=columns, chunksize=chunksize):
+        instruments.add_rows(rows_in=len(chunk))
+        yield apply_schema(chunk, name)
+
+
+def iter_file(path, chunksize, columns=None):
+    name, processed_dir = split_path(path)
+    return iter_table(name, chunksize, columns=columns, processed_dir=processed_dir)
+
+
+class TableWriter:
+    """
+    Appends DataFrame chunks to a processed table (Parquet plus the CSV export).
+    Use as a context manager. Chunks go to temporary files that replace the table
+    on exit, so readers never see a partial table and an exception leaves the
+    previous one in place; the header / Parquet footer is written even when no
+    rows were appended.
+    """
+
+    def __init__(self, name, columns, processed_dir=PROCESSED_DIR, export_csv=True):
+        self.name = name
+        self.columns = list(columns)
+        self.processed_dir = processed_dir
+        self.export_csv = export_csv or pq is None
+        self.n_rows = 0
+        self._parquet_writer = None
+        self.csv_path = table_path(name, processed_dir, 'csv')
+        self.parquet_path = table_path(name, processed_dir)
+        self._csv_tmp = f"{self.csv_path}.{os.getpid()}.tmp"
+        self._parquet_tmp = f"{self.parquet_path}.{os.getpid()}.tmp"
+
+    @classmethod
+    def for_file(cls, path, columns, export_csv=True):
+        name, processed_dir = split_path(path)
+        return cls(name, columns, processed_dir=processed_dir, export_csv=export_csv)
+
+    def __enter__(self):
+        if self.export_csv:
+            pd.DataFrame(columns=self.columns).to_csv(self._csv_tmp, index=False)
+        return self
+
+    def write(self, df):
+        df = apply_schema(df[self.columns], self.name)
+        if self.export_csv:
+            df.to_csv(self._csv_tmp, mode='a', header=False, index=False)
+        if pq is not None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self._parquet_tmp, table.schema,
+                                                        compression=PARQUET_COMPRESSION)
+            self._parquet_writer.write_table(table.cast(self._parquet_writer.schema))
+        self.n_rows += len(df)
+        instruments.add_rows(rows_out=len(df))
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        elif pq is not None and exc_type is None:
+            empty = apply_schema(pd.DataFrame(columns=self.columns), self.name)
+            pq.write_table(pa.Table.from_pandas(empty, preserve_index=False), self._parquet_tmp,
+                           compression=PARQUET_COMPRESSION)
+        if exc_type is not None:
+            for tmp_path in (self._csv_tmp, self._parquet_tmp):
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            return False
+        # The CSV goes first, so the Parquet copy is never older than it and stays the one read
+        if self.export_csv:
+            os.replace(self._csv_tmp, self.csv_path)
+        if pq is not None:
+            os.replace(self._parquet_tmp, self.parquet_path)
+        return False
+
+
+# Converts every CSV in data/processed to its columnar form
+def convert_processed_dir(processed_dir=PROCESSED_DIR):
+    for fname in sorted(os.listdir(processed_dir)):
+        if fname.lower().endswith('.csv'):
+            name = fname[:-len('.csv')]
+            write_table(read_table(name, processed_dir=processed_dir), name, processed_dir, export_csv=False)
+            print(f"Stored {fname} -> {name}.parquet")
+
+
+if __name__ == "__main__":
+    convert_processed_dir()
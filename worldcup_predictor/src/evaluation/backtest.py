@@ -1,8 +1,28 @@
+import argparse
+import functools
+import os
+import sys
 import numpy as np
 import pandas as pd
-from typing import List, Dict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Dict, Optional, Tuple
+from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import mean_squared_error
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from data.build_matchup_dataset import feature_cols, matchup_rows
+from data.storage import read_file
+from features.feature_engineering import compute_team_features
+from models.probability_matrix import win_probs
+
+PROCESSED_DIR = os.path.join(os.path.dirname(__file__), '../../data/processed')
+MATCHES_PATH = os.path.join(PROCESSED_DIR, 'WorldCupMatches_cleaned.csv')
+
+DIFF_COLUMNS = [f'diff_{col}' for col in feature_cols]
+# Predicted probabilities are clipped to [EPS, 1 - EPS] so log-loss stays finite
+EPS = 1e-15
+CALIBRATION_BINS = 10
+
 def accuracy_score(y_true: List[str], y_pred: List[str]) -> float:
     """
     Compute the accuracy of predictions.
@@ -54,10 +74,139 @@ def evaluate_predictions(y_true: List[str], y_pred: List[str], y_prob: List[floa
         results['rmse'] = rmse_score(y_true_bin, y_prob)
     return results
 
-# Example usage (to be replaced with real data/model integration)
+def log_loss_score(y_true, y_prob) -> float:
+    """
+    Compute the binary log-loss (cross-entropy) of predicted probabilities.
+    Args:
+        y_true: Array of true binary outcomes (0 or 1).
+        y_prob: Array of predicted probabilities for class 1.
+    Returns:
+        Mean log-loss as a float.
+    """
+    y_true = np.asarray(y_true, dtype=float)
+    y_prob = np.clip(np.asarray(y_prob, dtype=float), EPS, 1 - EPS)
+    return float(-np.mean(y_true * np.log(y_prob) + (1 - y_true) * np.log(1 - y_prob)))
+
+def calibration_table(y_true, y_prob, n_bins: int = CALIBRATION_BINS) -> pd.DataFrame:
+    """
+    Reliability table: predictions grouped into equal-width probability bins.
+    Args:
+        y_true: Array of true binary outcomes (0 or 1).
+        y_prob: Array of predicted probabilities for class 1.
+        n_bins: Number of bins over [0, 1].
+    Returns:
+        DataFrame with one row per bin: 'bin_lower', 'bin_upper', 'count',
+        'mean_predicted' and 'observed_rate' (NaN for empty bins).
+    """
+    y_true = np.asarray(y_true, dtype=float)
+    y_prob = np.asarray(y_prob, dtype=float)
+    bins = np.minimum((y_prob * n_bins).astype(int), n_bins - 1)
+    count = np.bincount(bins, minlength=n_bins)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_predicted = np.bincount(bins, weights=y_prob, minlength=n_bins) / count
+        observed_rate = np.bincount(bins, weights=y_true, minlength=n_bins) / count
+    edges = np.linspace(0, 1, n_bins + 1)
+    return pd.DataFrame({'bin_lower': edges[:-1], 'bin_upper': edges[1:], 'count': count,
+                         'mean_predicted': mean_predicted, 'observed_rate': observed_rate})
+
+def expected_calibration_error(y_true, y_prob, n_bins: int = CALIBRATION_BINS) -> float:
+    """
+    Compute the expected calibration error: the count-weighted mean gap between
+    predicted probability and observed frequency over the calibration bins.
+    """
+    table = calibration_table(y_true, y_prob, n_bins)
+    filled = table[table['count'] > 0]
+    gaps = (filled['mean_predicted'] - filled['observed_rate']).abs()
+    return float((gaps * filled['count']).sum() / filled['count'].sum())
+
+def binary_metrics(y_true, y_prob) -> Dict[str, float]:
+    """
+    Accuracy (at 0.5), log-loss, Brier score and expected calibration error of binary predictions.
+    """
+    y_true = np.asarray(y_true)
+    y_prob = np.asarray(y_prob, dtype=float)
+    return {
+        'accuracy': float(np.mean((y_prob > 0.5) == (y_true == 1))),
+        'log_loss': log_loss_score(y_true, y_prob),
+        'brier': float(brier_score(y_true, y_prob)),
+        'ece': expected_calibration_error(y_true, y_prob),
+    }
+
+def default_model():
+    return RandomForestClassifier(n_estimators=100, random_state=42)
+
+def run_fold(matches: pd.DataFrame, year: int, model_factory: Callable = default_model) -> Tuple[Dict, pd.DataFrame]:
+    """
+    Train on every World Cup before `year` and evaluate on the `year` edition.
+    Team features are recomputed from the matches before the cutoff only, so neither
+    the model nor the features see the edition being predicted.
+    Args:
+        matches: Cleaned match history with a 'year' column.
+        year: Edition to evaluate.
+        model_factory: Callable returning an unfitted classifier.
+    Returns:
+        (fold summary dict, DataFrame of test predictions with 'label' and 'prob').
+    """
+    history = matches[matches['year'] < year]
+    edition = matches[matches['year'] == year]
+    team_stats = compute_team_features(history).set_index('team')
+
+    train = matchup_rows(history, team_stats)
+    test = matchup_rows(edition, team_stats)
+    model = model_factory()
+    model.fit(train[DIFF_COLUMNS], train['label'])
+
+    predictions = test[['team_a', 'team_b', 'label']].copy()
+    predictions['prob'] = win_probs(model, test[DIFF_COLUMNS].to_numpy()) if len(test) else []
+    predictions.insert(0, 'year', year)
+    summary = {'year': year, 'n_train': len(train), 'n_test': len(test),
+               # Test matches involving a team without any earlier World Cup match cannot be scored
+               'n_unscored': int(len(edition) * 2 - len(test))}
+    if len(test):
+        summary.update(binary_metrics(test['label'], predictions['prob']))
+    return summary, predictions
+
+def walk_forward_backtest(matches: Optional[pd.DataFrame] = None, n_workers: Optional[int] = None,
+                          model_factory: Callable = default_model, min_train_editions: int = 1) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Rolling-origin backtest: one fold per edition, trained on all earlier editions.
+    Folds are independent and run in parallel worker processes.
+    Args:
+        matches: Cleaned match history (default: WorldCupMatches_cleaned).
+        n_workers: Worker processes (default: one per CPU); 1 runs the folds in this process.
+        model_factory: Picklable callable returning an unfitted classifier.
+        min_train_editions: Editions of history required before the first evaluated edition.
+    Returns:
+        (per-fold metrics DataFrame, test predictions of every fold).
+    """
+    if matches is None:
+        matches = read_file(MATCHES_PATH)
+    matches = matches.dropna(subset=['year', 'home_team_name', 'away_team_name', 'home_team_goals', 'away_team_goals'])
+    years = [int(year) for year in sorted(matches['year'].unique())][min_train_editions:]
+    if not years:
+        raise ValueError(f"Need more than {min_train_editions} editions of matches to backtest")
+
+    fold = functools.partial(run_fold, matches, model_factory=model_factory)
+    n_workers = min(n_workers or os.cpu_count() or 1, len(years))
+    if n_workers == 1:
+        results = [fold(year) for year in years]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            results = list(pool.map(fold, years))
+
+    folds = pd.DataFrame([summary for summary, _ in results])
+    predictions = pd.concat([preds for _, preds in results], ignore_index=True)
+    return folds, predictions
+
 if __name__ == "__main__":
-    y_true = ['win', 'draw', 'loss', 'win', 'loss']
-    y_pred = ['win', 'loss', 'loss', 'win', 'draw']
-    y_prob = [0.8, 0.2, 0.1, 0.7, 0.3]  # Probabilities for 'win'
-    results = evaluate_predictions(y_true, y_pred, y_prob)
-    print(results) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the match model over every World Cup edition.")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    folds, predictions = walk_forward_backtest(n_workers=args.workers)
+    pd.set_option('display.width', 120)
+    print(folds.round(3).to_string(index=False))
+    overall = binary_metrics(predictions['label'], predictions['prob'])
+    print("\nAll folds: " + ", ".join(f"{name}={value:.3f}" for name, value in overall.items()))
+    print("\nCalibration (all folds):")
+    print(calibration_table(predictions['label'], predictions['prob']).round(3).to_string(index=False))
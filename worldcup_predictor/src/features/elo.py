@@ -0,0 +1,196 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from data.storage import read_file
+from features.feature_engineering import parse_match_dates
+from features.rankings import RankingIndex
+
+PROCESSED_DIR = os.path.join(os.path.dirname(__file__), '../../data/processed')
+MATCHES_PATH = os.path.join(PROCESSED_DIR, 'WorldCupMatches_cleaned.csv')
+ELO_STATE_PATH = os.path.join(PROCESSED_DIR, 'elo_state.npz')
+
+INITIAL_RATING = 1500.0
+# Weight of a World Cup finals match in the World Football Elo Ratings
+K_FACTOR = 60.0
+# World Cup matches are mostly at neutral venues; pass ~100 for histories with real home fixtures
+HOME_ADVANTAGE = 0.0
+RATING_SCALE = 400.0
+
+MATCH_COLUMNS = ['home_team_name', 'away_team_name', 'home_team_goals', 'away_team_goals', 'datetime']
+
+
+# Expected score (win = 1, draw = 0.5) of a side rated rating_a against one rated rating_b
+def expected_score(rating_a, rating_b, scale=RATING_SCALE):
+    return 1 / (1 + 10 ** ((rating_b - rating_a) / scale))
+
+
+# K-factor multiplier for the goal difference: 1 for one goal, 1.5 for two, (11 + n) / 8 beyond
+def margin_multiplier(goal_difference):
+    margin = np.abs(goal_difference)
+    return np.where(margin <= 1, 1.0, np.where(margin == 2, 1.5, (11 + margin) / 8))
+
+
+class EloRatings:
+    """
+    Elo ratings of every team, computed in one chronological pass over the results.
+
+    Every rating change is kept in three flat arrays (team id, day, rating after the match),
+    so a team's rating as of any date is a binary search in the RankingIndex built over them.
+    update() folds in newly finished matches without replaying the history.
+    """
+
+    def __init__(self, k_factor=K_FACTOR, home_advantage=HOME_ADVANTAGE, margin_scaling=True,
+                 initial_rating=INITIAL_RATING):
+        self.k_factor = k_factor
+        self.home_advantage = home_advantage
+        self.margin_scaling = margin_scaling
+        self.initial_rating = initial_rating
+        self.teams = []
+        self.team_ids = {}
+        self.current = []
+        self.history_team = np.empty(0, dtype=np.int32)
+        self.history_day = np.empty(0, dtype=np.int64)
+        self.history_rating = np.empty(0, dtype=np.float64)
+        self._index = None
+
+    @classmethod
+    def from_matches(cls, matches_df, **params):
+        ratings = cls(**params)
+        ratings.update(matches_df)
+        return ratings
+
+    def __len__(self):
+        return len(self.teams)
+
+    @property
+    def last_day(self):
+        return int(self.history_day[-1]) if len(self.history_day) else None
+
+    def _team_id(self, team):
+        team_id = self.team_ids.get(team)
+        if team_id is None:
+            team_id = self.team_ids[team] = len(self.teams)
+            self.teams.append(team)
+            self.current.append(self.initial_rating)
+        return team_id
+
+    def update(self, matches_df):
+        """
+        Apply finished matches in date order. Matches without a score or a parseable date are
+        skipped. An optional boolean 'neutral' column turns off home advantage per match.
+
+        Returns:
+            Set of teams whose rating changed.
+        Raises:
+            ValueError: if a match is older than the latest one already applied; the ratings
+                are path dependent, so rebuild them with from_matches instead.
+        """
+        dates = parse_match_dates(matches_df['datetime'])
+        complete = (dates.notna() & matches_df['home_team_goals'].notna() & matches_df['away_team_goals'].notna()).to_numpy()
+        matches_df, dates = matches_df[complete], dates[complete]
+        days = dates.to_numpy(dtype='datetime64[D]').astype(np.int64)
+        if len(days) and self.last_day is not None and days.min() < self.last_day:
+            raise ValueError("Matches older than the latest applied result cannot be added incrementally; "
+                             "rebuild the ratings with EloRatings.from_matches.")
+        order = np.argsort(days, kind='stable')
+
+        home = [self._team_id(team) for team in matches_df['home_team_name'].to_numpy()[order]]
+        away = [self._team_id(team) for team in matches_df['away_team_name'].to_numpy()[order]]
+        goal_difference = (matches_df['home_team_goals'].to_numpy(dtype=float)
+                           - matches_df['away_team_goals'].to_numpy(dtype=float))[order]
+        result = np.sign(goal_difference) / 2 + 0.5
+        weight = self.k_factor * (margin_multiplier(goal_difference) if self.margin_scaling else np.ones(len(order)))
+        advantage = np.full(len(order), float(self.home_advantage))
+        if 'neutral' in matches_df.columns:
+            advantage[matches_df['neutral'].fillna(False).to_numpy(dtype=bool)[order]] = 0.0
+
+        # Sequential by nature: each match starts from the ratings the previous ones left
+        current = self.current
+        new_home, new_away = np.empty(len(order)), np.empty(len(order))
+        for i, (h, a, score, k, adv) in enumerate(zip(home, away, result.tolist(), weight.tolist(), advantage.tolist())):
+            change = k * (score - expected_score(current[h] + adv, current[a]))
+            current[h] += change
+            current[a] -= change
+            new_home[i], new_away[i] = current[h], current[a]
+
+        # Two history rows per match, home then away
+        self.history_team = np.concatenate([self.history_team, np.column_stack([home, away]).ravel().astype(np.int32)])
+        self.history_day = np.concatenate([self.history_day, np.repeat(days[order], 2)])
+        self.history_rating = np.concatenate([self.history_rating, np.column_stack([new_home, new_away]).ravel()])
+        self._index = None
+        return {self.teams[i] for i in home + away}
+
+    def ratings(self):
+        """Current rating of every team, best first."""
+        df = pd.DataFrame({'team': self.teams, 'elo': self.current})
+        return df.sort_values('elo', ascending=False, kind='stable').reset_index(drop=True)
+
+    def rating(self, team):
+        team_id = self.team_ids.get(team)
+        return self.initial_rating if team_id is None else self.current[team_id]
+
+    def history_index(self):
+        if self._index is None:
+            teams = np.array(self.teams, dtype=object)[self.history_team]
+            # The index sorts stably, so of two updates on one day the later one is found
+            self._index = RankingIndex(teams, self.history_day.astype('datetime64[D]'), self.history_rating[:, None], ['elo'])
+        return self._index
+
+    def asof(self, teams, dates, before=False):
+        """
+        Ratings of teams as of dates, for any number of (team, date) pairs in one lookup.
+        With before=True the matches played on the date itself are excluded (pre-match ratings).
+        Teams without a rated match by then get the initial rating.
+        """
+        days = pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[D]')
+        if before:
+            days = days - np.timedelta64(1, 'D')
+        values = self.history_index().asof(teams, days)[:, 0]
+        return np.where(np.isnan(values), self.initial_rating, values)
+
+    def save(self, path=ELO_STATE_PATH):
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(
+            tmp_path, teams=np.array(self.teams, dtype=str), current=np.array(self.current),
+            history_team=self.history_team, history_day=self.history_day, history_rating=self.history_rating,
+            params=np.array([self.k_factor, self.home_advantage, float(self.margin_scaling), self.initial_rating]))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=ELO_STATE_PATH):
+        with np.load(path) as data:
+            k_factor, home_advantage, margin_scaling, initial_rating = data['params'].tolist()
+            ratings = cls(k_factor, home_advantage, bool(margin_scaling), initial_rating)
+            ratings.teams = data['teams'].tolist()
+            ratings.current = data['current'].tolist()
+            ratings.history_team = data['history_team']
+            ratings.history_day = data['history_day']
+            ratings.history_rating = data['history_rating']
+        ratings.team_ids = {team: i for i, team in enumerate(ratings.teams)}
+        return ratings
+
+
+def update_elo_ratings(new_matches, path=ELO_STATE_PATH):
+    """Fold newly finished matches into the persisted ratings. Returns the updated EloRatings."""
+    ratings = EloRatings.load(path)
+    affected = ratings.update(new_matches)
+    ratings.save(path)
+    print(f"Updated Elo ratings for {len(affected)} teams.")
+    return ratings
+
+
+# Full rebuild from the match history
+def build_elo_ratings(matches_path=MATCHES_PATH, path=ELO_STATE_PATH, **params):
+    ratings = EloRatings.from_matches(read_file(matches_path, columns=MATCH_COLUMNS), **params)
+    ratings.save(path)
+    return ratings
+
+
+if __name__ == "__main__":
+    ratings = build_elo_ratings()
+    print(f"Saved Elo ratings for {len(ratings)} teams to {ELO_STATE_PATH}.")
+    print(ratings.ratings().head(10).to_string(index=False))
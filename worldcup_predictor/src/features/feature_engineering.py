@@ -1,13 +1,42 @@
 # Placeholder for feature engineering functions 
+import bisect
+import json
 import os
+import sys
 import pandas as pd
 import numpy as np
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from data.storage import read_file, read_table, write_file, write_table
+from features.rankings import RANKINGS_PATH, RankingIndex
+
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), '../../data/processed')
 
-def compute_team_features(matches_df):
-    print("Generating team-level features...")
+# Number of most recent matches averaged into recent_form
+RECENT_WINDOW = 5
+
+STATE_PATH = os.path.join(PROCESSED_DIR, 'team_feature_state.json')
+TEAM_FEATURES_PATH = os.path.join(PROCESSED_DIR, 'team_features.csv')
+# Saved by features/elo.py (which imports this module, so the path is not imported from there)
+ELO_STATE_PATH = os.path.join(PROCESSED_DIR, 'elo_state.npz')
+
+# Current FIFA ranking and Elo rating of each team: what diff_rank, diff_total_points and
+# diff_elo in the matchup dataset are the difference of, as of today
+STRENGTH_COLUMNS = ['rank', 'total_points', 'elo']
+
 
+# Match dates are ISO after clean_data; older files still hold '13 Jul 1930 - 15:00' / '17 June 1970 - 16:00'.
+# Those are parsed value by value, so the result never depends on which row comes first.
+def parse_match_dates(values):
+    dates = pd.to_datetime(values, format='ISO8601', errors='coerce')
+    legacy = dates.isna() & values.notna()
+    if legacy.any():
+        dates[legacy] = pd.to_datetime(values[legacy], format='mixed', dayfirst=True, errors='coerce')
+    return dates
+
+
+# One row per team per match: the home side and the away side of every fixture, with W/D/L flags
+def stack_team_matches(matches_df):
     # Stack home and away stats for per-team aggregation
     home = matches_df[[
         'home_team_name', 'away_team_name', 'home_team_goals', 'away_team_goals', 'datetime'
@@ -32,12 +61,19 @@ def compute_team_features(matches_df):
     away['is_home'] = 0
 
     all_matches = pd.concat([home, away], ignore_index=True)
-    all_matches['date'] = pd.to_datetime(all_matches['datetime'], errors='coerce')
+    all_matches['date'] = parse_match_dates(all_matches['datetime'])
 
     # Win/draw/loss
     all_matches['win'] = (all_matches['goals_for'] > all_matches['goals_against']).astype(int)
     all_matches['draw'] = (all_matches['goals_for'] == all_matches['goals_against']).astype(int)
     all_matches['loss'] = (all_matches['goals_for'] < all_matches['goals_against']).astype(int)
+    return all_matches
+
+
+def compute_team_features(matches_df):
+    print("Generating team-level features...")
+
+    all_matches = stack_team_matches(matches_df)
 
     # Aggregate features
     team_stats = all_matches.groupby('team').agg(
@@ -51,13 +87,188 @@ def compute_team_features(matches_df):
 
     # Recent form: average goals in last 5 matches
     all_matches = all_matches.sort_values(['team', 'date'])
-    all_matches['recent_goals'] = all_matches.groupby('team')['goals_for'].rolling(5, min_periods=1).mean().reset_index(level=0, drop=True)
+    all_matches['recent_goals'] = all_matches.groupby('team')['goals_for'].rolling(RECENT_WINDOW, min_periods=1).mean().reset_index(level=0, drop=True)
     recent_form = all_matches.groupby('team')['recent_goals'].last().rename('recent_form')
 
     team_features = team_stats.join(recent_form)
     team_features = team_features.reset_index()
     return team_features
-    
+
+
+# Sort key for a stored match date; unparseable dates (None) sort last, as NaT does in sort_values
+def _date_key(date):
+    return (date is None, date or '')
+
+
+def _to_date_string(date):
+    return None if pd.isna(date) else date.isoformat()
+
+
+# Identifies a team's match in the state: its kickoff (the raw value when unparseable) and opponent
+def _match_key(date, raw_datetime, opponent):
+    return f"{_to_date_string(date) or str(raw_datetime).strip()}|{opponent}"
+
+
+def compute_team_state(matches_df):
+    """
+    Running state per team that compute_team_features can be reproduced from:
+    goal and result sums, match count, and the last RECENT_WINDOW (date, goals_for)
+    pairs in chronological order. The keys of the matches already counted are kept
+    under 'played', so update_team_state can skip them.
+    """
+    all_matches = stack_team_matches(matches_df)
+    sums = all_matches.groupby('team').agg(
+        goals_for = ('goals_for', 'sum'),
+        goals_against = ('goals_against', 'sum'),
+        wins = ('win', 'sum'),
+        draws = ('draw', 'sum'),
+        losses = ('loss', 'sum'),
+        n_matches = ('win', 'count')
+    )
+    recent = all_matches.sort_values(['team', 'date']).groupby('team').tail(RECENT_WINDOW)
+
+    state = {team: {'recent': [], 'played': []} for team in sums.index}
+    for col in sums.columns:
+        for team, value in zip(sums.index, sums[col].tolist()):
+            state[team][col] = value
+    for team, date, goals in zip(recent['team'], recent['date'], recent['goals_for']):
+        state[team]['recent'].append([_to_date_string(date), float(goals)])
+    for team, date, raw, opponent in zip(all_matches['team'], all_matches['date'], all_matches['datetime'],
+                                         all_matches['opponent']):
+        state[team]['played'].append(_match_key(date, raw, opponent))
+    return state
+
+
+def update_team_state(state, new_matches):
+    """
+    Fold newly finished matches into the running state in place.
+    Only teams that played are touched. A match already in the state (same kickoff
+    and teams) is skipped, so re-applying a batch changes nothing.
+    Returns the set of affected teams.
+    Assumes one team never has two matches with the same kickoff time.
+    """
+    affected = set()
+    played = {}
+    new_rows = stack_team_matches(new_matches)
+    for team, opponent, raw, date, goals_for, goals_against, win, draw, loss in zip(
+            new_rows['team'], new_rows['opponent'], new_rows['datetime'], new_rows['date'], new_rows['goals_for'],
+            new_rows['goals_against'], new_rows['win'], new_rows['draw'], new_rows['loss']):
+        entry = state.setdefault(team, {'goals_for': 0.0, 'goals_against': 0.0, 'wins': 0, 'draws': 0,
+                                        'losses': 0, 'n_matches': 0, 'recent': [], 'played': []})
+        # State files written before match keys were kept have no 'played' list
+        if team not in played:
+            played[team] = set(entry.setdefault('played', []))
+        key = _match_key(date, raw, opponent)
+        if key in played[team]:
+            continue
+        played[team].add(key)
+        entry['played'].append(key)
+
+        entry['goals_for'] += float(goals_for)
+        entry['goals_against'] += float(goals_against)
+        entry['wins'] += int(win)
+        entry['draws'] += int(draw)
+        entry['losses'] += int(loss)
+        entry['n_matches'] += 1
+
+        # Ring buffer of the latest matches, kept in date order; later arrivals go after equal dates
+        date = _to_date_string(date)
+        recent = entry['recent']
+        position = bisect.bisect_right([_date_key(d) for d, _ in recent], _date_key(date))
+        recent.insert(position, [date, float(goals_for)])
+        if len(recent) > RECENT_WINDOW:
+            recent.pop(0)
+        affected.add(team)
+    return affected
+
+
+# Features in the same layout (and with the same values) as compute_team_features
+def team_state_to_features(state):
+    rows = []
+    for team in sorted(state):
+        entry = state[team]
+        n = entry['n_matches']
+        recent_goals = [goals for _, goals in entry['recent']]
+        rows.append({
+            'team': team,
+            'avg_goals_for': entry['goals_for'] / n,
+            'avg_goals_against': entry['goals_against'] / n,
+            'win_rate': entry['wins'] / n,
+            'draw_rate': entry['draws'] / n,
+            'loss_rate': entry['losses'] / n,
+            'n_matches': n,
+            'recent_form': sum(recent_goals) / len(recent_goals),
+        })
+    return pd.DataFrame(rows)
+
+
+def save_team_state(state, path=STATE_PATH):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def load_team_state(path=STATE_PATH):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No team feature state at {path}; run feature_engineering.py for a full rebuild first.")
+    with open(path) as f:
+        return json.load(f)
+
+
+# The latest initials each team name appears with in the match history (the rankings' country_abrv)
+def team_initials(matches_df):
+    sides = pd.concat([
+        matches_df[['home_team_name', 'home_team_initials']].set_axis(['team', 'initials'], axis=1),
+        matches_df[['away_team_name', 'away_team_initials']].set_axis(['team', 'initials'], axis=1),
+    ], ignore_index=True).dropna()
+    return sides.groupby('team')['initials'].last()
+
+
+def add_strength_columns(team_df, initials=None, rankings_path=RANKINGS_PATH, elo_path=ELO_STATE_PATH):
+    """
+    Add STRENGTH_COLUMNS to a team feature table: each team's latest FIFA rank and points
+    (looked up by initials, a Series mapping team name to country code) and its current Elo
+    rating. Columns whose source file does not exist are left out; teams that were never
+    ranked get NaN.
+    """
+    team_df = team_df.copy()
+    if initials is not None and rankings_path and os.path.exists(rankings_path):
+        rankings = RankingIndex.load(rankings_path)
+        # A date past the last ranking gets every country's latest one
+        latest = np.full(len(team_df), rankings.days.max() if len(rankings) else 0).astype('datetime64[D]')
+        team_df[['rank', 'total_points']] = rankings.asof(team_df['team'].map(initials), latest)
+    if elo_path and os.path.exists(elo_path):
+        from features.elo import EloRatings
+        elo = EloRatings.load(elo_path)
+        team_df['elo'] = [elo.rating(team) for team in team_df['team']]
+    return team_df
+
+
+def update_team_features(new_matches, state_path=STATE_PATH, features_path=TEAM_FEATURES_PATH,
+                         elo_path=ELO_STATE_PATH):
+    """
+    Refresh team_features.csv with newly finished matches without re-reading the match history.
+    The persisted state is updated for the affected teams only, and the result is
+    identical to running compute_team_features over the full history.
+    Ranking columns are kept from the previous table; the Elo ratings are re-read from
+    elo_path, so run update_elo_ratings with the same matches first.
+    """
+    state = load_team_state(state_path)
+    affected = update_team_state(state, new_matches)
+    team_df = team_state_to_features(state)
+    if os.path.exists(features_path):
+        previous = read_file(str(features_path))
+        kept = [col for col in STRENGTH_COLUMNS if col in previous.columns]
+        if kept:
+            team_df = team_df.merge(previous[['team'] + kept], on='team', how='left')
+    if 'elo' in team_df.columns:
+        team_df = add_strength_columns(team_df, rankings_path=None, elo_path=elo_path)
+    save_team_state(state, state_path)
+    write_file(team_df, features_path)
+    print(f"Updated team features for {len(affected)} teams.")
+    return team_df
+
 
 def compute_player_features(players_df):
     print("Generating player-level features...")
@@ -81,28 +292,31 @@ def compute_player_features(players_df):
     return player_features
 
 
-def main():
-    # Load data
-    print("Loading cleaned data...")
-    matches_path = os.path.join(PROCESSED_DIR, 'WorldCupMatches_cleaned.csv')
-    players_path = os.path.join(PROCESSED_DIR, 'FIFA WC 2022 Players Stats_cleaned.csv')
+# Team features and the running state used by update_team_features
+def build_team_features(rankings_path=RANKINGS_PATH, elo_path=ELO_STATE_PATH):
+    print("Loading cleaned match history...")
+    matches_df = read_table('WorldCupMatches_cleaned', processed_dir=PROCESSED_DIR)
+    matches_df['date'] = parse_match_dates(matches_df['datetime'])
+    team_df = add_strength_columns(compute_team_features(matches_df), team_initials(matches_df), rankings_path, elo_path)
+    write_file(team_df, TEAM_FEATURES_PATH)
+    save_team_state(compute_team_state(matches_df))
+    return team_df
 
-    matches_df = pd.read_csv(matches_path)
-    players_df = pd.read_csv(players_path)
 
-    # Ensure proper types
-    matches_df['date'] = pd.to_datetime(matches_df['datetime'], errors='coerce')
+def build_player_features():
+    print("Loading cleaned player stats...")
+    players_df = read_table('FIFA WC 2022 Players Stats_cleaned', processed_dir=PROCESSED_DIR)
     # Remove minutes_played reference
     # players_df['minutes_played'] = players_df['minutes_played'].replace(0, np.nan)
-
-    # Compute features
-    team_df = compute_team_features(matches_df)
     player_df = compute_player_features(players_df)
+    write_table(player_df, 'player_features', processed_dir=PROCESSED_DIR)
+    return player_df
 
-    # Save results
-    team_df.to_csv(os.path.join(PROCESSED_DIR, 'team_features.csv'), index=False)
-    player_df.to_csv(os.path.join(PROCESSED_DIR, 'player_features.csv'), index=False)
 
+def main():
+    # Team and player features are independent; the pipeline runner builds them concurrently
+    build_team_features()
+    build_player_features()
     print("Feature engineering complete. Outputs saved to data/processed/.")
 
 
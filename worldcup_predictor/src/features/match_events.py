@@ -0,0 +1,234 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from data.storage import TableWriter, iter_file, read_file, write_file
+
+PROCESSED_DIR = os.path.join(os.path.dirname(__file__), '../../data/processed')
+
+PLAYERS_PATH = os.path.join(PROCESSED_DIR, 'WorldCupPlayers_cleaned.csv')
+MATCHES_PATH = os.path.join(PROCESSED_DIR, 'WorldCupMatches_cleaned.csv')
+EVENTS_PATH = os.path.join(PROCESSED_DIR, 'match_events.csv')
+PLAYER_EVENT_FEATURES_PATH = os.path.join(PROCESSED_DIR, 'player_event_features.csv')
+TEAM_EVENT_FEATURES_PATH = os.path.join(PROCESSED_DIR, 'team_event_features.csv')
+
+# Lineup rows streamed per chunk
+CHUNK_ROWS = 50_000
+
+# One event in WorldCupPlayers' `event` column: code, minute and optional stoppage time, e.g. G43' or Y90+2'
+EVENT_PATTERN = r"(?P<code>[A-Z]+)(?P<minute>\d+)(?:\+(?P<added>\d+))?'"
+# Event codes used by WorldCupPlayers. W is an own goal; IH/OH are substitutions at half-time.
+EVENT_CODES = {
+    'G': 'goal',
+    'P': 'penalty_goal',
+    'W': 'own_goal',
+    'OG': 'own_goal',
+    'MP': 'missed_penalty',
+    'Y': 'yellow_card',
+    'R': 'red_card',
+    'RSY': 'second_yellow',
+    'SY': 'second_yellow',
+    'I': 'sub_in',
+    'IH': 'sub_in',
+    'O': 'sub_out',
+    'OH': 'sub_out',
+}
+EVENT_TYPES = list(dict.fromkeys(EVENT_CODES.values()))
+
+LINEUP_COLUMNS = ['matchid', 'team_initials', 'line-up', 'shirt_number', 'player_name', 'event']
+EVENT_COLUMNS = ['matchid', 'team_initials', 'player_name', 'shirt_number', 'event', 'minute', 'added']
+
+REGULATION_MINUTES = 90
+EXTRA_TIME_MINUTES = 120
+# Goals from this minute on count as late goals
+LATE_MINUTE = 76
+
+# Per-player, per-match counts that add up over matches
+COUNT_COLUMNS = [
+    'played', 'started', 'minutes', 'goals', 'penalty_goals', 'late_goals', 'own_goals',
+    'missed_penalties', 'yellow_cards', 'red_cards', 'sub_in', 'sub_out',
+]
+
+
+def parse_event_tokens(events):
+    """
+    Split event strings into one row per event with vectorized string operations.
+
+    Args:
+        events: Series of event strings (NaN for players without events).
+    Returns:
+        DataFrame indexed by the position of the source row, with event (see EVENT_TYPES),
+        minute and added (stoppage-time minutes, 0 when none). Unknown codes are dropped.
+    """
+    # One string per event, then a single anchored regex over all of them (cheaper than extractall)
+    tokens = events.reset_index(drop=True).dropna().str.split().explode().dropna()
+    tokens = tokens.str.extract(f'^{EVENT_PATTERN}$').dropna(subset=['code'])
+    result = pd.DataFrame({
+        'event': tokens['code'].map(EVENT_CODES),
+        'minute': tokens['minute'].astype(np.int16),
+        'added': tokens['added'].fillna('0').astype(np.int16),
+    })
+    return result[result['event'].notna()]
+
+
+def parse_events(lineups, tokens=None):
+    """
+    Long event table for a block of WorldCupPlayers rows: one row per goal, card,
+    penalty or substitution, keyed by matchid, team_initials, player_name and shirt_number.
+    tokens is parse_event_tokens(lineups['event']) when the caller already has it.
+    """
+    if tokens is None:
+        tokens = parse_event_tokens(lineups['event'])
+    keys = lineups[EVENT_COLUMNS[:4]].iloc[tokens.index].reset_index(drop=True)
+    return pd.concat([keys, tokens.reset_index(drop=True)], axis=1)
+
+
+def player_match_features(lineups, tokens=None):
+    """
+    One row per lineup entry with that player's counts for the match and the minutes played.
+
+    A starter plays from minute 0, a substitute from their sub_in minute; both play until
+    they are substituted or sent off, or to the end of the match (120 minutes when the
+    match has events after minute 90, otherwise 90).
+    """
+    if tokens is None:
+        tokens = parse_event_tokens(lineups['event'])
+    n = len(lineups)
+    rows = tokens.index.to_numpy()
+    event = tokens['event'].to_numpy()
+    minute = tokens['minute'].to_numpy().astype(float)
+
+    def count(mask):
+        return np.bincount(rows[mask], minlength=n)
+
+    def first_minute(mask):
+        first = np.full(n, np.inf)
+        np.minimum.at(first, rows[mask], minute[mask])
+        return first
+
+    is_goal = np.isin(event, ['goal', 'penalty_goal'])
+    is_red = np.isin(event, ['red_card', 'second_yellow'])
+    sub_in, sub_out, sent_off = first_minute(event == 'sub_in'), first_minute(event == 'sub_out'), first_minute(is_red)
+
+    # Matches with events beyond minute 90 went to extra time
+    match_codes, match_ids = pd.factorize(lineups['matchid'])
+    last_event = np.zeros(len(match_ids))
+    np.maximum.at(last_event, match_codes[rows], minute)
+    length = np.where(last_event > REGULATION_MINUTES, EXTRA_TIME_MINUTES, REGULATION_MINUTES)[match_codes]
+
+    started = (lineups['line-up'] == 'S').to_numpy()
+    start = np.where(started, 0.0, sub_in)
+    end = np.minimum(np.minimum(sub_out, sent_off), length)
+    played = started | np.isfinite(sub_in)
+    minutes = np.where(played, np.clip(end - start, 0, None), 0.0)
+
+    features = lineups[['matchid', 'team_initials', 'player_name', 'shirt_number']].reset_index(drop=True)
+    features['played'] = played.astype(np.int64)
+    features['started'] = started.astype(np.int64)
+    features['minutes'] = minutes
+    features['goals'] = count(is_goal)
+    features['penalty_goals'] = count(event == 'penalty_goal')
+    features['late_goals'] = count(is_goal & (minute >= LATE_MINUTE))
+    features['own_goals'] = count(event == 'own_goal')
+    features['missed_penalties'] = count(event == 'missed_penalty')
+    features['yellow_cards'] = count(event == 'yellow_card')
+    features['red_cards'] = count(is_red)
+    features['sub_in'] = count(event == 'sub_in')
+    features['sub_out'] = count(event == 'sub_out')
+    return features
+
+
+# Lineup chunks in which no match is split across two chunks (rows of a match are contiguous in the file)
+def whole_match_chunks(chunks):
+    carry = None
+    for chunk in chunks:
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        # Hold back the rows of the last match: its remaining rows may be in the next chunk
+        matchids = chunk['matchid'].to_numpy()
+        other = np.flatnonzero(matchids != matchids[-1]) if len(chunk) else []
+        split = other[-1] + 1 if len(other) else 0
+        carry = chunk.iloc[split:]
+        if split:
+            yield chunk.iloc[:split].reset_index(drop=True)
+    if carry is not None and not carry.empty:
+        yield carry.reset_index(drop=True)
+
+
+# Match year and team name per match, from the match history
+def match_context(matches):
+    matches = matches.dropna(subset=['matchid']).drop_duplicates('matchid')
+    years = pd.Series(matches['year'].to_numpy(), index=matches['matchid'].astype('int64').to_numpy())
+    # Initials keep the latest name they were used with (e.g. FRG -> Germany FR)
+    matches = matches.sort_values('year', kind='stable')
+    initials = np.column_stack([matches['home_team_initials'], matches['away_team_initials']]).ravel()
+    names = pd.Series(np.column_stack([matches['home_team_name'], matches['away_team_name']]).ravel(), index=initials)
+    names = names[~names.index.duplicated(keep='last')]
+    return years, names
+
+
+def aggregate_players(partials):
+    """Career totals per (player_name, team) from per-chunk partial totals."""
+    totals = pd.concat(partials, ignore_index=True).groupby(['player_name', 'team'], observed=True).agg(
+        {**{col: 'sum' for col in COUNT_COLUMNS}, 'first_year': 'min', 'last_year': 'max'})
+    totals = totals.rename(columns={'played': 'appearances', 'started': 'starts'})
+    minutes = totals['minutes'].replace(0, np.nan)
+    totals['goals_per_90'] = totals['goals'] / minutes * 90
+    totals['cards_per_90'] = (totals['yellow_cards'] + totals['red_cards']) / minutes * 90
+    return totals.reset_index()
+
+
+def aggregate_teams(team_matches):
+    """Per-match averages per team from its per-match totals."""
+    per_match = pd.concat(team_matches, ignore_index=True)
+    teams = per_match.groupby('team', observed=True)
+    totals = teams[['goals', 'penalty_goals', 'late_goals', 'own_goals', 'yellow_cards', 'red_cards', 'sub_in']].mean()
+    totals.columns = [f'{col}_per_match' for col in totals.columns]
+    totals['late_goal_share'] = teams['late_goals'].sum() / teams['goals'].sum().replace(0, np.nan)
+    totals['n_matches'] = teams.size()
+    return totals.reset_index()
+
+
+def build_event_features(players_path=PLAYERS_PATH, matches_path=MATCHES_PATH, events_path=EVENTS_PATH,
+                         player_features_path=PLAYER_EVENT_FEATURES_PATH,
+                         team_features_path=TEAM_EVENT_FEATURES_PATH, chunksize=CHUNK_ROWS):
+    """
+    Parse the lineup events into the long event table and build historical per-player and
+    per-team event features, streaming the lineups in chunks so memory stays bounded by the
+    chunk size and the number of players, not the length of the history.
+
+    Returns:
+        (player features, team features) DataFrames.
+    """
+    years, team_names = match_context(read_file(matches_path, columns=[
+        'matchid', 'year', 'home_team_name', 'away_team_name', 'home_team_initials', 'away_team_initials']))
+
+    player_partials, team_partials = [], []
+    with TableWriter.for_file(events_path, EVENT_COLUMNS) as writer:
+        for lineups in whole_match_chunks(iter_file(players_path, chunksize, columns=LINEUP_COLUMNS)):
+            tokens = parse_event_tokens(lineups['event'])
+            writer.write(parse_events(lineups, tokens))
+
+            features = player_match_features(lineups, tokens)
+            initials = features['team_initials'].astype(str)
+            features['team'] = initials.map(team_names).fillna(initials)
+            features['year'] = features['matchid'].map(years)
+            player_partials.append(features.groupby(['player_name', 'team'], observed=True).agg(
+                **{col: (col, 'sum') for col in COUNT_COLUMNS},
+                first_year=('year', 'min'), last_year=('year', 'max')).reset_index())
+            team_partials.append(features.groupby(['team', 'matchid'], observed=True)[COUNT_COLUMNS].sum().reset_index())
+
+    print(f"Parsed {writer.n_rows} match events.")
+    player_df = aggregate_players(player_partials) if player_partials else pd.DataFrame()
+    team_df = aggregate_teams(team_partials) if team_partials else pd.DataFrame()
+    write_file(player_df, player_features_path)
+    write_file(team_df, team_features_path)
+    return player_df, team_df
+
+
+if __name__ == "__main__":
+    player_df, team_df = build_event_features()
+    print(f"Saved event features for {len(player_df)} players and {len(team_df)} teams.")
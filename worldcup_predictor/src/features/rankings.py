@@ -0,0 +1,85 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from data.storage import read_file
+
+PROCESSED_DIR = os.path.join(os.path.dirname(__file__), '../../data/processed')
+RANKINGS_PATH = os.path.join(PROCESSED_DIR, 'fifa_ranking-2024-06-20_cleaned.csv')
+
+RANKING_COLUMNS = ['rank', 'total_points']
+
+
+def to_days(dates):
+    """Days since the epoch as int64 (NaT becomes the int64 minimum), for searchsorted."""
+    values = pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[D]')
+    return values.astype(np.int64)
+
+
+class RankingIndex:
+    """
+    FIFA ranking history indexed for as-of lookups by country code.
+
+    Rows are sorted by (country, rank_date) once and each row gets the composite key
+    country_id * span + day. A query's key is built the same way, so one np.searchsorted
+    over all queries finds each country's latest ranking on or before the query date:
+    O(m log n) for m queries, with no per-row search or sort of the queries.
+    """
+
+    def __init__(self, countries, dates, values, columns=RANKING_COLUMNS):
+        codes, self.countries = pd.factorize(pd.Series(countries, dtype=object), sort=True)
+        days = to_days(dates)
+        order = np.lexsort((days, codes))
+        self.codes = codes[order]
+        self.days = days[order]
+        self.columns = list(columns)
+        self.values = np.ascontiguousarray(np.asarray(values, dtype=np.float64)[order])
+        self.country_ids = {country: i for i, country in enumerate(self.countries)}
+        # Day offset keeping every country's keys in its own block
+        self.min_day = int(self.days.min()) if len(self.days) else 0
+        self.span = int(self.days.max()) - self.min_day + 2 if len(self.days) else 1
+        self.keys = self.codes * self.span + (self.days - self.min_day)
+
+    @classmethod
+    def from_frame(cls, rankings_df, country_col='country_abrv', date_col='rank_date', columns=RANKING_COLUMNS):
+        return cls(rankings_df[country_col].to_numpy(), rankings_df[date_col], rankings_df[columns].to_numpy(), columns)
+
+    @classmethod
+    def load(cls, path=RANKINGS_PATH):
+        return cls.from_frame(read_file(path, columns=['country_abrv', 'rank_date'] + RANKING_COLUMNS))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def asof(self, countries, dates):
+        """
+        Ranking values of each country as of each date (the latest ranking published on or
+        before it), for any number of (country, date) pairs at once.
+
+        Args:
+            countries: sequence of country codes (country_abrv, e.g. the match team initials).
+            dates: sequence of dates, same length.
+        Returns:
+            float array of shape (len(countries), len(columns)); NaN for unknown countries,
+            missing dates and dates before the country's first ranking.
+        """
+        codes = pd.Series(countries, dtype=object).map(self.country_ids).to_numpy(dtype=float)
+        days = to_days(dates)
+        known = ~np.isnan(codes) & (days != np.iinfo(np.int64).min) & (days >= self.min_day)
+        # Dates past the last ranking keep the latest one
+        clipped = np.minimum(days[known] - self.min_day, self.span - 1)
+        query = codes[known].astype(np.int64) * self.span + clipped
+        rows = np.searchsorted(self.keys, query, side='right') - 1
+        # A hit in the previous country's block means no ranking yet for this one
+        found = (rows >= 0) & (self.codes[np.maximum(rows, 0)] == codes[known])
+
+        result = np.full((len(codes), len(self.columns)), np.nan)
+        targets = np.flatnonzero(known)[found]
+        result[targets] = self.values[rows[found]]
+        return result
+
+    def asof_frame(self, countries, dates):
+        return pd.DataFrame(self.asof(countries, dates), columns=self.columns)
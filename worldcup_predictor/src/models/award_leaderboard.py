@@ -0,0 +1,187 @@
+import hashlib
+import os
+import sys
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from data.storage import read_file
+from models.probability_matrix import file_hash
+from models.name_index import NameIndex, normalize_name
+from monitoring.instrumentation import instruments
+
+BASE_DIR = os.path.dirname(__file__)
+PROCESSED_DIR = os.path.join(BASE_DIR, '../../data/processed')
+MODELS_DIR = os.path.join(BASE_DIR, '../../models')
+CACHE_DIR = os.path.join(MODELS_DIR, 'cache')
+
+PLAYER_FEATURES_PATH = os.path.join(PROCESSED_DIR, 'player_features.csv')
+
+METRIC_MODELS = {
+    'goals': 'award_model_goals',
+    'assists': 'award_model_assists',
+    'cards': 'award_model_cards',
+    'saves': 'award_model_saves',
+}
+# Metrics where a lower prediction ranks higher
+ASCENDING_METRICS = {'cards'}
+# Metrics only predicted for goalkeepers (when player positions are known)
+GOALKEEPER_METRICS = {'saves'}
+PLAYER_COLUMNS = ['player_name', 'nationality', 'position']
+
+
+# Columns a fitted model was trained on
+def model_features(model):
+    names = getattr(model, 'feature_names_in_', None)
+    if names is None:
+        raise ValueError(f"{type(model).__name__} does not record the feature columns it was trained on")
+    return list(names)
+
+
+class AwardLeaderboard:
+    """
+    Every player's prediction for every award metric, computed once per model/feature version.
+
+    table holds player_name, nationality, position (when known) and one column per metric
+    (NaN where the model is unavailable or the player lacks its features). Queries select
+    the top k with a partial sort and never call a model.
+    """
+
+    def __init__(self, table):
+        self.table = table.reset_index(drop=True)
+        self.metrics = [metric for metric in METRIC_MODELS if metric in self.table.columns]
+        self.values = {metric: self.table[metric].to_numpy(dtype=float) for metric in self.metrics}
+        self.names = NameIndex(self.table['player_name'])
+        self._normalized = {
+            col: self.table[col].map(normalize_name).to_numpy(dtype=object)
+            for col in ('position', 'nationality') if col in self.table.columns
+        }
+
+    @classmethod
+    def from_models(cls, player_df, models):
+        """
+        Score all players with one predict call per available model.
+        models maps metric to a fitted regressor, or None when unavailable.
+        """
+        with instruments.span('predict:award_leaderboard', rows_in=len(player_df)) as span:
+            table = player_df[[col for col in PLAYER_COLUMNS if col in player_df.columns]].copy()
+            for metric, model in models.items():
+                if model is None:
+                    continue
+                features = player_df[model_features(model)]
+                scored = features.notna().all(axis=1).to_numpy(copy=True)
+                if metric in GOALKEEPER_METRICS and 'position' in player_df.columns:
+                    scored &= (player_df['position'].str.lower() == 'goalkeeper').to_numpy()
+                predictions = np.full(len(player_df), np.nan)
+                if scored.any():
+                    predictions[scored] = model.predict(features[scored])
+                table[metric] = predictions
+            if span is not None:
+                span.add_rows(rows_out=len(table))
+        return cls(table)
+
+    @classmethod
+    def load(cls, features_path=PLAYER_FEATURES_PATH, model_paths=None, get_model=None, cache_dir=CACHE_DIR):
+        """
+        Load the leaderboard for the given player features and award models, scoring the
+        players only when the content hash of one of the files has changed since it was cached.
+
+        Args:
+            features_path: player_features.csv.
+            model_paths: dict of metric to model path (default: models/award_model_<metric>.pkl).
+                Missing files are skipped.
+            get_model: callable(metric) returning the fitted model; defaults to joblib.load of its path.
+            cache_dir: Directory of cached leaderboards.
+        """
+        if model_paths is None:
+            model_paths = {metric: os.path.join(MODELS_DIR, f'{name}.pkl') for metric, name in METRIC_MODELS.items()}
+        available = {metric: path for metric, path in model_paths.items() if path and os.path.exists(path)}
+        cache_path = os.path.join(cache_dir, f"award_leaderboard_{leaderboard_key(features_path, available)}.csv")
+        if os.path.exists(cache_path):
+            return cls(pd.read_csv(cache_path))
+
+        get_model = get_model or (lambda metric: joblib.load(available[metric]))
+        models, complete = {}, True
+        for metric in available:
+            try:
+                models[metric] = get_model(metric)
+            except Exception as e:
+                # Serve the other metrics, but don't cache a leaderboard missing this one
+                warnings.warn(f"Award model for '{metric}' could not be loaded: {e}")
+                models[metric] = None
+                complete = False
+        leaderboard = cls.from_models(read_file(features_path), models)
+        if complete:
+            os.makedirs(cache_dir, exist_ok=True)
+            leaderboard.save(cache_path)
+        return leaderboard
+
+    def save(self, path):
+        # Write to a temp file first so concurrent readers never see a partial cache
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        self.table.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def has_metric(self, metric):
+        return metric in self.values and not np.isnan(self.values[metric]).all()
+
+    def top(self, metric, n=10, position=None, nationality=None):
+        """
+        The n best players for a metric, optionally only those with the given position
+        and/or nationality (case-insensitive). Uses argpartition, so cost is linear in the
+        number of players rather than a full sort.
+        """
+        if metric not in METRIC_MODELS:
+            raise ValueError(f"Invalid metric. Choose from: {', '.join(repr(m) for m in METRIC_MODELS)}")
+        if not self.has_metric(metric):
+            raise ValueError(f"No trained model available for metric '{metric}'.")
+        values = self.values[metric]
+        mask = ~np.isnan(values)
+        for col, wanted in (('position', position), ('nationality', nationality)):
+            if wanted is None:
+                continue
+            if col not in self._normalized:
+                raise ValueError(f"Player features have no '{col}' column to filter on.")
+            mask &= self._normalized[col] == normalize_name(wanted)
+
+        candidates = np.flatnonzero(mask)
+        scores = values[candidates] if metric in ASCENDING_METRICS else -values[candidates]
+        n = max(min(n, len(candidates)), 0)
+        if n < len(candidates):
+            keep = np.argpartition(scores, n - 1)[:n] if n else np.array([], dtype=np.intp)
+            candidates, scores = candidates[keep], scores[keep]
+        # Ties keep table order, as a stable full sort would
+        order = np.lexsort((candidates, scores))
+        rows = candidates[order]
+
+        result = self.table.loc[rows, [col for col in PLAYER_COLUMNS if col in self.table.columns]]
+        result['prediction'] = values[rows]
+        return result.reset_index(drop=True)
+
+    def player(self, player_name):
+        """
+        Row of a player with every metric's prediction. The name must match exactly, ignoring
+        case, accents and spacing; otherwise the closest names are suggested in the error.
+        """
+        i = self.names.exact_id(player_name)
+        if i is None:
+            suggestions = [name for name, _, _ in self.names.candidates(player_name, k=3, min_score=0.3)]
+            hint = f" Did you mean: {', '.join(suggestions)}?" if suggestions else ""
+            raise ValueError(f"Player '{player_name}' not found in player_features.csv.{hint}")
+        row = self.table.iloc[i]
+        result = {col: row[col] for col in PLAYER_COLUMNS if col in self.table.columns}
+        for metric in METRIC_MODELS:
+            value = row.get(metric, np.nan)
+            result[metric] = None if pd.isna(value) else round(float(value), 3)
+        return result
+
+
+# Cache key from the content hashes of the player features and every available model
+def leaderboard_key(features_path, model_paths):
+    digest = hashlib.sha256(file_hash(features_path).encode())
+    for metric in sorted(model_paths):
+        digest.update(f"{metric}:{file_hash(model_paths[metric])}".encode())
+    return digest.hexdigest()[:16]
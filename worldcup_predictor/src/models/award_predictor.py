@@ -1,76 +1,64 @@
-# Placeholder for award prediction model
+# Award predictions per player (goals, assists, cards, saves) from the trained award models
 
 import os
-import pandas as pd
-import joblib
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from models.award_leaderboard import METRIC_MODELS, model_features
+from models.registry import registry
+from monitoring.instrumentation import instrumented
 
 BASE_DIR = os.path.dirname(__file__)
 PROCESSED_DIR = os.path.join(BASE_DIR, '../../data/processed')
 MODELS_DIR = os.path.join(BASE_DIR, '../../models')
 
-player_df = pd.read_csv(os.path.join(PROCESSED_DIR, 'player_features.csv'))
+# Player features and award models are loaded on first use through the registry.
+# Any award model may be missing; predictions for it are then None.
+_LAZY_ARTIFACTS = {
+    'player_df': 'player_features',
+    'model_goals': 'award_model_goals',
+    'model_assists': 'award_model_assists',
+    'model_cards': 'award_model_cards',
+    'model_saves': 'award_model_saves',
+}
 
-model_goals = joblib.load(os.path.join(MODELS_DIR, 'award_model_goals.pkl'))
-model_assists = joblib.load(os.path.join(MODELS_DIR, 'award_model_assists.pkl'))
-model_cards = joblib.load(os.path.join(MODELS_DIR, 'award_model_cards.pkl'))
-model_saves = joblib.load(os.path.join(MODELS_DIR, 'award_model_saves.pkl'))
 
-feature_cols = ['assists_per_90', 'cards_per_90']
-if 'injury_status_encoded' in player_df.columns:
-    feature_cols.append('injury_status_encoded')
+def __getattr__(name):
+    if name in _LAZY_ARTIFACTS:
+        return registry.get(_LAZY_ARTIFACTS[name])
+    if name == 'feature_cols':
+        return get_feature_cols()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Returns all award predictions for a single player
-def predict_all_awards(player_name):
-   
-    row = player_df[player_df['player'].str.lower() == player_name.lower()]
-    if row.empty:
-        raise ValueError(f"Player '{player_name}' not found in player_features.csv")
 
-    player_info = row.iloc[0]
-    features = row[feature_cols]
+# Feature columns a metric's model was trained on
+def get_feature_cols(metric='goals'):
+    model = registry.get(METRIC_MODELS[metric])
+    if model is None:
+        raise ValueError(f"No trained model available for metric '{metric}'.")
+    return model_features(model)
+
 
+# Returns all award predictions for a single player, read from the precomputed leaderboard
+def predict_all_awards(player_name):
+    predictions = registry.get('award_leaderboard').player(player_name)
     result = {
-        'player': player_info['player'],
-        'team': player_info['team'],
+        'player_name': predictions['player_name'],
+        'nationality': predictions['nationality'],
+        # General players
+        'predicted_goals_per_90': predictions['goals'],
+        'predicted_assists_per_90': predictions['assists'],
+        'predicted_cards_per_90': predictions['cards'],
+        # Goalkeeper-specific (only scored for goalkeepers when positions are known)
+        'predicted_save_percentage': predictions['saves'],
     }
-
-    # General players
-    result['predicted_goals_per_90'] = round(model_goals.predict(features)[0], 3)
-    result['predicted_assists_per_90'] = round(model_assists.predict(features)[0], 3)
-    result['predicted_cards_per_90'] = round(model_cards.predict(features)[0], 3)
-
-    # Goalkeeper-specific
-    if str(player_info.get('position', '')).lower() == 'goalkeeper':
-        result['predicted_save_percentage'] = round(model_saves.predict(features)[0], 3)
-    else:
-        result['predicted_save_percentage'] = None
-
     return result
 
 
-# Returns top N players based on specific metric
-def get_top_players(metric='goals', top_n=10):
-    
-    if metric == 'goals':
-        model = model_goals
-        df = player_df.copy()
-    elif metric == 'assists':
-        model = model_assists
-        df = player_df.copy()
-    elif metric == 'cards':
-        model = model_cards
-        df = player_df.copy()
-    elif metric == 'saves':
-        model = model_saves
-        df = player_df[player_df['position'].str.lower() == 'goalkeeper'].copy()
-    else:
-        raise ValueError("Invalid metric. Choose from: 'goals', 'assists', 'cards', 'saves'")
-
-    # Predict
-    df['prediction'] = model.predict(df[feature_cols])
-    df = df[['player', 'team', 'position', 'prediction']]
-    df = df.sort_values(by='prediction', ascending=(metric == 'cards'))  # lower cards = better
-    return df.head(top_n).reset_index(drop=True)
+# Returns top N players based on specific metric, optionally filtered by position / nationality
+@instrumented('predict:award_top', rows_out=len)
+def get_top_players(metric='goals', top_n=10, position=None, nationality=None):
+    return registry.get('award_leaderboard').top(metric, top_n, position=position, nationality=nationality)
 
 
 if __name__ == "__main__":
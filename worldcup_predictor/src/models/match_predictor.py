@@ -1,46 +1,54 @@
 import os
+import sys
 import pandas as pd
-import numpy as np
-import joblib
 
-BASE_DIR = os.path.dirname(__file__)
-PROCESSED_DIR = os.path.join(BASE_DIR, '../../data/processed')
-MODELS_DIR = os.path.join(BASE_DIR, '../../models')
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from features.elo import expected_score
+from models.probability_matrix import win_probs
+from models.registry import registry
+from monitoring.instrumentation import instrumented
 
-# Load team features and trained model
-team_features_path = os.path.join(PROCESSED_DIR, 'team_features.csv')
-model_path = os.path.join(MODELS_DIR, 'match_model.pkl')
-team_features_df = pd.read_csv(team_features_path)
-match_model = joblib.load(model_path)
+# Batches up to this size are scored by the flat-array engine, which avoids sklearn's per-call
+# overhead; larger ones go to the sklearn model, which is faster in bulk. Both give identical results.
+# Models the engine cannot flatten (e.g. a tuned logistic regression) are always scored by sklearn.
+ENGINE_MAX_ROWS = 256
 
-# Required features for prediction 
-FEATURE_COLUMNS = ['avg_goals_for', 'avg_goals_against', 'win_rate', 'recent_form']
+# Team features, the trained model and the team index are loaded on first use through the registry
+_LAZY_ARTIFACTS = {
+    'team_features_df': 'team_features',
+    'match_model': 'match_model',
+    'team_index': 'team_index',
+    'elo_ratings': 'elo_ratings',
+}
 
 
-# Extracts a team's features from the DataFrame
-def get_team_row(team_name):
+def __getattr__(name):
+    if name in _LAZY_ARTIFACTS:
+        return registry.get(_LAZY_ARTIFACTS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-    row = team_features_df[team_features_df['team'].str.lower() == team_name.lower()]
-    if row.empty:
-        raise ValueError(f"Team '{team_name}' not found in team_features.csv.")
-    return row[FEATURE_COLUMNS].values[0]
+# Probability that team A wins, for a batch of matchup vectors
+@instrumented('predict:match', rows_in=len, rows_out=len)
+def match_win_probs(diffs):
+    engine = registry.get('match_engine') if len(diffs) <= ENGINE_MAX_ROWS else None
+    return win_probs(engine if engine is not None else registry.get('match_model'), diffs)
+
+
+# Extracts a team's features from the index
+def get_team_row(team_name):
+    return registry.get('team_index').row(team_name)
 
 
 # Predicts the outcome of a match and returns win probabilities based on stats
 def predict_match(team_a, team_b):
-    
-    # Get input vectors
-    features_a = get_team_row(team_a)
-    features_b = get_team_row(team_b)
 
     # Build "matchup" vector as: team_a - team_b (relative strength)
-    input_vector = features_a - features_b
+    input_vector = get_team_row(team_a) - get_team_row(team_b)
     input_vector = input_vector.reshape(1, -1)
 
     # Predict win probability for team A
-    prob = match_model.predict_proba(input_vector)[0]
-    # Assumes class 1 = "team A wins"
-    prob_team_a_win = prob[1]
+    prob_team_a_win = match_win_probs(input_vector)[0]
     prob_team_b_win = 1 - prob_team_a_win
 
     return {
@@ -51,8 +59,45 @@ def predict_match(team_a, team_b):
     }
 
 
+# Scores many fixtures with a single predict_proba call; pairs is an iterable of (team_a, team_b)
+def predict_matches(pairs):
+    pairs = list(pairs)
+    team_index = registry.get('team_index')
+    ids_a = team_index.team_ids(a for a, _ in pairs)
+    ids_b = team_index.team_ids(b for _, b in pairs)
+    features = team_index.features
+    prob_team_a_win = match_win_probs(features[ids_a] - features[ids_b])
+
+    return pd.DataFrame({
+        "team_a": [a for a, _ in pairs],
+        "team_b": [b for _, b in pairs],
+        "team_a_win_prob": prob_team_a_win,
+        "team_b_win_prob": 1 - prob_team_a_win
+    })
+
+
+# Current Elo ratings of both sides and team A's expected score (win = 1, draw = 0.5)
+def predict_match_elo(team_a, team_b):
+    elo = registry.get('elo_ratings')
+    if elo is None:
+        raise ValueError("No Elo ratings available; run src/features/elo.py first.")
+    team_index = registry.get('team_index')
+    rating_a = elo.rating(team_index.canonical_name(team_a))
+    rating_b = elo.rating(team_index.canonical_name(team_b))
+    return {
+        "team_a": team_a,
+        "team_b": team_b,
+        "team_a_elo": round(rating_a, 1),
+        "team_b_elo": round(rating_b, 1),
+        "team_a_expected_score": round(float(expected_score(rating_a, rating_b)), 3),
+    }
+
+
 if __name__ == "__main__":
-    team_a = input("Enter Team A: ")
-    team_b = input("Enter Team B: ")
-    result = predict_match(team_a, team_b)
-    print(result)
\ No newline at end of file
+    # Symmetric all-pairs table, cached on disk and rebuilt only when the model or features change
+    matrix = registry.get('probability_matrix')
+    # Typed names are matched to the closest team, and the match shown, before predicting
+    team_a, team_b = (matrix.index.resolve(name) or name for name in (input("Enter Team A: "), input("Enter Team B: ")))
+    print(f"{team_a} vs {team_b}")
+    result = matrix.predict_match(team_a, team_b)
+    print(result)
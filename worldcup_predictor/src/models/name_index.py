@@ -0,0 +1,165 @@
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# Characters per n-gram; names are split into tokens and each token padded with spaces,
+# so token order ("MESSI Lionel" vs "Lionel Messi") does not change a name's n-grams
+NGRAM = 3
+# Lowest Dice similarity accepted when resolving a name that has no exact match
+MIN_SCORE = 0.5
+CANDIDATES = 5
+
+
+# Case-, accent- and whitespace-insensitive form of a name
+def normalize_name(name):
+    name = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'\s+', ' ', name).strip().lower()
+
+
+# Normalized name without spaces or punctuation: 'Aaron Connolly' and 'aaronconnolly' agree
+def compact_name(name):
+    return re.sub(r'[^a-z0-9]', '', normalize_name(name))
+
+
+def name_tokens(name):
+    return re.findall(r'[a-z0-9]+', normalize_name(name))
+
+
+def name_ngrams(name, n=NGRAM):
+    grams = set()
+    for token in name_tokens(name):
+        padded = f' {token} '
+        grams.update(padded[i:i + n] for i in range(max(len(padded) - n + 1, 1)))
+    return grams
+
+
+class NameIndex:
+    """
+    Fuzzy lookup of names (players, teams) through an n-gram inverted index.
+
+    Exact matches on the normalized or compact form (and aliases) are dictionary hits.
+    Anything else is scored against every name or alias sharing at least one n-gram with the query:
+    postings are concatenated and counted with one bincount, and the score is the Dice
+    coefficient of the two n-gram sets. Cost depends on the postings touched, not on the
+    number of names, so queries stay well under a millisecond for tens of thousands of names.
+    """
+
+    def __init__(self, names, aliases=None, n=NGRAM):
+        self.names = list(names)
+        self.n = n
+        self.exact = {}
+        for i, name in enumerate(self.names):
+            self.exact.setdefault(normalize_name(name), i)
+        for i, name in enumerate(self.names):
+            self.exact.setdefault(compact_name(name), i)
+        # Fuzzy entries: every name, plus every alias (so misspelt aliases resolve too)
+        entries, owners = list(self.names), list(range(len(self.names)))
+        # An alias only applies when it is not itself a name in the index
+        for alias, target in (aliases or {}).items():
+            target_id = self.exact.get(normalize_name(target))
+            if target_id is not None and normalize_name(alias) not in self.exact:
+                self.exact[normalize_name(alias)] = target_id
+                entries.append(alias)
+                owners.append(target_id)
+        self.owners = np.array(owners, dtype=np.intp)
+
+        postings = defaultdict(list)
+        self.n_grams = np.zeros(len(entries), dtype=np.int32)
+        for i, entry in enumerate(entries):
+            grams = name_ngrams(entry, n)
+            self.n_grams[i] = len(grams)
+            for gram in grams:
+                postings[gram].append(i)
+        self.postings = {gram: np.array(ids, dtype=np.intp) for gram, ids in postings.items()}
+
+    def __len__(self):
+        return len(self.names)
+
+    def exact_id(self, name):
+        """Id of the name matching exactly (ignoring case, accents, spacing and punctuation), else None."""
+        key = normalize_name(name)
+        if key in self.exact:
+            return self.exact[key]
+        return self.exact.get(compact_name(name))
+
+    def scores(self, query):
+        """(ids, Dice scores) of every name sharing an n-gram with query, unordered."""
+        grams = name_ngrams(query, self.n)
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not hits:
+            return np.array([], dtype=np.intp), np.array([])
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.n_grams))
+        entries = np.flatnonzero(shared)
+        scores = 2 * shared[entries] / (len(grams) + self.n_grams[entries])
+        if len(self.owners) == len(self.names):
+            return entries, scores
+        # A name reached through several entries (itself and its aliases) keeps its best score
+        order = np.argsort(-scores, kind='stable')
+        ids, first = np.unique(self.owners[entries[order]], return_index=True)
+        return ids, scores[order][first]
+
+    def candidates(self, query, k=CANDIDATES, min_score=0.0):
+        """
+        Up to k (name, id, score) candidates for query, best first. An exact match scores 1.0.
+        """
+        exact = self.exact_id(query)
+        ids, scores = self.scores(query)
+        if exact is not None:
+            scores = np.where(ids == exact, 1.0, scores)
+        keep = scores >= min_score
+        ids, scores = ids[keep], scores[keep]
+        if k < len(ids):
+            top = np.argpartition(-scores, k - 1)[:k]
+            ids, scores = ids[top], scores[top]
+        order = np.lexsort((ids, -scores))
+        return [(self.names[i], int(i), float(s)) for i, s in zip(ids[order], scores[order])]
+
+    def resolve(self, query, min_score=MIN_SCORE):
+        """
+        Id of the name query refers to: its exact match, else the single best fuzzy candidate
+        scoring at least min_score. None when there is no such candidate or the best is tied.
+        """
+        exact = self.exact_id(query)
+        if exact is not None:
+            return exact
+        best = self.candidates(query, k=2, min_score=min_score)
+        if not best or (len(best) == 2 and best[0][2] == best[1][2]):
+            return None
+        return best[0][1]
+
+    def resolve_all(self, queries, min_score=MIN_SCORE):
+        """Ids for many queries (-1 where unresolved); each distinct query is resolved once."""
+        codes, uniques = pd.factorize(pd.Series(list(queries), dtype=object))
+        resolved = np.full(len(uniques), -1, dtype=np.intp)
+        for j, query in enumerate(uniques):
+            i = self.resolve(query, min_score)
+            if i is not None:
+                resolved[j] = i
+        ids = np.full(len(codes), -1, dtype=np.intp)
+        ids[codes >= 0] = resolved[codes[codes >= 0]]
+        return ids
+
+
+def fuzzy_merge(left, right, left_on, right_on, how='left', min_score=MIN_SCORE):
+    """
+    Join two tables whose name columns spell names differently (case, accents, slugs,
+    token order, small typos). Every distinct left name is resolved against an index of the
+    right names, then the tables are merged on the resolved name.
+
+    Returns:
+        The merged DataFrame, with right_on holding the matched right-hand name
+        (NaN where no match was found, for how='left').
+    """
+    right_names = right[right_on].dropna().unique()
+    index = NameIndex(right_names)
+    ids = index.resolve_all(left[left_on], min_score)
+    matched = np.where(ids >= 0, np.asarray(right_names, dtype=object)[np.maximum(ids, 0)], None)
+    key = '_matched_name'
+    left = left.assign(**{key: matched})
+    merged = left.merge(right.rename(columns={right_on: key}), on=key, how=how, suffixes=('', '_right'))
+    if right_on != left_on:
+        return merged.rename(columns={key: right_on})
+    return merged.rename(columns={key: f'{right_on}_right'})
@@ -0,0 +1,133 @@
+import hashlib
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from models.team_index import FEATURE_COLUMNS, TeamIndex, model_feature_columns
+from monitoring.instrumentation import instrumented
+
+BASE_DIR = os.path.dirname(__file__)
+PROCESSED_DIR = os.path.join(BASE_DIR, '../../data/processed')
+MODELS_DIR = os.path.join(BASE_DIR, '../../models')
+CACHE_DIR = os.path.join(MODELS_DIR, 'cache')
+
+TEAM_FEATURES_PATH = os.path.join(PROCESSED_DIR, 'team_features.csv')
+MATCH_MODEL_PATH = os.path.join(MODELS_DIR, 'match_model.pkl')
+
+
+# Content hash of a file, read in blocks so large pickles don't need to fit in memory twice
+def file_hash(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Probability of class 1 ("team A wins") for a batch of matchup vectors, in one predict_proba call
+def win_probs(model, diffs):
+    feature_names = getattr(model, 'feature_names_in_', None)
+    if feature_names is not None:
+        diffs = pd.DataFrame(diffs, columns=feature_names)
+    win_col = list(model.classes_).index(1)
+    return model.predict_proba(diffs)[:, win_col]
+
+
+# Scores every ordered pair of teams with the match model in a single predict_proba call
+@instrumented('predict:pairwise', rows_in=lambda model, features: len(features) ** 2, rows_out=np.size)
+def pairwise_win_probs(model, features):
+    n_teams = len(features)
+    # Row i * n_teams + j holds the matchup vector team_i - team_j
+    diffs = (features[:, None, :] - features[None, :, :]).reshape(n_teams * n_teams, -1)
+    return win_probs(model, diffs).reshape(n_teams, n_teams)
+
+
+class ProbabilityMatrix:
+    """
+    Dense, order-invariant win probabilities for every pair of teams.
+
+    matrix[i, j] is the probability that team i beats team j, symmetrized as
+    (p(i vs j) + 1 - p(j vs i)) / 2 so that matrix + matrix.T == 1.
+    Team ids are row positions in team_features.csv.
+    """
+
+    def __init__(self, teams, matrix):
+        self.index = TeamIndex(teams)
+        self.teams = self.index.teams
+        self.matrix = np.asarray(matrix, dtype=float)
+
+    @classmethod
+    def from_model(cls, model, team_features_df):
+        index = TeamIndex.from_frame(team_features_df, model_feature_columns(model))
+        raw = pairwise_win_probs(model, index.features)
+        return cls(index.teams, (raw + 1 - raw.T) / 2)
+
+    @classmethod
+    def load(cls, model_path=MATCH_MODEL_PATH, features_path=TEAM_FEATURES_PATH, cache_dir=CACHE_DIR):
+        """
+        Load the matrix for the given model and team features, rebuilding it only when
+        the content hash of either file has changed since it was cached.
+        """
+        cache_path = os.path.join(cache_dir, f"prob_matrix_{cache_key(model_path, features_path)}.npz")
+        if os.path.exists(cache_path):
+            return cls.read(cache_path)
+
+        matrix = cls.from_model(joblib.load(model_path), pd.read_csv(features_path))
+        os.makedirs(cache_dir, exist_ok=True)
+        matrix.save(cache_path)
+        return matrix
+
+    @classmethod
+    def read(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['teams'].tolist(), data['matrix'])
+
+    def save(self, path):
+        # Write to a temp file first so concurrent readers never see a partial cache
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, teams=np.array(self.teams), matrix=self.matrix)
+        os.replace(tmp_path, path)
+
+    def team_id(self, team_name):
+        return self.index.team_id(team_name)
+
+    def win_prob(self, team_a, team_b):
+        return float(self.matrix[self.team_id(team_a), self.team_id(team_b)])
+
+    def predict_match(self, team_a, team_b):
+        prob_team_a_win = self.win_prob(team_a, team_b)
+        return {
+            "team_a": team_a,
+            "team_b": team_b,
+            "team_a_win_prob": round(prob_team_a_win, 3),
+            "team_b_win_prob": round(1 - prob_team_a_win, 3)
+        }
+
+    def to_frame(self, teams=None):
+        """Win probabilities as a labelled grid: row team vs column team (all teams by default)."""
+        teams = self.teams if teams is None else [self.index.canonical_name(team) for team in teams]
+        ids = self.index.team_ids(teams)
+        return pd.DataFrame(self.matrix[np.ix_(ids, ids)], index=teams, columns=teams)
+
+    def match_probs(self, teams):
+        """
+        Home win / draw / away win array for the given teams, in the (T, T, 3) layout
+        accepted by simulation.monte_carlo. The match model has no draw class.
+        """
+        ids = self.index.team_ids(teams)
+        win = self.matrix[np.ix_(ids, ids)]
+        return np.stack([win, np.zeros_like(win), 1 - win], axis=-1)
+
+
+# Cache key built from the first 16 hex digits of each input's content hash
+def cache_key(model_path=MATCH_MODEL_PATH, features_path=TEAM_FEATURES_PATH):
+    return f"{file_hash(model_path)[:16]}_{file_hash(features_path)[:16]}"
+
+
+if __name__ == "__main__":
+    matrix = ProbabilityMatrix.load()
+    print(f"Probability matrix ready for {len(matrix.teams)} teams (cache key {cache_key()})")
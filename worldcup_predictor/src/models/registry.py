@@ -0,0 +1,139 @@
+import os
+import sys
+import threading
+import warnings
+
+import joblib
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from data.storage import read_file
+from monitoring.instrumentation import instruments
+
+BASE_DIR = os.path.dirname(__file__)
+PROCESSED_DIR = os.path.join(BASE_DIR, '../../data/processed')
+MODELS_DIR = os.path.join(BASE_DIR, '../../models')
+
+# One award model per metric (models.award_leaderboard.METRIC_MODELS maps the metrics to these names)
+AWARD_MODELS = ('award_model_goals', 'award_model_assists', 'award_model_cards', 'award_model_saves')
+
+
+class ArtifactRegistry:
+    """
+    Process-wide, lazily populated store of models and tables.
+
+    Nothing is read from disk until the first get(name); the result is then cached
+    for the lifetime of the process. An optional artifact whose file is missing
+    resolves to None (with a single warning) instead of raising.
+    """
+
+    def __init__(self):
+        self._specs = {}
+        self._cache = {}
+        # Re-entrant so a loader can depend on another artifact
+        self._lock = threading.RLock()
+
+    def register(self, name, loader, path=None, optional=False, depends=()):
+        """
+        Declare an artifact. With a path, loader(path) is called on first use;
+        without one, loader() is called. Re-registering a name drops its cached value
+        and that of every artifact listed as depending on it.
+        """
+        with self._lock:
+            self._specs[name] = (loader, path, optional, tuple(depends))
+            self._invalidate(name)
+
+    def _invalidate(self, name):
+        self._cache.pop(name, None)
+        for other, spec in self._specs.items():
+            if name in spec[3] and other in self._cache:
+                self._invalidate(other)
+
+    def get(self, name):
+        try:
+            return self._cache[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._cache:
+                self._cache[name] = self._load(name)
+            return self._cache[name]
+
+    def _load(self, name):
+        try:
+            loader, path, optional, _ = self._specs[name]
+        except KeyError:
+            raise KeyError(f"Unknown artifact '{name}'. Registered: {sorted(self._specs)}") from None
+        if path is not None and not os.path.exists(path):
+            if optional:
+                warnings.warn(f"Optional artifact '{name}' not found at {path}; continuing without it.")
+                return None
+            raise FileNotFoundError(f"Required artifact '{name}' not found at {path}")
+        with instruments.span(f"load:{name}"):
+            return loader() if path is None else loader(path)
+
+    def path(self, name):
+        return self._specs[name][1]
+
+    def is_loaded(self, name):
+        return name in self._cache
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+registry = ArtifactRegistry()
+
+
+# Loaders import the module they need on first call, so importing the registry (and the predictors)
+# stays cheap: tree_engine brings in sklearn, scoreline_model scipy and sklearn.linear_model
+def load_scoreline_model(path):
+    from models.scoreline_model import ScorelineModel
+    return ScorelineModel.load(path)
+
+
+def load_elo_ratings(path):
+    from features.elo import EloRatings
+    return EloRatings.load(path)
+
+
+# Gathers the team columns the match model was trained on
+def load_team_index():
+    from models.team_index import TeamIndex, model_feature_columns
+    return TeamIndex.from_frame(registry.get('team_features'), model_feature_columns(registry.get('match_model')))
+
+
+def load_probability_matrix():
+    from models.probability_matrix import ProbabilityMatrix
+    return ProbabilityMatrix.load(registry.path('match_model'), registry.path('team_features'))
+
+
+# Scores players only when player_features.csv or an award model changed since the cached leaderboard
+def load_award_leaderboard():
+    from models.award_leaderboard import METRIC_MODELS, AwardLeaderboard
+    return AwardLeaderboard.load(registry.path('player_features'),
+                                 {metric: registry.path(name) for metric, name in METRIC_MODELS.items()},
+                                 get_model=lambda metric: registry.get(METRIC_MODELS[metric]))
+
+
+# Flat-array copy of a registered tree model (None when the model is unavailable or not a supported ensemble)
+def compiled(model_name):
+    def load():
+        from models.tree_engine import FlatEnsemble
+        model = registry.get(model_name)
+        return FlatEnsemble.from_model(model) if FlatEnsemble.supports(model) else None
+    return load
+
+
+registry.register('team_features', read_file, os.path.join(PROCESSED_DIR, 'team_features.csv'))
+registry.register('player_features', read_file, os.path.join(PROCESSED_DIR, 'player_features.csv'))
+registry.register('match_model', joblib.load, os.path.join(MODELS_DIR, 'match_model.pkl'))
+for name in AWARD_MODELS:
+    registry.register(name, joblib.load, os.path.join(MODELS_DIR, f'{name}.pkl'), optional=True)
+registry.register('scoreline_model', load_scoreline_model, os.path.join(MODELS_DIR, 'scoreline_model.npz'),
+                  optional=True)
+registry.register('elo_ratings', load_elo_ratings, os.path.join(PROCESSED_DIR, 'elo_state.npz'), optional=True)
+registry.register('team_index', load_team_index, depends=['team_features', 'match_model'])
+registry.register('probability_matrix', load_probability_matrix, depends=['match_model', 'team_features'])
+registry.register('award_leaderboard', load_award_leaderboard, depends=['player_features', *AWARD_MODELS])
+registry.register('match_engine', compiled('match_model'), depends=['match_model'])
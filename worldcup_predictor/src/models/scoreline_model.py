@@ -0,0 +1,218 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import minimize_scalar
+from scipy.stats import poisson
+from sklearn.linear_model import PoissonRegressor
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from data.storage import read_file
+from features.feature_engineering import parse_match_dates
+from models.team_index import TeamIndex
+from monitoring.instrumentation import instrumented
+
+BASE_DIR = os.path.dirname(__file__)
+PROCESSED_DIR = os.path.join(BASE_DIR, '../../data/processed')
+MODELS_DIR = os.path.join(BASE_DIR, '../../models')
+
+MATCHES_PATH = os.path.join(PROCESSED_DIR, 'WorldCupMatches_cleaned.csv')
+SCORELINE_MODEL_PATH = os.path.join(MODELS_DIR, 'scoreline_model.npz')
+
+MATCH_COLUMNS = ['home_team_name', 'away_team_name', 'home_team_goals', 'away_team_goals', 'datetime']
+
+# Goals per side covered by the scoreline matrix (0..MAX_GOALS); the remaining tail mass is negligible
+MAX_GOALS = 10
+# Largest goal margin in the simulator's margin table (see simulation.monte_carlo.MAX_MARGIN)
+MAX_MARGIN = 5
+# L2 penalty on attack/defence strengths; shrinks teams with few matches towards average
+ALPHA = 1e-3
+# Matches lose half their weight every HALF_LIFE_YEARS (None weighs every match equally)
+HALF_LIFE_YEARS = 20
+# Bounds of the Dixon-Coles low-score correlation parameter
+RHO_BOUNDS = (-0.3, 0.3)
+
+
+# Dixon-Coles correction factor for each score, given both goal rates; 1 outside the 0/1 corner
+def dixon_coles_tau(home_goals, away_goals, home_rate, away_rate, rho):
+    tau = np.ones(np.broadcast(home_goals, away_goals, home_rate, away_rate).shape)
+    tau = np.where((home_goals == 0) & (away_goals == 0), 1 - home_rate * away_rate * rho, tau)
+    tau = np.where((home_goals == 0) & (away_goals == 1), 1 + home_rate * rho, tau)
+    tau = np.where((home_goals == 1) & (away_goals == 0), 1 + away_rate * rho, tau)
+    return np.where((home_goals == 1) & (away_goals == 1), 1 - rho, tau)
+
+
+# Estimates rho by maximizing the Dixon-Coles likelihood with the goal rates held fixed
+def fit_rho(home_goals, away_goals, home_rate, away_rate, weights):
+    low = (home_goals <= 1) & (away_goals <= 1)
+    x, y, lam, mu, w = home_goals[low], away_goals[low], home_rate[low], away_rate[low], weights[low]
+
+    def loss(rho):
+        tau = dixon_coles_tau(x, y, lam, mu, rho)
+        return np.inf if (tau <= 0).any() else -np.sum(w * np.log(tau))
+    return float(minimize_scalar(loss, bounds=RHO_BOUNDS, method='bounded').x)
+
+
+class ScorelineModel:
+    """
+    Dixon-Coles goal model: each side's goals are Poisson with rate
+    exp(intercept + attack[team] - defence[opponent]), and the four scores with at most one
+    goal per side are reweighted by the low-score correlation rho.
+
+    Scoreline matrices, 1X2 and goal-margin probabilities are computed for many pairs at once
+    as array operations, so every pair in a tournament is scored in a few milliseconds.
+    Matches are treated as played at a neutral venue.
+    """
+
+    def __init__(self, teams, attack, defence, intercept, rho, max_goals=MAX_GOALS):
+        self.index = TeamIndex(teams)
+        self.teams = self.index.teams
+        self.attack = np.asarray(attack, dtype=float)
+        self.defence = np.asarray(defence, dtype=float)
+        self.intercept = float(intercept)
+        self.rho = float(rho)
+        self.max_goals = max_goals
+
+    @classmethod
+    def fit(cls, matches_df, alpha=ALPHA, half_life_years=HALF_LIFE_YEARS, max_goals=MAX_GOALS):
+        """
+        Fit team strengths by weighted Poisson regression on both sides' goals of every match,
+        then rho by maximum likelihood. Matches without a score are ignored.
+        """
+        matches_df = matches_df.dropna(subset=['home_team_name', 'away_team_name', 'home_team_goals', 'away_team_goals'])
+        if matches_df.empty:
+            raise ValueError("No finished matches to fit the scoreline model on.")
+        teams, codes = np.unique(np.concatenate([matches_df['home_team_name'].to_numpy(dtype=str),
+                                                 matches_df['away_team_name'].to_numpy(dtype=str)]), return_inverse=True)
+        n_matches, n_teams = len(matches_df), len(teams)
+        home, away = codes[:n_matches], codes[n_matches:]
+        home_goals = matches_df['home_team_goals'].to_numpy(dtype=float)
+        away_goals = matches_df['away_team_goals'].to_numpy(dtype=float)
+
+        weights = np.ones(n_matches)
+        if half_life_years is not None and 'datetime' in matches_df.columns:
+            dates = parse_match_dates(matches_df['datetime'])
+            age_years = ((dates.max() - dates).dt.days / 365.25).fillna(0).to_numpy()
+            weights = 0.5 ** (age_years / half_life_years)
+
+        # One row per side: attack indicator of the scoring team, defence indicator of the conceding one
+        scorer, conceder = np.concatenate([home, away]), np.concatenate([away, home])
+        rows = np.arange(2 * n_matches)
+        X = sparse.csr_matrix((np.r_[np.ones(2 * n_matches), -np.ones(2 * n_matches)],
+                               (np.r_[rows, rows], np.r_[scorer, n_teams + conceder])), shape=(2 * n_matches, 2 * n_teams))
+        y = np.concatenate([home_goals, away_goals])
+        regression = PoissonRegressor(alpha=alpha, max_iter=1000).fit(X, y, sample_weight=np.tile(weights, 2))
+
+        attack, defence = regression.coef_[:n_teams], regression.coef_[n_teams:]
+        home_rate = np.exp(regression.intercept_ + attack[home] - defence[away])
+        away_rate = np.exp(regression.intercept_ + attack[away] - defence[home])
+        rho = fit_rho(home_goals, away_goals, home_rate, away_rate, weights)
+        return cls(teams.tolist(), attack, defence, regression.intercept_, rho, max_goals)
+
+    @classmethod
+    def load(cls, path=SCORELINE_MODEL_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            intercept, rho, max_goals = data['params'].tolist()
+            return cls(data['teams'].tolist(), data['attack'], data['defence'], intercept, rho, int(max_goals))
+
+    def save(self, path=SCORELINE_MODEL_PATH):
+        # Write to a temp file first so concurrent readers never see a partial model
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, teams=np.array(self.teams), attack=self.attack, defence=self.defence,
+                 params=np.array([self.intercept, self.rho, self.max_goals]))
+        os.replace(tmp_path, path)
+
+    def ratings(self):
+        """Attack and defence strength per team, with the expected goal difference against an average side."""
+        df = pd.DataFrame({'team': self.teams, 'attack': self.attack, 'defence': self.defence})
+        df['goal_difference'] = np.exp(self.intercept + self.attack) - np.exp(self.intercept - self.defence)
+        return df.sort_values('goal_difference', ascending=False).reset_index(drop=True)
+
+    def goal_rates(self, ids_a, ids_b):
+        """Expected goals of team A and of team B for arrays of team ids."""
+        ids_a, ids_b = np.asarray(ids_a), np.asarray(ids_b)
+        return (np.exp(self.intercept + self.attack[ids_a] - self.defence[ids_b]),
+                np.exp(self.intercept + self.attack[ids_b] - self.defence[ids_a]))
+
+    @instrumented('predict:scoreline', rows_in=lambda self, ids_a, ids_b: np.broadcast(ids_a, ids_b).size)
+    def score_matrix(self, ids_a, ids_b):
+        """
+        Scoreline probabilities for arrays of team ids (any matching shapes):
+        result[..., i, j] is the probability that team A scores i and team B scores j.
+        """
+        rate_a, rate_b = self.goal_rates(ids_a, ids_b)
+        goals = np.arange(self.max_goals + 1)
+        pmf_a = poisson.pmf(goals, rate_a[..., None])
+        pmf_b = poisson.pmf(goals, rate_b[..., None])
+        matrix = pmf_a[..., :, None] * pmf_b[..., None, :]
+        # Only the 2x2 low-score corner is reweighted
+        matrix[..., :2, :2] *= dixon_coles_tau(goals[:2, None], goals[None, :2],
+                                               rate_a[..., None, None], rate_b[..., None, None], self.rho)
+        return matrix / matrix.sum(axis=(-2, -1), keepdims=True)
+
+    def margin_probs(self, ids_a, ids_b, max_margin=MAX_MARGIN):
+        """
+        Goal-margin distribution (team A minus team B) over -max_margin..max_margin, larger
+        margins folded into the ends: the layout simulation.monte_carlo uses for its margin table.
+        """
+        matrix = self.score_matrix(ids_a, ids_b)
+        goals = np.arange(self.max_goals + 1)
+        margins = np.clip(goals[:, None] - goals[None, :], -max_margin, max_margin) + max_margin
+        flat = matrix.reshape(matrix.shape[:-2] + (-1,))
+        # Sum the scoreline probabilities into margin bins with one matrix product
+        bins = np.zeros((margins.size, 2 * max_margin + 1))
+        bins[np.arange(margins.size), margins.ravel()] = 1
+        return flat @ bins
+
+    def outcome_probs(self, ids_a, ids_b):
+        """Team A win / draw / team B win probabilities, shape (..., 3)."""
+        matrix = self.score_matrix(ids_a, ids_b)
+        return np.stack([np.tril(matrix, -1).sum(axis=(-2, -1)),
+                         np.trace(matrix, axis1=-2, axis2=-1),
+                         np.triu(matrix, 1).sum(axis=(-2, -1))], axis=-1)
+
+    def match_probs(self, teams, max_margin=MAX_MARGIN):
+        """
+        (T, T, 2 * max_margin + 1) margin table for every ordered pair of the given teams,
+        accepted as match_probs by monte_carlo_tournament and TournamentForecast.
+        """
+        ids = self.index.team_ids(teams)
+        return self.margin_probs(ids[:, None], ids[None, :], max_margin)
+
+    def fixture_probs(self, team_a, team_b):
+        """{'home_win', 'draw', 'away_win'} for one fixture, as simulation.monte_carlo.simulate_match expects."""
+        win, draw, loss = self.outcome_probs(self.index.team_ids([team_a]), self.index.team_ids([team_b]))[0]
+        return {'home_win': float(win), 'draw': float(draw), 'away_win': float(loss)}
+
+    def predict_match(self, team_a, team_b):
+        ids_a, ids_b = self.index.team_ids([team_a]), self.index.team_ids([team_b])
+        rate_a, rate_b = self.goal_rates(ids_a, ids_b)
+        matrix = self.score_matrix(ids_a, ids_b)[0]
+        win, draw, loss = self.outcome_probs(ids_a, ids_b)[0]
+        goals_a, goals_b = np.unravel_index(np.argmax(matrix), matrix.shape)
+        return {
+            "team_a": team_a,
+            "team_b": team_b,
+            "team_a_win_prob": round(float(win), 3),
+            "draw_prob": round(float(draw), 3),
+            "team_b_win_prob": round(float(loss), 3),
+            "team_a_expected_goals": round(float(rate_a[0]), 2),
+            "team_b_expected_goals": round(float(rate_b[0]), 2),
+            "most_likely_score": f"{goals_a}-{goals_b}",
+        }
+
+
+def train_scoreline_model(matches_path=MATCHES_PATH, path=SCORELINE_MODEL_PATH):
+    print("Fitting Dixon-Coles scoreline model...")
+    model = ScorelineModel.fit(read_file(matches_path, columns=MATCH_COLUMNS))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    model.save(path)
+    print(f"Saved scoreline model for {len(model.teams)} teams (rho {model.rho:.3f}) to {path}")
+    return model
+
+
+if __name__ == "__main__":
+    model = train_scoreline_model()
+    print(model.ratings().head(10).to_string(index=False))
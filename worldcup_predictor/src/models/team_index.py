@@ -0,0 +1,91 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from models.name_index import NameIndex, normalize_name  # noqa: F401  (normalize_name is re-exported)
+
+# Required features for prediction
+FEATURE_COLUMNS = ['avg_goals_for', 'avg_goals_against', 'win_rate', 'recent_form']
+
+# Common alternative names, mapped to the spelling used in WorldCupMatches / team_features.csv.
+# An alias only applies when it is not itself a team in the index.
+TEAM_ALIASES = {
+    'united states': 'USA',
+    'united states of america': 'USA',
+    'us': 'USA',
+    'south korea': 'Korea Republic',
+    'north korea': 'Korea DPR',
+    'china': 'China PR',
+    'iran': 'IR Iran',
+    'ivory coast': "Cote d'Ivoire",
+    'czechia': 'Czech Republic',
+    'holland': 'Netherlands',
+    'west germany': 'Germany FR',
+    'east germany': 'German DR',
+    'ussr': 'Soviet Union',
+    'ireland': 'Republic of Ireland',
+    'uae': 'United Arab Emirates',
+    'bosnia-herzegovina': 'Bosnia and Herzegovina',
+    'turkiye': 'Turkey',
+    'dr congo': 'Zaire',
+}
+
+
+# Team feature columns a match model takes the difference of, in its input order: the names of
+# its diff_ inputs (e.g. diff_elo -> elo), or FEATURE_COLUMNS for a model fitted without names
+def model_feature_columns(model):
+    names = getattr(model, 'feature_names_in_', None)
+    if names is None:
+        return list(FEATURE_COLUMNS)
+    return [name[len('diff_'):] for name in names]
+
+
+class TeamIndex:
+    """
+    Case-insensitive, alias-aware team lookup built once from team_features.csv.
+    Prediction lookups (team_id, canonical_name, row) accept exact names and aliases only, so a
+    near-miss such as 'Niger' is never silently scored as another team; on a miss the error
+    suggests the closest names. resolve() does the fuzzy matching for search boxes and merges.
+
+    features is a contiguous float array of FEATURE_COLUMNS whose rows are team ids,
+    so any number of teams can be gathered with a single fancy-index.
+    """
+
+    def __init__(self, teams, features=None, aliases=TEAM_ALIASES):
+        self.teams = list(teams)
+        self.features = None if features is None else np.ascontiguousarray(features, dtype=np.float64)
+        self.names = NameIndex(self.teams, aliases)
+
+    @classmethod
+    def from_frame(cls, team_features_df, feature_columns=FEATURE_COLUMNS, aliases=TEAM_ALIASES):
+        return cls(team_features_df['team'].tolist(), team_features_df[feature_columns].to_numpy(dtype=np.float64), aliases)
+
+    def __len__(self):
+        return len(self.teams)
+
+    def __contains__(self, team_name):
+        return self.names.exact_id(team_name) is not None
+
+    def team_id(self, team_name):
+        team_id = self.names.exact_id(team_name)
+        if team_id is None:
+            suggestions = [name for name, _, _ in self.names.candidates(team_name, k=3, min_score=0.3)]
+            hint = f" Did you mean: {', '.join(suggestions)}?" if suggestions else ""
+            raise ValueError(f"Team '{team_name}' not found in team_features.csv.{hint}")
+        return team_id
+
+    def team_ids(self, team_names):
+        return np.array([self.team_id(name) for name in team_names], dtype=np.intp)
+
+    def canonical_name(self, team_name):
+        return self.teams[self.team_id(team_name)]
+
+    def row(self, team_name):
+        return self.features[self.team_id(team_name)]
+
+    def resolve(self, team_name):
+        """Closest team name for free-text input (typos, 'Brasil'), or None when nothing is close."""
+        team_id = self.names.resolve(team_name)
+        return None if team_id is None else self.teams[team_id]
@@ -1,51 +1,178 @@
-# Placeholder for model training routines 
+# Trains the match outcome model and the per-metric award models (optionally with a hyperparameter search)
+import argparse
+import json
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingRegressor
-from sklearn.model_selection import cross_val_score, train_test_split
-from sklearn.preprocessing import LabelEncoder
+from sklearn.ensemble import (
+    ExtraTreesClassifier,
+    ExtraTreesRegressor,
+    GradientBoostingRegressor,
+    HistGradientBoostingClassifier,
+    HistGradientBoostingRegressor,
+    RandomForestClassifier,
+    RandomForestRegressor,
+)
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import GroupKFold, HalvingRandomSearchCV, KFold, cross_val_score, train_test_split
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_squared_error
 import joblib
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from data.storage import read_table
+from features.feature_engineering import STRENGTH_COLUMNS
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), '../../data/processed')
 MODELS_DIR = os.path.join(os.path.dirname(__file__), '../../models')
+TUNING_DIR = os.path.join(MODELS_DIR, 'tuning')
 os.makedirs(MODELS_DIR, exist_ok=True)
 
-
-def train_match_model():
+CV_FOLDS = 5
+
+MATCH_FEATURES = ['diff_avg_goals_for', 'diff_avg_goals_against', 'diff_win_rate', 'diff_recent_form']
+# FIFA ranking and Elo diffs, used when the matchup dataset has them and team_features.csv holds the
+# current values to predict with. diff_rank / diff_total_points are NaN where a side was not ranked
+# yet (before 1993): the tree models route missing values natively, learning the direction at each
+# split, and the linear candidate imputes 0 (no known difference).
+STRENGTH_FEATURES = [f'diff_{col}' for col in STRENGTH_COLUMNS]
+
+# Candidates sampled per tuning run; successive halving gives each survivor 3x the rows of the previous round
+N_CANDIDATES = 48
+HALVING_FACTOR = 3
+
+# Model families and hyperparameter ranges searched in tuning mode. Each entry is a
+# HalvingRandomSearchCV parameter distribution over the 'model' step of a Pipeline.
+# Tree ensembles are used as they are, so the flat-array engine can still compile the winner.
+MATCH_SEARCH_SPACE = [
+    {'model': [RandomForestClassifier(random_state=42)],
+     'model__n_estimators': [100, 200, 400], 'model__max_depth': [None, 4, 8, 16],
+     'model__min_samples_leaf': [1, 5, 20], 'model__max_features': ['sqrt', None]},
+    {'model': [ExtraTreesClassifier(random_state=42)],
+     'model__n_estimators': [100, 200, 400], 'model__max_depth': [None, 4, 8, 16],
+     'model__min_samples_leaf': [1, 5, 20]},
+    {'model': [HistGradientBoostingClassifier(random_state=42)],
+     'model__learning_rate': [0.02, 0.05, 0.1, 0.2], 'model__max_depth': [None, 3, 5],
+     'model__min_samples_leaf': [10, 20, 50], 'model__l2_regularization': [0.0, 0.1, 1.0]},
+    {'model': [make_pipeline(SimpleImputer(strategy='constant', fill_value=0.0), StandardScaler(),
+                             LogisticRegression(max_iter=1000))],
+     'model__logisticregression__C': [0.01, 0.1, 1.0, 10.0]},
+]
+AWARD_SEARCH_SPACE = [
+    {'model': [GradientBoostingRegressor(random_state=42)],
+     'model__n_estimators': [50, 100, 200], 'model__learning_rate': [0.02, 0.05, 0.1],
+     'model__max_depth': [2, 3, 4], 'model__subsample': [0.7, 1.0]},
+    {'model': [RandomForestRegressor(random_state=42)],
+     'model__n_estimators': [100, 200], 'model__max_depth': [None, 4, 8],
+     'model__min_samples_leaf': [1, 3, 10]},
+    {'model': [ExtraTreesRegressor(random_state=42)],
+     'model__n_estimators': [100, 200], 'model__max_depth': [None, 4, 8],
+     'model__min_samples_leaf': [1, 3, 10]},
+    {'model': [HistGradientBoostingRegressor(random_state=42)],
+     'model__learning_rate': [0.05, 0.1], 'model__max_depth': [None, 3],
+     'model__min_samples_leaf': [5, 10, 20]},
+]
+
+# Award models: (target column, output file, goalkeepers only)
+AWARD_TARGETS = [
+    ('goals_scored', 'award_model_goals.pkl', False),
+    ('assists_provided', 'award_model_assists.pkl', False),
+    ('save_percentage', 'award_model_saves.pkl', True),
+]
+
+
+def family_name(estimator):
+    if isinstance(estimator, Pipeline):
+        estimator = estimator.steps[-1][1]
+    return type(estimator).__name__
+
+
+def tune_model(name, X, y, search_space, scoring, cv, n_jobs=-1, n_candidates=N_CANDIDATES, random_state=42):
+    """
+    Successive-halving random search over model families and their hyperparameters.
+
+    Every candidate is scored on the same precomputed folds of the same feature matrix;
+    after each round only the best 1/HALVING_FACTOR of the candidates continue, on
+    HALVING_FACTOR times more training rows. The leaderboard of every round is written
+    to models/tuning/<name>_leaderboard.csv.
+
+    Args:
+        name: Model name, used for the leaderboard file.
+        X, y: Feature matrix and target (converted to float once, shared by all fits).
+        search_space: List of parameter distributions over the 'model' pipeline step.
+        scoring: sklearn scoring name, higher is better.
+        cv: List of (train, test) index arrays.
+        n_jobs: Parallel fits (-1 = all cores).
+    Returns:
+        The best model, refitted on all rows.
+    """
+    X = X.astype(np.float64)
+    pipeline = Pipeline([('model', search_space[0]['model'][0])])
+    # Start each candidate on enough rows for every fold to hold both classes / a spread of targets
+    min_resources = max(len(X) // HALVING_FACTOR ** 3, 20 * len(cv))
+    search = HalvingRandomSearchCV(pipeline, search_space, n_candidates=n_candidates, factor=HALVING_FACTOR,
+                                   resource='n_samples', min_resources=min(min_resources, len(X)), cv=cv,
+                                   scoring=scoring, n_jobs=n_jobs, random_state=random_state, refit=True)
+    search.fit(X, y)
+
+    leaderboard = pd.DataFrame({
+        'round': search.cv_results_['iter'],
+        'n_rows': search.cv_results_['n_resources'],
+        'family': [family_name(params['model']) for params in search.cv_results_['params']],
+        'params': [json.dumps({k.replace('model__', ''): v for k, v in params.items() if k != 'model'}, sort_keys=True)
+                   for params in search.cv_results_['params']],
+        'mean_score': search.cv_results_['mean_test_score'],
+        'std_score': search.cv_results_['std_test_score'],
+        'fit_seconds': search.cv_results_['mean_fit_time'],
+    }).sort_values(['round', 'mean_score'], ascending=False)
+    os.makedirs(TUNING_DIR, exist_ok=True)
+    leaderboard_path = os.path.join(TUNING_DIR, f'{name}_leaderboard.csv')
+    leaderboard.to_csv(leaderboard_path, index=False)
+
+    best = leaderboard.iloc[0]
+    print(f"{name}: best {best['family']} {best['params']} ({scoring} {best['mean_score']:.3f}); "
+          f"{len(leaderboard)} fits over {search.n_iterations_} rounds, leaderboard in {leaderboard_path}")
+    return search.best_estimator_.named_steps['model']
+
+
+def train_match_model(tune=False, n_jobs=-1):
     print("Training match outcome prediction model...")
 
     # Load matchup dataset
-    matchup_path = os.path.join(PROCESSED_DIR, 'matchup_dataset.csv')
-    df = pd.read_csv(matchup_path)
-
-    feature_cols = [
-        'diff_avg_goals_for',
-        'diff_avg_goals_against',
-        'diff_win_rate',
-        'diff_recent_form'
-    ]
+    df = read_table('matchup_dataset', processed_dir=PROCESSED_DIR)
+    team_columns = read_table('team_features', processed_dir=PROCESSED_DIR).columns
+    feature_cols = MATCH_FEATURES + [diff for diff, col in zip(STRENGTH_FEATURES, STRENGTH_COLUMNS)
+                                     if diff in df.columns and col in team_columns]
+    print(f"Features: {', '.join(feature_cols)}")
     X = df[feature_cols]
     y = df['label']
 
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
-    scores = cross_val_score(model, X, y, cv=5, scoring='accuracy')
-    print(f"Match Model Accuracy (CV): {scores.mean():.3f} ± {scores.std():.3f}")
+    # Each match contributes two mirrored rows (one per orientation); keeping both in the
+    # same fold stops the mirror image of a test match from appearing in training
+    folds = list(GroupKFold(n_splits=CV_FOLDS).split(X, y, groups=np.arange(len(df)) // 2))
 
-    model.fit(X, y)
+    if tune:
+        model = tune_model('match_model', X, y, MATCH_SEARCH_SPACE, 'neg_log_loss', folds, n_jobs=n_jobs)
+    else:
+        model = RandomForestClassifier(n_estimators=100, random_state=42)
+        scores = cross_val_score(model, X, y, cv=folds, scoring='accuracy', n_jobs=n_jobs)
+        print(f"Match Model Accuracy (CV): {scores.mean():.3f} ± {scores.std():.3f}")
+        model.fit(X, y)
     joblib.dump(model, os.path.join(MODELS_DIR, 'match_model.pkl'))
     print("Saved match model to models/match_model.pkl")
 
 
-def train_award_model(target_column, model_filename, filter_goalkeepers=False):
+def train_award_model(target_column, model_filename, filter_goalkeepers=False, tune=False, n_jobs=1):
     print(f"Training player award prediction model for:{target_column}")
 
     # Load player features
-    player_path = os.path.join(PROCESSED_DIR, 'player_features.csv')
-    df = pd.read_csv(player_path)
+    df = read_table('player_features', processed_dir=PROCESSED_DIR)
 
     # filter for goalkeeper-specific models
     if filter_goalkeepers:
@@ -75,30 +202,53 @@ def train_award_model(target_column, model_filename, filter_goalkeepers=False):
     X = df[feature_cols]
     y = df[target_column]
 
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    if tune:
+        folds = list(KFold(n_splits=CV_FOLDS, shuffle=True, random_state=42).split(X))
+        model = tune_model(model_filename.replace('.pkl', ''), X, y, AWARD_SEARCH_SPACE,
+                           'neg_root_mean_squared_error', folds, n_jobs=n_jobs)
+    else:
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-    model = GradientBoostingRegressor(n_estimators=100, random_state=42)
-    model.fit(X_train, y_train)
+        model = GradientBoostingRegressor(n_estimators=100, random_state=42)
+        model.fit(X_train, y_train)
 
-    y_pred = model.predict(X_test)
-    rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-    print(f"{target_column} RMSE: {rmse:.3f}")
+        y_pred = model.predict(X_test)
+        rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+        print(f"{target_column} RMSE: {rmse:.3f}")
 
     model_path = os.path.join(MODELS_DIR, model_filename)
     joblib.dump(model, model_path)
     print(f"Saved {target_column} model to {model_path}")
 
-def main():
-    train_match_model()
-
-    # Train available award models based on columns in player_features.csv
-    train_award_model('goals_scored', 'award_model_goals.pkl')
-    train_award_model('assists_provided', 'award_model_assists.pkl')
+# Train available award models based on columns in player_features.csv.
+# The models are independent, so each trains in its own process; cores are split between them.
+def train_award_models(tune=False, n_workers=None):
     # Skipping cards_per_90 as it does not exist in the CSV
-    if 'save_percentage' in pd.read_csv(os.path.join(PROCESSED_DIR, 'player_features.csv')).columns:
-        train_award_model('save_percentage', 'award_model_saves.pkl', filter_goalkeepers=True)
+    columns = read_table('player_features', processed_dir=PROCESSED_DIR).columns
+    targets = [target for target in AWARD_TARGETS if target[0] in columns]
+    n_workers = min(n_workers or os.cpu_count() or 1, len(targets))
+    if n_workers <= 1:
+        for target_column, model_filename, goalkeepers in targets:
+            train_award_model(target_column, model_filename, goalkeepers, tune=tune, n_jobs=-1)
+        return
+    n_jobs = max((os.cpu_count() or 1) // n_workers, 1)
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        futures = [pool.submit(train_award_model, target_column, model_filename, goalkeepers, tune, n_jobs)
+                   for target_column, model_filename, goalkeepers in targets]
+        for future in futures:
+            future.result()
+
+
+def main(tune=False, n_workers=None):
+    train_match_model(tune=tune, n_jobs=n_workers or -1)
+    train_award_models(tune=tune, n_workers=n_workers)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Train the match and award models.")
+    parser.add_argument('--tune', action='store_true',
+                        help="search model families and hyperparameters (successive halving) before training")
+    parser.add_argument('--workers', type=int, default=None, help="processes to use (default: all cores)")
+    args = parser.parse_args()
+    main(tune=args.tune, n_workers=args.workers)
 
@@ -0,0 +1,324 @@
+import atexit
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Instrumentation is configured from the environment, so a run can be measured without code changes:
+#   WORLDCUP_INSTRUMENT=1          record timings, row counts and call counts
+#   WORLDCUP_TRACE_MEMORY=1        also record peak traced memory per span (slows allocation-heavy code)
+#   WORLDCUP_PROFILE=stage:matchup,predict:match   cProfile these spans ('all' for every span)
+#   WORLDCUP_METRICS_PATH=run.json write the report on exit (.json, or Prometheus text for .prom/.txt)
+ENV_ENABLE = 'WORLDCUP_INSTRUMENT'
+ENV_MEMORY = 'WORLDCUP_TRACE_MEMORY'
+ENV_PROFILE = 'WORLDCUP_PROFILE'
+ENV_METRICS_PATH = 'WORLDCUP_METRICS_PATH'
+
+# Functions listed per profiled span in the report, by cumulative time
+PROFILE_TOP = 15
+METRIC_PREFIX = 'worldcup'
+
+
+class SpanRecord:
+    """
+    Totals for every call of one named span.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.rows_in = 0
+        self.rows_out = 0
+        self.peak_memory_bytes = None
+        self.profile = None
+
+    def merge(self, other):
+        self.calls += other.calls
+        self.errors += other.errors
+        self.total_seconds += other.total_seconds
+        self.max_seconds = max(self.max_seconds, other.max_seconds)
+        self.rows_in += other.rows_in
+        self.rows_out += other.rows_out
+        if other.peak_memory_bytes is not None:
+            self.peak_memory_bytes = max(self.peak_memory_bytes or 0, other.peak_memory_bytes)
+        if other.profile is not None:
+            # other.profile is a pstats.Stats, or ProfileData when it came from another process
+            stats = pstats.Stats(ProfileData(dict(other.profile.stats)), stream=io.StringIO())
+            if self.profile is None:
+                self.profile = stats
+            else:
+                self.profile.add(stats)
+
+    def to_dict(self):
+        record = {
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_seconds': round(self.total_seconds, 6),
+            'mean_seconds': round(self.total_seconds / self.calls, 6) if self.calls else None,
+            'max_seconds': round(self.max_seconds, 6),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'peak_memory_bytes': self.peak_memory_bytes,
+        }
+        if self.profile is not None:
+            record['profile'] = top_functions(self.profile)
+        return record
+
+
+class Span:
+    """
+    One open span. Code running inside it can report the rows it consumed and produced.
+    """
+
+    def __init__(self, name, rows_in=0):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = 0
+        self.memory_start = 0
+        self.memory_peak = 0
+
+    def add_rows(self, rows_in=0, rows_out=0):
+        self.rows_in += rows_in
+        self.rows_out += rows_out
+
+
+# Most expensive functions of a profile, by cumulative time
+def top_functions(stats, limit=PROFILE_TOP):
+    rows = []
+    for (filename, line, func), (_, n_calls, own, cumulative, _) in stats.stats.items():
+        rows.append({
+            'function': f"{os.path.basename(filename)}:{line}({func})",
+            'calls': n_calls,
+            'own_seconds': round(own, 6),
+            'cumulative_seconds': round(cumulative, 6),
+        })
+    return sorted(rows, key=lambda row: row['cumulative_seconds'], reverse=True)[:limit]
+
+
+class Instrumentation:
+    """
+    Process-wide recorder of named spans: pipeline stages, model loads, predictions.
+
+    Disabled by default; while disabled span() and instrumented functions cost one attribute
+    check. Spans nest per thread, and rows reported inside a span also count towards the
+    spans enclosing it. Peak memory is taken from tracemalloc and so covers every thread.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_memory = False
+        self.profile = set()
+        self.records = {}
+        self._started_tracing = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def configure(self, enabled=True, trace_memory=False, profile=()):
+        """
+        Turn recording on or off. profile lists span names to run under cProfile ('all' for every span).
+        """
+        self.enabled = enabled
+        self.trace_memory = trace_memory and enabled
+        self.profile = set(profile) if enabled else set()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        elif not self.trace_memory and self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def configure_from_env(self, environ=os.environ):
+        profile = [name.strip() for name in environ.get(ENV_PROFILE, '').split(',') if name.strip()]
+        enabled = environ.get(ENV_ENABLE, '') not in ('', '0') or bool(profile)
+        self.configure(enabled, environ.get(ENV_MEMORY, '') not in ('', '0'), profile)
+        path = environ.get(ENV_METRICS_PATH)
+        if enabled and path:
+            atexit.register(self.write_report, path)
+
+    def reset(self):
+        with self._lock:
+            self.records = {}
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _profiling(self, name):
+        return ('all' in self.profile or name in self.profile) and not getattr(self._local, 'profiler', None)
+
+    @contextmanager
+    def span(self, name, rows_in=0):
+        """
+        Time the enclosed block under `name`. Yields the Span (or None when disabled);
+        call span.add_rows(rows_out=n) to report what the block produced.
+        """
+        if not self.enabled:
+            yield None
+            return
+        span = Span(name, rows_in)
+        stack = self._stack()
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # Hand the peak so far to the enclosing spans before it is reset for this one
+            for outer in stack:
+                outer.memory_peak = max(outer.memory_peak, peak)
+            tracemalloc.reset_peak()
+            span.memory_start = span.memory_peak = current
+        profiler = None
+        if self._profiling(name):
+            # cProfile cannot nest, so only the outermost profiled span is profiled
+            profiler = self._local.profiler = cProfile.Profile()
+            profiler.enable()
+        stack.append(span)
+        failed = False
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            stack.pop()
+            if profiler is not None:
+                profiler.disable()
+                self._local.profiler = None
+            if stack:
+                stack[-1].add_rows(span.rows_in, span.rows_out)
+            peak = None
+            if self.trace_memory:
+                span.memory_peak = max(span.memory_peak, tracemalloc.get_traced_memory()[1])
+                peak = span.memory_peak - span.memory_start
+                if stack:
+                    stack[-1].memory_peak = max(stack[-1].memory_peak, span.memory_peak)
+            self._record(name, elapsed, span, failed, peak, profiler)
+
+    def _record(self, name, elapsed, span, failed, peak, profiler):
+        with self._lock:
+            record = self.records.setdefault(name, SpanRecord())
+            record.calls += 1
+            record.errors += failed
+            record.total_seconds += elapsed
+            record.max_seconds = max(record.max_seconds, elapsed)
+            record.rows_in += span.rows_in
+            record.rows_out += span.rows_out
+            if peak is not None:
+                record.peak_memory_bytes = max(record.peak_memory_bytes or 0, peak)
+            if profiler is not None:
+                stats = pstats.Stats(profiler, stream=io.StringIO())
+                if record.profile is None:
+                    record.profile = stats
+                else:
+                    record.profile.add(stats)
+
+    def add_rows(self, rows_in=0, rows_out=0):
+        """Report rows read / written to the innermost open span of this thread, if any."""
+        if not self.enabled:
+            return
+        stack = self._stack()
+        if stack:
+            stack[-1].add_rows(rows_in, rows_out)
+
+    def instrumented(self, name, rows_in=None, rows_out=None):
+        """
+        Decorator recording every call of a function as span `name`.
+        rows_in(*args, **kwargs) and rows_out(result) optionally count the rows handled.
+        """
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.span(name, rows_in(*args, **kwargs) if rows_in else 0) as span:
+                    result = func(*args, **kwargs)
+                    if rows_out is not None:
+                        span.add_rows(rows_out=rows_out(result))
+                    return result
+            return wrapper
+        return decorate
+
+    def merge(self, records):
+        """Fold in the records of another process (e.g. a pipeline worker)."""
+        with self._lock:
+            for name, other in records.items():
+                self.records.setdefault(name, SpanRecord()).merge(other)
+
+    def export(self):
+        """Picklable copy of the records, for sending from a worker process."""
+        with self._lock:
+            exported = {}
+            for name, record in self.records.items():
+                copy = SpanRecord()
+                copy.merge(record)
+                if copy.profile is not None:
+                    # pstats.Stats holds a stream and is not picklable; send the raw stats table
+                    copy.profile = ProfileData(copy.profile.stats)
+                exported[name] = copy
+            return exported
+
+    def report(self):
+        with self._lock:
+            return {name: record.to_dict() for name, record in sorted(self.records.items())}
+
+    def to_json(self):
+        return json.dumps({'spans': self.report()}, indent=2)
+
+    def to_prometheus(self):
+        """The records in the Prometheus text exposition format, one series per span name."""
+        report = self.report()
+        metrics = [
+            ('calls_total', 'counter', 'Calls of the span', 'calls'),
+            ('errors_total', 'counter', 'Calls of the span that raised', 'errors'),
+            ('seconds_total', 'counter', 'Wall time spent in the span', 'total_seconds'),
+            ('seconds_max', 'gauge', 'Slowest single call of the span', 'max_seconds'),
+            ('rows_in_total', 'counter', 'Rows consumed by the span', 'rows_in'),
+            ('rows_out_total', 'counter', 'Rows produced by the span', 'rows_out'),
+            ('peak_memory_bytes', 'gauge', 'Peak traced memory above the span start', 'peak_memory_bytes'),
+        ]
+        lines = []
+        for suffix, kind, help_text, key in metrics:
+            metric = f"{METRIC_PREFIX}_span_{suffix}"
+            values = [(name, record[key]) for name, record in report.items() if record[key] is not None]
+            if not values:
+                continue
+            lines.append(f"# HELP {metric} {help_text}.")
+            lines.append(f"# TYPE {metric} {kind}")
+            for name, value in values:
+                label = re.sub(r'(["\\])', r'\\\1', name)
+                lines.append(f'{metric}{{span="{label}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def write_report(self, path):
+        """Write the report as JSON, or as Prometheus text when path ends in .prom or .txt."""
+        text = self.to_prometheus() if path.endswith(('.prom', '.txt')) else self.to_json()
+        with open(path, 'w') as f:
+            f.write(text)
+        print(f"Wrote instrumentation report to {path}")
+
+
+class ProfileData:
+    """
+    Raw cProfile statistics table in the form pstats.Stats accepts as a source.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+instruments = Instrumentation()
+instruments.configure_from_env()
+instrumented = instruments.instrumented
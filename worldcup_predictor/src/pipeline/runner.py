@@ -0,0 +1,295 @@
+import argparse
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sys
+import types
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from data.build_matchup_dataset import build_matchup_dataset
+from data.clean_data import clean_csv_file
+from data.fetch_data import fetch_all_csvs
+from features.elo import build_elo_ratings
+from features.feature_engineering import build_player_features, build_team_features
+from features.match_events import build_event_features
+from models.probability_matrix import file_hash
+from models.scoreline_model import train_scoreline_model
+from models.train import train_award_models, train_match_model
+from monitoring.instrumentation import instruments
+
+BASE_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.normpath(os.path.abspath(os.path.join(BASE_DIR, '..')))
+RAW_DIR = os.path.join(BASE_DIR, '../../data/raw')
+PROCESSED_DIR = os.path.join(BASE_DIR, '../../data/processed')
+MODELS_DIR = os.path.join(BASE_DIR, '../../models')
+STATE_PATH = os.path.join(PROCESSED_DIR, 'pipeline_state.json')
+
+
+class Stage:
+    """
+    One pipeline step: func() reads the inputs and writes the outputs (file paths).
+    Stages are linked by path: a stage depends on every stage that writes one of its inputs.
+    Optional outputs are only written when the data allows (e.g. a model for a column
+    that may be missing); a stage is not rerun because one of them does not exist.
+    The stage's code is func's module and every module under src/ it imports; code
+    lists further source files it depends on.
+    """
+
+    def __init__(self, name, func, inputs, outputs, optional_outputs=(), code=()):
+        self.name = name
+        self.func = func
+        self.inputs = [os.path.normpath(path) for path in inputs]
+        self.outputs = [os.path.normpath(path) for path in outputs]
+        self.optional_outputs = [os.path.normpath(path) for path in optional_outputs]
+        self.code = [os.path.normpath(path) for path in code]
+
+    def source_files(self):
+        func = self.func.func if isinstance(self.func, functools.partial) else self.func
+        module = sys.modules.get(func.__module__)
+        files = {inspect.getsourcefile(m) for m in code_modules(module)} if module is not None else set()
+        return sorted({os.path.normpath(path) for path in files if path} | set(self.code))
+
+
+def _is_local(module):
+    path = getattr(module, '__file__', None)
+    return path is not None and os.path.normpath(os.path.abspath(path)).startswith(SRC_DIR + os.sep)
+
+
+# A module and every module under src/ it imports, directly or through another local module
+# (found through the modules and the functions / classes in its namespace)
+def code_modules(module):
+    found = {module.__name__: module} if getattr(module, '__file__', None) else {}
+    pending = list(found.values())
+    while pending:
+        for value in list(vars(pending.pop()).values()):
+            if isinstance(value, types.ModuleType):
+                dep = value
+            else:
+                name = getattr(value, '__module__', None)
+                dep = sys.modules.get(name) if isinstance(name, str) else None
+            if dep is not None and dep.__name__ not in found and _is_local(dep):
+                found[dep.__name__] = dep
+                pending.append(dep)
+    return list(found.values())
+
+
+def default_stages(raw_dir=RAW_DIR, processed_dir=PROCESSED_DIR, models_dir=MODELS_DIR):
+    sources = sorted(f for f in os.listdir(raw_dir) if f.lower().endswith('.csv'))
+    processed = functools.partial(os.path.join, processed_dir)
+    matches, players = processed('WorldCupMatches_cleaned.csv'), processed('FIFA WC 2022 Players Stats_cleaned.csv')
+    lineups, rankings = processed('WorldCupPlayers_cleaned.csv'), processed('fifa_ranking-2024-06-20_cleaned.csv')
+    team_features, player_features = processed('team_features.csv'), processed('player_features.csv')
+    matchup, elo = processed('matchup_dataset.csv'), processed('elo_state.npz')
+    return [
+        Stage('fetch', fetch_all_csvs, [os.path.join(raw_dir, f) for f in sources], [processed(f) for f in sources]),
+    ] + [
+        # One stage per file, so a single changed source only re-cleans that file
+        Stage(f"clean:{f}", functools.partial(clean_csv_file, f), [processed(f)], [processed(f.replace('.csv', '_cleaned.csv'))])
+        for f in sources
+    ] + [
+        Stage('team_features', functools.partial(build_team_features, rankings, elo), [matches, rankings, elo],
+              [team_features, processed('team_feature_state.json')]),
+        Stage('player_features', build_player_features, [players], [player_features]),
+        Stage('event_features', build_event_features, [lineups, matches],
+              [processed('match_events.csv'), processed('player_event_features.csv'), processed('team_event_features.csv')]),
+        Stage('elo', functools.partial(build_elo_ratings, matches, elo), [matches], [elo]),
+        Stage('matchup', functools.partial(build_matchup_dataset, rankings_path=rankings, elo_path=elo),
+              [matches, team_features, rankings, elo], [matchup]),
+        Stage('train_match_model', train_match_model, [matchup, team_features],
+              [os.path.join(models_dir, 'match_model.pkl')]),
+        Stage('train_scoreline_model', functools.partial(train_scoreline_model, matches, os.path.join(models_dir, 'scoreline_model.npz')),
+              [matches], [os.path.join(models_dir, 'scoreline_model.npz')]),
+        # The saves model is only trained when player_features has a save_percentage column
+        Stage('train_award_models', train_award_models, [player_features],
+              [os.path.join(models_dir, 'award_model_goals.pkl'), os.path.join(models_dir, 'award_model_assists.pkl')],
+              optional_outputs=[os.path.join(models_dir, 'award_model_saves.pkl')]),
+    ]
+
+
+# Maps each stage to the stages producing its inputs
+def stage_dependencies(stages):
+    producers = {}
+    for stage in stages:
+        for path in stage.outputs + stage.optional_outputs:
+            if path in producers:
+                raise ValueError(f"'{path}' is an output of both '{producers[path]}' and '{stage.name}'")
+            producers[path] = stage.name
+    deps = {stage.name: {producers[p] for p in stage.inputs if p in producers} - {stage.name} for stage in stages}
+
+    # Reject cycles up front rather than deadlocking the scheduler
+    visiting, finished = set(), set()
+
+    def visit(name):
+        if name in finished:
+            return
+        if name in visiting:
+            raise ValueError(f"Pipeline stages form a cycle through '{name}'")
+        visiting.add(name)
+        for dep in deps[name]:
+            visit(dep)
+        finished.add(name)
+
+    for name in deps:
+        visit(name)
+    return deps
+
+
+class FileHasher:
+    """
+    Content hashes of files, remembered by (size, mtime) so unchanged files are not re-read.
+    """
+
+    def __init__(self, known=None):
+        self.known = dict(known or {})
+
+    def __call__(self, path):
+        if not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        entry = self.known.get(path)
+        if entry is None or entry[:2] != [stat.st_size, stat.st_mtime_ns]:
+            entry = [stat.st_size, stat.st_mtime_ns, file_hash(path)]
+            self.known[path] = entry
+        return entry[2]
+
+
+# Fingerprint of everything a stage's result depends on: its code and the content of its inputs
+def stage_fingerprint(stage, hasher):
+    digest = hashlib.sha256(stage.name.encode())
+    for path in stage.source_files():
+        digest.update(f"{os.path.relpath(path, SRC_DIR)}:{hasher(path) or ''}".encode())
+    for path in sorted(stage.inputs):
+        content = hasher(path)
+        if content is None:
+            raise FileNotFoundError(f"Input '{path}' of stage '{stage.name}' does not exist")
+        digest.update(f"{os.path.basename(path)}:{content}".encode())
+    return digest.hexdigest()
+
+
+def load_state(path=STATE_PATH):
+    if not os.path.exists(path):
+        return {'stages': {}, 'files': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(state, path=STATE_PATH):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+# Runs one stage in a worker process under the parent's instrumentation settings;
+# returns the worker's records so the parent can fold them into its report
+def _run_stage(name, func, config):
+    instruments.configure(*config)
+    instruments.reset()
+    with instruments.span(f"stage:{name}"):
+        func()
+    return instruments.export() if instruments.enabled else None
+
+
+# A stage is current when its fingerprint matches the last run and its outputs are as it left them
+def is_up_to_date(stage, fingerprint, state, hasher):
+    record = state['stages'].get(stage.name)
+    if record is None or record['fingerprint'] != fingerprint:
+        return False
+    outputs = record['outputs']
+    return (all(hasher(path) is not None and hasher(path) == outputs.get(path) for path in stage.outputs)
+            and all(hasher(path) == outputs.get(path) for path in stage.optional_outputs))
+
+
+def run_pipeline(stages=None, state_path=STATE_PATH, n_workers=1, force=False):
+    """
+    Run the stages whose code or input content changed since their last successful run,
+    in dependency order, with up to n_workers independent stages running at once.
+
+    Args:
+        stages: list of Stage (default: fetch -> clean -> features -> matchup -> train).
+        state_path: JSON file holding fingerprints and file hashes between runs.
+        n_workers: worker processes; 1 runs every stage in this process.
+        force: rerun every stage regardless of fingerprints.
+    Returns:
+        dict mapping stage name to 'ran' or 'skipped'.
+    """
+    stages = default_stages() if stages is None else stages
+    by_name = {stage.name: stage for stage in stages}
+    deps = stage_dependencies(stages)
+    state = load_state(state_path)
+    hasher = FileHasher(state.get('files'))
+    status = {}
+
+    def finish(name, fingerprint):
+        stage = by_name[name]
+        state['stages'][name] = {
+            'fingerprint': fingerprint,
+            'outputs': {path: hasher(path) for path in stage.outputs + stage.optional_outputs},
+        }
+        state['files'] = hasher.known
+        save_state(state, state_path)
+        status[name] = 'ran'
+
+    pool = ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 else None
+    running = {}
+    try:
+        while len(status) < len(stages):
+            # Start (or skip) every stage whose dependencies have all settled
+            progressed = True
+            while progressed:
+                progressed = False
+                for stage in stages:
+                    name = stage.name
+                    if name in status or name in running.values() or not deps[name] <= status.keys():
+                        continue
+                    fingerprint = stage_fingerprint(stage, hasher)
+                    if not force and is_up_to_date(stage, fingerprint, state, hasher):
+                        print(f"[pipeline] {name}: up to date, skipped")
+                        status[name] = 'skipped'
+                        progressed = True
+                    elif pool is None:
+                        print(f"[pipeline] {name}: running")
+                        with instruments.span(f"stage:{name}"):
+                            stage.func()
+                        finish(name, fingerprint)
+                        progressed = True
+                    else:
+                        print(f"[pipeline] {name}: running")
+                        config = (instruments.enabled, instruments.trace_memory, instruments.profile)
+                        future = pool.submit(_run_stage, name, stage.func, config)
+                        future.fingerprint = fingerprint
+                        running[future] = name
+
+            if running:
+                completed, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    name = running.pop(future)
+                    records = future.result()
+                    if records:
+                        instruments.merge(records)
+                    finish(name, future.fingerprint)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the stages of the data/model pipeline that are out of date.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--force', action='store_true', help="rerun every stage")
+    parser.add_argument('--metrics', metavar='PATH',
+                        help="record timings, rows and memory per stage and write them to PATH (.json or .prom)")
+    parser.add_argument('--profile', nargs='+', metavar='SPAN', default=[],
+                        help="cProfile these spans, e.g. stage:matchup (or 'all'); implies --metrics")
+    args = parser.parse_args()
+    if args.metrics or args.profile:
+        instruments.configure(trace_memory=True, profile=args.profile)
+    status = run_pipeline(n_workers=args.workers, force=args.force)
+    print(f"Pipeline complete: {sum(s == 'ran' for s in status.values())} ran, "
+          f"{sum(s == 'skipped' for s in status.values())} skipped.")
+    if instruments.enabled:
+        instruments.write_report(args.metrics or 'pipeline_metrics.json')
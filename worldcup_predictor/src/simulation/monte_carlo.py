@@ -1,72 +1,529 @@
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
+# Largest goal margin tracked for a single match; bigger wins are clipped to it
+MAX_MARGIN = 5
+# Relative likelihood of each extra goal of winning margin when only 1X2 probabilities are known
+MARGIN_DECAY = 0.45
+# Simulations processed per vectorized batch, bounds peak memory of the outcome tensors
+CHUNK_SIZE = 50_000
 
-def simulate_match(prob: Dict[str, float]) -> str:
+POINTS_WIN = 3
+POINTS_DRAW = 1
+# Teams per group that advance automatically; best third-placed teams fill the rest of the bracket
+GROUP_QUALIFIERS = 2
+
+# Used for fixtures missing from match_probs in either orientation
+DEFAULT_PROBS = {'home_win': 1 / 3, 'draw': 1 / 3, 'away_win': 1 / 3}
+
+MatchProbs = Union[Dict[Tuple[str, str], Dict[str, float]], np.ndarray]
+
+
+def simulate_match(prob: Dict[str, float], rng: Optional[np.random.Generator] = None) -> str:
     """
     Simulate a single match outcome given win/draw/loss probabilities.
     Args:
         prob: Dict with keys 'home_win', 'draw', 'away_win'.
+        rng: Optional numpy Generator (a fresh one is used if omitted).
     Returns:
         Result: 'home', 'draw', or 'away'.
     """
-    outcome = np.random.choice(['home', 'draw', 'away'], p=[prob['home_win'], prob['draw'], prob['away_win']])
-    return outcome
+    rng = rng if rng is not None else np.random.default_rng()
+    outcome = rng.choice(['home', 'draw', 'away'], p=[prob['home_win'], prob['draw'], prob['away_win']])
+    return str(outcome)
+
+
+def margin_distribution(home_win, draw, away_win, max_margin: int = MAX_MARGIN) -> np.ndarray:
+    """
+    Spread 1X2 probabilities over goal margins -max_margin..max_margin.
+    Decisive results decay geometrically with the size of the margin.
+    Args:
+        home_win, draw, away_win: Scalars or arrays of equal shape.
+        max_margin: Largest margin represented.
+    Returns:
+        Array of shape (..., 2 * max_margin + 1); index max_margin is the draw.
+    """
+    home_win, draw, away_win = np.broadcast_arrays(
+        np.asarray(home_win, dtype=float), np.asarray(draw, dtype=float), np.asarray(away_win, dtype=float))
+    weights = MARGIN_DECAY ** np.arange(max_margin)
+    weights = weights / weights.sum()
+    table = np.empty(home_win.shape + (2 * max_margin + 1,))
+    table[..., max_margin + 1:] = home_win[..., None] * weights
+    table[..., max_margin] = draw
+    table[..., :max_margin] = away_win[..., None] * weights[::-1]
+    return table
+
+
+def build_outcome_table(teams: List[str], match_probs: MatchProbs, max_margin: int = MAX_MARGIN) -> np.ndarray:
+    """
+    Build the dense goal-margin distribution for every ordered pair of teams.
+    Args:
+        teams: Team names; their positions are the team ids used by the engine.
+        match_probs: Dict mapping (team1, team2) to probability dict, an array of shape
+            (T, T, 3) holding home_win/draw/away_win, or an already built margin table
+            of shape (T, T, 2 * max_margin + 1).
+        max_margin: Largest margin represented.
+    Returns:
+        Array of shape (T, T, 2 * max_margin + 1) where [i, j] is the margin
+        distribution of team i (home) against team j.
+    """
+    n_teams = len(teams)
+    if isinstance(match_probs, np.ndarray):
+        if match_probs.shape[:2] != (n_teams, n_teams):
+            raise ValueError(f"match_probs array must start with shape ({n_teams}, {n_teams}), got {match_probs.shape}")
+        if match_probs.shape[-1] == 3:
+            return margin_distribution(match_probs[..., 0], match_probs[..., 1], match_probs[..., 2], max_margin)
+        if match_probs.shape[-1] != 2 * max_margin + 1:
+            raise ValueError(f"Margin table must have {2 * max_margin + 1} outcomes, got {match_probs.shape[-1]}")
+        return match_probs
+
+    probs = np.empty((n_teams, n_teams, 3))
+    for i, home in enumerate(teams):
+        for j, away in enumerate(teams):
+            if (home, away) in match_probs:
+                p = match_probs[(home, away)]
+                probs[i, j] = (p['home_win'], p['draw'], p['away_win'])
+            elif (away, home) in match_probs:
+                p = match_probs[(away, home)]
+                probs[i, j] = (p['away_win'], p['draw'], p['home_win'])
+            else:
+                probs[i, j] = (DEFAULT_PROBS['home_win'], DEFAULT_PROBS['draw'], DEFAULT_PROBS['away_win'])
+    return margin_distribution(probs[..., 0], probs[..., 1], probs[..., 2], max_margin)
+
+
+def knockout_advance_probs(table: np.ndarray) -> np.ndarray:
+    """
+    Probability that the row team eliminates the column team in a knockout tie.
+    Drawn matches are settled by extra time and penalties, treated as a coin flip.
+    """
+    centre = table.shape[-1] // 2
+    return table[..., centre + 1:].sum(axis=-1) + 0.5 * table[..., centre]
+
+
+def bracket_order(size: int) -> np.ndarray:
+    """
+    Seed positions for a standard knockout bracket, so seeds 1 and 2 can only meet in the final.
+    Adjacent entries of the returned array play each other in the first round.
+    """
+    if size < 1 or size & (size - 1):
+        raise ValueError(f"Bracket size must be a power of two, got {size}")
+    order = np.array([0])
+    while len(order) < size:
+        n = 2 * len(order)
+        order = np.stack([order, n - 1 - order], axis=1).ravel()
+    return order
+
+
+def stage_names(bracket_size: int) -> List[str]:
+    """
+    Column names for the stage probabilities of a bracket of the given size.
+    'advance' means reaching the knockout stage; later names describe the round reached.
+    """
+    names = {1: 'winner', 2: 'final', 4: 'semifinal', 8: 'quarterfinal'}
+    stages = ['advance']
+    remaining = bracket_size // 2
+    while remaining >= 1:
+        stages.append(names.get(remaining, f'round_of_{remaining}'))
+        remaining //= 2
+    return stages
+
+
+def tournament_layout(groups: Dict[str, List[str]]) -> Tuple[List[str], np.ndarray, int, int]:
+    """
+    Validate the group draw and derive the knockout format.
+    Args:
+        groups: Dict mapping group name to list of team names.
+    Returns:
+        (teams, group_ids, bracket_size, n_best_thirds) where group_ids has shape
+        (n_groups, group_size) and holds indices into teams.
+    """
+    sizes = {len(t) for t in groups.values()}
+    if len(sizes) != 1:
+        raise ValueError(f"All groups must have the same number of teams, got sizes {sorted(sizes)}")
+    group_size = sizes.pop()
+    teams = [team for group_teams in groups.values() for team in group_teams]
+    if len(set(teams)) != len(teams):
+        raise ValueError("A team appears in more than one group.")
+
+    n_groups = len(groups)
+    group_ids = np.arange(len(teams)).reshape(n_groups, group_size)
+    n_auto = n_groups * min(GROUP_QUALIFIERS, group_size)
+    bracket_size = 1 << max(n_auto - 1, 0).bit_length()
+    n_best_thirds = bracket_size - n_auto
+    if n_best_thirds and (group_size <= GROUP_QUALIFIERS or n_best_thirds > n_groups):
+        raise ValueError(f"Cannot fill a {bracket_size}-team bracket from {n_groups} groups of {group_size}.")
+    return teams, group_ids, bracket_size, n_best_thirds
+
+
+def _group_fixtures(group_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    home, away = np.triu_indices(group_size, k=1)
+    return home, away
+
+
+def simulate_group_matrix(group_ids: np.ndarray, table: np.ndarray, n: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Play every round-robin fixture of every group for n tournaments at once.
+    Args:
+        group_ids: Team ids per group, shape (n_groups, group_size).
+        table: Margin table from build_outcome_table.
+        n: Number of tournaments.
+        rng: numpy Generator.
+    Returns:
+        (finish, ranking_key): finish holds team ids ordered by group position with shape
+        (n, n_groups, group_size); ranking_key holds the matching sort keys
+        (points, then goal difference, then goals scored, then drawing of lots).
+        The margin table carries no totals, so a side's goals scored in a match are taken
+        as its winning margin (0 for a draw or a defeat).
+    """
+    n_groups, group_size = group_ids.shape
+    home_slot, away_slot = _group_fixtures(group_size)
+    max_margin = table.shape[-1] // 2
+    margins = np.arange(-max_margin, max_margin + 1)
+
+    # Each outcome's contribution to the home and away ranking keys: points first, goal difference
+    # second, goals scored third
+    gf_span = max_margin * (group_size - 1) + 1
+    gd_span = 2 * gf_span - 1
+    home_points = np.where(margins > 0, POINTS_WIN, np.where(margins == 0, POINTS_DRAW, 0))
+    away_points = np.where(margins < 0, POINTS_WIN, np.where(margins == 0, POINTS_DRAW, 0))
+    home_value = ((home_points * gd_span + margins) * gf_span + np.maximum(margins, 0)).astype(np.float32)
+    away_value = ((away_points * gd_span - margins) * gf_span + np.maximum(-margins, 0)).astype(np.float32)
+
+    # Inverse-CDF sampling, one vectorized search per fixture across all tournaments
+    fixture_home = group_ids[:, home_slot].ravel()
+    fixture_away = group_ids[:, away_slot].ravel()
+    cdf = np.cumsum(table[fixture_home, fixture_away], axis=-1)[:, :-1]
+    draws = rng.random((len(fixture_home), n), dtype=np.float32)
+    outcome = np.empty(draws.shape, dtype=np.int8)
+    for f in range(len(fixture_home)):
+        outcome[f] = np.searchsorted(cdf[f], draws[f], side='right')
+    outcome = outcome.T.reshape(n, n_groups, len(home_slot))
+
+    # Fixture -> slot incidence matrices turn per-match results into per-team tallies
+    home_onehot = np.eye(group_size, dtype=np.float32)[home_slot]
+    away_onehot = np.eye(group_size, dtype=np.float32)[away_slot]
+    key = home_value[outcome] @ home_onehot + away_value[outcome] @ away_onehot
+
+    # A uniform draw settles teams level on points, goal difference and goals scored; float64
+    # keeps the draw's resolution next to the integer part, so lots are never tied
+    key = key.astype(np.float64) + rng.random(key.shape)
+    slots = np.argsort(-key, axis=-1)
+    finish = group_ids[np.arange(n_groups)[:, None], slots]
+    ranking_key = np.take_along_axis(key, slots, axis=-1)
+    return finish, ranking_key
+
+
+def simulate_bracket(seeds: np.ndarray, advance_probs: np.ndarray, rng: np.random.Generator) -> List[np.ndarray]:
+    """
+    Play a single-elimination bracket for every simulated tournament.
+    Args:
+        seeds: Team ids in seed order, shape (n, bracket_size).
+        advance_probs: Matrix from knockout_advance_probs.
+        rng: numpy Generator.
+    Returns:
+        List with the surviving team ids after each round, ending with the winners (n, 1).
+    """
+    alive = seeds[:, bracket_order(seeds.shape[1])]
+    rounds = []
+    while alive.shape[1] > 1:
+        team_a, team_b = alive[:, 0::2], alive[:, 1::2]
+        a_wins = rng.random(team_a.shape) < advance_probs[team_a, team_b]
+        alive = np.where(a_wins, team_a, team_b)
+        rounds.append(alive)
+    return rounds
+
+
+def separate_group_pairs(seeds: np.ndarray, team_group: np.ndarray, tiers: np.ndarray) -> np.ndarray:
+    """
+    Swap first-round opponents so that no team meets a team from its own group.
+    Seed i plays seed bracket_size - 1 - i; on a clash the lower seed is swapped with the nearest
+    lower seed of the same tier (group position) whose exchange leaves both pairs clash-free.
+    Args:
+        seeds: Team ids in seed order, shape (n, bracket_size).
+        team_group: Group index of every team id.
+        tiers: Group position (0 = winner) of each seed slot, shape (bracket_size,).
+    Returns:
+        Seed array with the clashes resolved (a clash with no valid swap is left in place).
+    """
+    seeds = seeds.copy()
+    groups = team_group[seeds]
+    size = seeds.shape[1]
+    half = size // 2
+    high = np.arange(half)
+    low = size - 1 - high
+    for j in range(half):
+        rows = np.flatnonzero(groups[:, high[j]] == groups[:, low[j]])
+        if not len(rows):
+            continue
+        g = groups[rows]
+        valid = ((tiers[low] == tiers[low[j]])
+                 & (g[:, low] != g[:, high[j], None])
+                 & (g[:, high] != g[:, low[j], None]))
+        valid[:, j] = False
+        k = np.where(valid, np.abs(high - j), size).argmin(axis=1)
+        found = valid[np.arange(len(rows)), k]
+        rows, k = rows[found], low[k[found]]
+        for values in (seeds, groups):
+            swapped = values[rows, k]
+            values[rows, k] = values[rows, low[j]]
+            values[rows, low[j]] = swapped
+    return seeds
+
+
+def seed_bracket(group_ids: np.ndarray, finish: np.ndarray, ranking_key: np.ndarray, n_best_thirds: int) -> np.ndarray:
+    """
+    Knockout seeds from the group standings of n tournaments.
+    Group winners are the top seeds, then runners-up, then the best third-placed teams. Each tier
+    is ordered by group record, so the seeding does not depend on how the groups are lettered,
+    and no first-round pair comes from the same group (see separate_group_pairs).
+    Args:
+        group_ids: Team ids per group, shape (n_groups, group_size).
+        finish, ranking_key: Output of simulate_group_matrix.
+        n_best_thirds: Number of third-placed teams that advance.
+    Returns:
+        Team ids in seed order, shape (n, bracket_size).
+    """
+    n_groups, group_size = group_ids.shape
+    # Winners, then runners-up, each ranked by group record across the groups
+    tiers = [np.take_along_axis(finish[:, :, p], np.argsort(-ranking_key[:, :, p], axis=1), axis=1)
+             for p in range(min(GROUP_QUALIFIERS, group_size))]
+    if n_best_thirds:
+        # Ranking the third-placed teams also picks the ones that advance
+        best = np.argsort(-ranking_key[:, :, GROUP_QUALIFIERS], axis=1)[:, :n_best_thirds]
+        tiers.append(np.take_along_axis(finish[:, :, GROUP_QUALIFIERS], best, axis=1))
+    seeds = np.concatenate(tiers, axis=1)
+    team_group = np.empty(group_ids.size, dtype=np.intp)
+    team_group[group_ids] = np.arange(n_groups)[:, None]
+    seed_tiers = np.repeat(np.arange(len(tiers)), [tier.shape[1] for tier in tiers])
+    return separate_group_pairs(seeds, team_group, seed_tiers)
 
 
-def simulate_group_stage(groups: Dict[str, List[str]], match_probs: Dict[Tuple[str, str], Dict[str, float]]) -> Dict[str, List[str]]:
+def simulate_tournaments(group_ids: np.ndarray, table: np.ndarray, bracket_size: int, n_best_thirds: int,
+                         n: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Simulate n complete tournaments and count how often each team reaches each stage.
+    Returns:
+        Integer array of shape (n_stages, n_teams), stages ordered as stage_names(bracket_size).
+    """
+    n_teams = group_ids.size
+    finish, ranking_key = simulate_group_matrix(group_ids, table, n, rng)
+    seeds = seed_bracket(group_ids, finish, ranking_key, n_best_thirds)
+
+    counts = [np.bincount(seeds.ravel(), minlength=n_teams)]
+    for survivors in simulate_bracket(seeds, knockout_advance_probs(table), rng):
+        counts.append(np.bincount(survivors.ravel(), minlength=n_teams))
+    return np.stack(counts)
+
+
+def simulate_group_stage(groups: Dict[str, List[str]], match_probs: MatchProbs,
+                         rng: Optional[np.random.Generator] = None) -> Dict[str, List[str]]:
     """
     Simulate all group stage matches and return group standings.
     Args:
         groups: Dict mapping group name to list of team names.
         match_probs: Dict mapping (team1, team2) to probability dict.
+        rng: Optional numpy Generator.
     Returns:
         Dict mapping group name to list of teams in order of finish.
     """
-    # Placeholder: implement round-robin and point tally
-    group_results = {g: teams for g, teams in groups.items()}  # TODO: implement real logic
-    return group_results
+    rng = rng if rng is not None else np.random.default_rng()
+    teams, group_ids, _, _ = tournament_layout(groups)
+    table = build_outcome_table(teams, match_probs)
+    finish, _ = simulate_group_matrix(group_ids, table, 1, rng)
+    return {g: [teams[t] for t in finish[0, k]] for k, g in enumerate(groups)}
 
 
-def simulate_knockout_stage(qualified_teams: List[str], match_probs: Dict[Tuple[str, str], Dict[str, float]]) -> str:
+def simulate_knockout_stage(qualified_teams: List[str], match_probs: MatchProbs,
+                            rng: Optional[np.random.Generator] = None) -> str:
     """
     Simulate knockout rounds and return the tournament winner.
+    Any number of teams is accepted: when it is not a power of two, the top seeds get
+    first-round byes.
     Args:
-        qualified_teams: List of teams qualified for knockouts.
+        qualified_teams: List of teams qualified for knockouts, in seed order.
         match_probs: Dict mapping (team1, team2) to probability dict.
+        rng: Optional numpy Generator.
     Returns:
         Winner team name.
     """
-    # Placeholder: implement knockout logic
-    winner = np.random.choice(qualified_teams)
-    return winner
+    if not qualified_teams:
+        raise ValueError("No teams to play the knockout stage.")
+    rng = rng if rng is not None else np.random.default_rng()
+    n_teams = len(qualified_teams)
+    bracket_size = 1 << (n_teams - 1).bit_length()
+    # Byes are an extra id (n_teams) that every team beats; they fill the lowest seeds
+    advance = np.zeros((n_teams + 1, n_teams + 1))
+    advance[:n_teams, :n_teams] = knockout_advance_probs(build_outcome_table(qualified_teams, match_probs))
+    advance[:n_teams, n_teams] = 1.0
+    seeds = np.concatenate([np.arange(n_teams), np.full(bracket_size - n_teams, n_teams)])[None, :]
+    rounds = simulate_bracket(seeds, advance, rng) if bracket_size > 1 else [seeds]
+    return qualified_teams[rounds[-1][0, 0]]
 
 
-def monte_carlo_tournament(groups: Dict[str, List[str]], match_probs: Dict[Tuple[str, str], Dict[str, float]], n_simulations: int = 1000) -> Dict[str, float]:
+def count_stages(group_ids: np.ndarray, table: np.ndarray, bracket_size: int, n_best_thirds: int, n: int,
+                 seed: np.random.SeedSequence, chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    """
+    Stage-count histogram for n tournaments drawn from a single random stream.
+    Returns:
+        Integer array of shape (n_stages, n_teams).
+    """
+    rng = np.random.default_rng(seed)
+    counts = np.zeros((len(stage_names(bracket_size)), group_ids.size), dtype=np.int64)
+    for start in range(0, n, chunk_size):
+        counts += simulate_tournaments(group_ids, table, bracket_size, n_best_thirds, min(chunk_size, n - start), rng)
+    return counts
+
+
+# Per-process view of the margin table, attached once by _attach_table
+_worker_table = None
+_worker_shm = None
+
+
+def _attach_table(shm_name: str, shape: Tuple[int, ...], dtype: str) -> None:
+    global _worker_table, _worker_shm
+    # Pool workers share the parent's resource tracker, which unlinks the segment once
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_table = np.ndarray(shape, dtype=np.dtype(dtype), buffer=_worker_shm.buf)
+
+
+def _count_stages_worker(group_ids: np.ndarray, bracket_size: int, n_best_thirds: int, n: int,
+                         seed: np.random.SeedSequence, chunk_size: int) -> np.ndarray:
+    return count_stages(group_ids, _worker_table, bracket_size, n_best_thirds, n, seed, chunk_size)
+
+
+def _parallel_counts(group_ids: np.ndarray, table: np.ndarray, bracket_size: int, n_best_thirds: int,
+                     sizes: List[int], seeds: List[np.random.SeedSequence], chunk_size: int) -> np.ndarray:
+    shm = shared_memory.SharedMemory(create=True, size=table.nbytes)
+    shared = np.ndarray(table.shape, dtype=table.dtype, buffer=shm.buf)
+    shared[:] = table
+    try:
+        with ProcessPoolExecutor(max_workers=len(sizes), initializer=_attach_table,
+                                 initargs=(shm.name, table.shape, table.dtype.str)) as pool:
+            futures = [pool.submit(_count_stages_worker, group_ids, bracket_size, n_best_thirds, n, seed, chunk_size)
+                       for n, seed in zip(sizes, seeds)]
+            # Integer histograms merged in worker order, so the total is exact and deterministic
+            return np.sum([f.result() for f in futures], axis=0)
+    finally:
+        del shared
+        shm.close()
+        shm.unlink()
+
+
+def monte_carlo_tournament(groups: Dict[str, List[str]], match_probs: MatchProbs, n_simulations: int = 1000,
+                           seed: Optional[int] = None, n_workers: int = 1, chunk_size: int = CHUNK_SIZE) -> pd.DataFrame:
     """
     Run Monte Carlo simulations of the tournament.
+    All simulations are played at once as arrays, chunk_size tournaments per batch.
+    With n_workers > 1 the simulations are split across a process pool; every worker
+    draws from its own stream spawned from seed and reads the probability table from
+    shared memory. Results are identical for a given seed and worker count.
     Args:
         groups: Dict of group name to teams.
-        match_probs: Dict of (team1, team2) to probability dict.
+        match_probs: Dict of (team1, team2) to probability dict, or an array accepted by build_outcome_table.
         n_simulations: Number of tournament simulations.
+        seed: Root seed (int or SeedSequence); None draws fresh entropy.
+        n_workers: Number of worker processes.
+        chunk_size: Tournaments simulated per batch.
     Returns:
-        Dict of team name to probability of winning the tournament.
-    """
-    winners = []
-    for _ in range(n_simulations):
-        group_results = simulate_group_stage(groups, match_probs)
-        # For now, just take first team from each group
-        qualified = [teams[0] for teams in group_results.values()]
-        winner = simulate_knockout_stage(qualified, match_probs)
-        winners.append(winner)
-    winner_counts = pd.Series(winners).value_counts(normalize=True).to_dict()
-    return winner_counts
+        DataFrame indexed by team with the probability of reaching each stage
+        ('advance' out of the group, ..., 'final', 'winner'), sorted by 'winner'.
+        This replaces the former {team: win probability} dict, which
+        tournament_win_probabilities still returns.
+    """
+    if n_workers < 1:
+        raise ValueError(f"n_workers must be at least 1, got {n_workers}")
+    teams, group_ids, bracket_size, n_best_thirds = tournament_layout(groups)
+    table = np.ascontiguousarray(build_outcome_table(teams, match_probs))
+
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    # Children are derived without spawn(), which would advance a caller's SeedSequence
+    seeds = [np.random.SeedSequence(root.entropy, spawn_key=root.spawn_key + (k,)) for k in range(n_workers)]
+    sizes = [len(part) for part in np.array_split(np.arange(n_simulations), n_workers)]
+    if n_workers == 1:
+        counts = count_stages(group_ids, table, bracket_size, n_best_thirds, sizes[0], seeds[0], chunk_size)
+    else:
+        counts = _parallel_counts(group_ids, table, bracket_size, n_best_thirds, sizes, seeds, chunk_size)
+
+    results = pd.DataFrame(counts.T / n_simulations, index=pd.Index(teams, name='team'), columns=stage_names(bracket_size))
+    return results.sort_values('winner', ascending=False)
+
+
+def tournament_win_probabilities(groups: Dict[str, List[str]], match_probs: MatchProbs, n_simulations: int = 1000,
+                                 **kwargs) -> Dict[str, float]:
+    """
+    Probability of winning the tournament per team, the dict monte_carlo_tournament returned
+    before it reported every stage. Keyword arguments are passed to monte_carlo_tournament.
+    """
+    return monte_carlo_tournament(groups, match_probs, n_simulations, **kwargs)['winner'].to_dict()
+
+
+class TournamentForecast:
+    """
+    Monte Carlo forecast built up chunk by chunk, so callers can report partial results,
+    stop early, and later raise the simulation count without repeating finished work.
+
+    Chunk k always draws from the k-th stream spawned from seed and simulates chunk_size
+    tournaments (the last one may be shorter), so a forecast extended to N runs gives the
+    same counts as one run straight to N.
+    """
+
+    def __init__(self, groups: Dict[str, List[str]], match_probs: MatchProbs, seed: Optional[int] = None,
+                 chunk_size: int = CHUNK_SIZE):
+        self.teams, self.group_ids, self.bracket_size, self.n_best_thirds = tournament_layout(groups)
+        self.table = np.ascontiguousarray(build_outcome_table(self.teams, match_probs))
+        self.root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.chunk_size = chunk_size
+        self.stages = stage_names(self.bracket_size)
+        # (n_simulations, counts) of every completed chunk, in stream order
+        self.chunks: List[Tuple[int, np.ndarray]] = []
+
+    @property
+    def n_simulations(self) -> int:
+        return sum(n for n, _ in self.chunks)
+
+    def _chunk_seed(self, k: int) -> np.random.SeedSequence:
+        return np.random.SeedSequence(self.root.entropy, spawn_key=self.root.spawn_key + (k,))
+
+    def extend(self, n_simulations: int) -> Iterator[int]:
+        """
+        Simulate until n_simulations tournaments are complete, yielding the running total
+        after each chunk. Stop iterating to cancel; finished chunks are kept.
+        """
+        # A short trailing chunk cannot be topped up from the same stream, so it is redone at full size
+        if self.chunks and self.chunks[-1][0] < self.chunk_size and n_simulations > self.n_simulations:
+            self.chunks.pop()
+        while self.n_simulations < n_simulations:
+            n = min(self.chunk_size, n_simulations - self.n_simulations)
+            rng = np.random.default_rng(self._chunk_seed(len(self.chunks)))
+            counts = simulate_tournaments(self.group_ids, self.table, self.bracket_size, self.n_best_thirds, n, rng)
+            self.chunks.append((n, counts))
+            yield self.n_simulations
+
+    def counts(self) -> np.ndarray:
+        total = np.zeros((len(self.stages), len(self.teams)), dtype=np.int64)
+        for _, counts in self.chunks:
+            total += counts
+        return total
+
+    def results(self) -> pd.DataFrame:
+        """Stage probabilities so far, in the layout returned by monte_carlo_tournament."""
+        n = max(self.n_simulations, 1)
+        results = pd.DataFrame(self.counts().T / n, index=pd.Index(self.teams, name='team'), columns=self.stages)
+        return results.sort_values('winner', ascending=False)
+
+    def margin_of_error(self, z: float = 1.96) -> pd.DataFrame:
+        """Half-width of the normal-approximation confidence interval for every probability in results()."""
+        results = self.results()
+        return z * np.sqrt(results * (1 - results) / max(self.n_simulations, 1))
+
 
 # Example usage (to be replaced with real data/model integration)
 if __name__ == "__main__":
     groups = {'A': ['Team1', 'Team2', 'Team3', 'Team4'], 'B': ['Team5', 'Team6', 'Team7', 'Team8']}
     match_probs = {('Team1', 'Team2'): {'home_win': 0.5, 'draw': 0.3, 'away_win': 0.2},
                    ('Team3', 'Team4'): {'home_win': 0.4, 'draw': 0.4, 'away_win': 0.2}}
-    results = monte_carlo_tournament(groups, match_probs, n_simulations=100)
-    print(results) 
\ No newline at end of file
+    results = monte_carlo_tournament(groups, match_probs, n_simulations=100_000, seed=2026)
+    print(results)
@@ -0,0 +1,45 @@
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+# Make the packages under src/ importable as top-level modules (models, simulation, ...)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from models.registry import registry  # noqa: E402
+from models.team_index import FEATURE_COLUMNS  # noqa: E402
+
+
+# Small synthetic team table and match model, so tests never need the trained artifacts
+@pytest.fixture
+def team_features():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame(rng.random((6, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+    df.insert(0, 'team', ['Argentina', 'France', 'Brazil', 'Germany', 'England', 'Spain'])
+    return df
+
+
+@pytest.fixture
+def model():
+    rng = np.random.default_rng(4)
+    X = pd.DataFrame(rng.normal(size=(300, 4)), columns=[f'diff_{c}' for c in FEATURE_COLUMNS])
+    y = (X['diff_avg_goals_for'] - X['diff_avg_goals_against'] > 0).astype(int)
+    return RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y)
+
+
+@pytest.fixture
+def artifacts(tmp_path, model, team_features):
+    features_path = tmp_path / 'team_features.csv'
+    model_path = tmp_path / 'match_model.pkl'
+    team_features.to_csv(features_path, index=False)
+    joblib.dump(model, model_path)
+    originals = {name: registry._specs[name] for name in ('team_features', 'match_model')}
+    registry.register('team_features', pd.read_csv, str(features_path))
+    registry.register('match_model', joblib.load, str(model_path))
+    yield
+    for name, (loader, path, optional, depends) in originals.items():
+        registry.register(name, loader, path, optional, depends)
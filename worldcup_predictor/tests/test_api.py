@@ -0,0 +1,73 @@
+import asyncio
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from api.server import MicroBatcher, app
+from models import match_predictor
+
+
+@pytest.fixture
+def client(artifacts):
+    with TestClient(app) as client:
+        yield client
+
+
+def test_single_and_batch_predictions_match_predictor(client):
+    single = client.post('/predict/match', json={'team_a': 'Argentina', 'team_b': 'france'})
+    assert single.status_code == 200
+    assert single.json()['team_a_win_prob'] == match_predictor.predict_match('Argentina', 'france')['team_a_win_prob']
+
+    fixtures = [{'team_a': 'Spain', 'team_b': 'Brazil'}, {'team_a': 'England', 'team_b': 'Germany'}]
+    batch = client.post('/predict/matches', json={'fixtures': fixtures}).json()
+    expected = match_predictor.predict_matches([('Spain', 'Brazil'), ('England', 'Germany')])
+    assert [row['team_a_win_prob'] for row in batch] == expected['team_a_win_prob'].round(3).tolist()
+
+
+def test_unknown_team_is_404(client):
+    response = client.post('/predict/match', json={'team_a': 'Atlantis', 'team_b': 'France'})
+    assert response.status_code == 404
+
+
+def test_health_and_metrics(client):
+    client.post('/predict/match', json={'team_a': 'Argentina', 'team_b': 'France'})
+    assert client.get('/health').json()['teams'] == 6
+    metrics = client.get('/metrics').json()
+    assert metrics['latency']['count'] == 1
+    assert metrics['batching']['rows'] == 1
+
+
+def test_concurrent_requests_share_a_batch():
+    calls = []
+
+    def predict(rows):
+        calls.append(len(rows))
+        return rows[:, 0] * 2
+
+    async def main():
+        batcher = MicroBatcher(predict, max_batch=64, max_wait=0.05)
+        batcher.start()
+        results = await asyncio.gather(*(batcher.submit(np.array([[i, 0.0]])) for i in range(10)))
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(main())
+    assert [float(r[0]) for r in results] == [2.0 * i for i in range(10)]
+    assert calls == [10]
+
+
+def test_batcher_propagates_model_errors():
+    def predict(rows):
+        raise RuntimeError('model exploded')
+
+    async def main():
+        batcher = MicroBatcher(predict, max_wait=0.001)
+        batcher.start()
+        try:
+            with pytest.raises(RuntimeError, match='exploded'):
+                await batcher.submit(np.zeros((1, 4)))
+        finally:
+            await batcher.stop()
+
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor
+
+from models.award_leaderboard import AwardLeaderboard
+
+
+@pytest.fixture
+def players():
+    rng = np.random.default_rng(0)
+    n = 200
+    df = pd.DataFrame({
+        'player_name': [f'Player {i}' for i in range(n)],
+        'nationality': rng.choice(['Brazil', 'France', 'Côte d\'Ivoire'], n),
+        'position': rng.choice(['Forward', 'Midfielder', 'Goalkeeper'], n),
+        'dribbles_per_90': rng.random(n),
+        'tackles_per_90': rng.random(n),
+        'clean_sheets': rng.integers(0, 5, n).astype(float),
+    })
+    df.loc[::17, 'tackles_per_90'] = np.nan
+    return df
+
+
+def fit(players, columns, seed):
+    X = players[columns].fillna(0)
+    y = np.random.default_rng(seed).random(len(players)) + X.sum(axis=1)
+    return GradientBoostingRegressor(n_estimators=10, random_state=0).fit(X, y)
+
+
+@pytest.fixture
+def models(players):
+    return {
+        'goals': fit(players, ['dribbles_per_90', 'tackles_per_90'], 1),
+        'cards': fit(players, ['tackles_per_90'], 2),
+        'saves': fit(players, ['clean_sheets'], 3),
+        'assists': None,
+    }
+
+
+def test_top_matches_full_sort(players, models):
+    board = AwardLeaderboard.from_models(players, models)
+    scored = players.dropna(subset=['dribbles_per_90', 'tackles_per_90'])
+    expected = models['goals'].predict(scored[['dribbles_per_90', 'tackles_per_90']])
+    expected_order = scored['player_name'].to_numpy()[np.argsort(-expected, kind='stable')]
+
+    top = board.top('goals', 10)
+    assert top['player_name'].tolist() == expected_order[:10].tolist()
+    assert np.allclose(top['prediction'], np.sort(expected)[::-1][:10])
+    # Lower is better for cards; players without the features are never ranked
+    cards = board.top('cards', 500)
+    assert cards['prediction'].is_monotonic_increasing and len(cards) == len(scored)
+
+
+def test_filters_and_goalkeeper_only_metrics(players, models):
+    board = AwardLeaderboard.from_models(players, models)
+    top = board.top('goals', 5, position='forward', nationality="cote d'ivoire")
+    assert set(top['position']) == {'Forward'} and set(top['nationality']) == {"Côte d'Ivoire"}
+    assert set(board.top('saves', 500)['position']) == {'Goalkeeper'}
+    with pytest.raises(ValueError, match='No trained model'):
+        board.top('assists')
+    with pytest.raises(ValueError, match='Invalid metric'):
+        board.top('fouls')
+
+
+def test_single_player_has_every_metric(players, models):
+    board = AwardLeaderboard.from_models(players, models)
+    row = board.player('  player 3 ')
+    assert row['player_name'] == 'Player 3'
+    assert row['assists'] is None
+    features = players.loc[[3], ['dribbles_per_90', 'tackles_per_90']]
+    assert row['goals'] == round(models['goals'].predict(features)[0], 3)
+    with pytest.raises(ValueError):
+        board.player('Nobody')
+    # A close but different name is not silently taken for another player
+    with pytest.raises(ValueError, match="Did you mean: Player"):
+        board.player('Player 3x')
+
+
+def test_load_scores_once_per_file_version(tmp_path, players, models):
+    features_path = tmp_path / 'player_features.csv'
+    players.to_csv(features_path, index=False)
+    paths = {}
+    for metric, model in models.items():
+        paths[metric] = str(tmp_path / f'{metric}.pkl')
+        if model is not None:
+            joblib.dump(model, paths[metric])
+    calls = []
+
+    def get_model(metric):
+        calls.append(metric)
+        return joblib.load(paths[metric])
+
+    first = AwardLeaderboard.load(str(features_path), paths, get_model, cache_dir=tmp_path / 'cache')
+    second = AwardLeaderboard.load(str(features_path), paths, get_model, cache_dir=tmp_path / 'cache')
+    assert sorted(calls) == ['cards', 'goals', 'saves']
+    pd.testing.assert_frame_equal(first.top('goals', 20), second.top('goals', 20))
+
+    joblib.dump(fit(players, ['dribbles_per_90'], 9), paths['goals'])
+    AwardLeaderboard.load(str(features_path), paths, get_model, cache_dir=tmp_path / 'cache')
+    assert len(calls) == 6
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import brier_score_loss, log_loss
+
+from evaluation.backtest import binary_metrics, calibration_table, run_fold, walk_forward_backtest
+
+
+@pytest.fixture
+def matches():
+    rng = np.random.default_rng(0)
+    teams = ['Brazil', 'France', 'Italy', 'Spain', 'Ghana', 'Japan']
+    rows = []
+    for year in [1998, 2002, 2006, 2010]:
+        # Japan only plays from 2006 on
+        pool = teams if year >= 2006 else teams[:-1]
+        for _ in range(12):
+            home, away = rng.choice(pool, 2, replace=False)
+            rows.append({'year': float(year), 'datetime': f'{year}-06-{rng.integers(1, 30):02d}',
+                         'home_team_name': home, 'away_team_name': away,
+                         'home_team_goals': float(rng.poisson(1.5)), 'away_team_goals': float(rng.poisson(1.2))})
+    return pd.DataFrame(rows)
+
+
+def test_metrics_match_sklearn():
+    rng = np.random.default_rng(1)
+    y_true = rng.integers(0, 2, 500)
+    y_prob = rng.random(500)
+    metrics = binary_metrics(y_true, y_prob)
+    assert metrics['log_loss'] == pytest.approx(log_loss(y_true, y_prob))
+    assert metrics['brier'] == pytest.approx(brier_score_loss(y_true, y_prob))
+    assert metrics['accuracy'] == pytest.approx(np.mean((y_prob > 0.5) == y_true))
+
+
+def test_calibration_table():
+    table = calibration_table([0, 1, 1, 0], [0.05, 0.95, 1.0, 0.9], n_bins=2)
+    assert table['count'].tolist() == [1, 3]
+    assert table['observed_rate'].tolist() == pytest.approx([0.0, 2 / 3])
+    assert table['mean_predicted'].tolist() == pytest.approx([0.05, 2.85 / 3])
+
+
+def test_fold_only_uses_earlier_editions(matches):
+    summary, predictions = run_fold(matches, 2006)
+    history = matches[matches['year'] < 2006]
+    assert summary['n_train'] == 2 * len(history)
+    # Japan has no match before 2006, so its 2006 matches cannot be scored
+    assert 'Japan' not in set(predictions['team_a'])
+    japan = ((matches['year'] == 2006) & matches[['home_team_name', 'away_team_name']].eq('Japan').any(axis=1)).sum()
+    assert summary['n_unscored'] == 2 * japan
+
+
+def test_parallel_folds_match_serial(matches):
+    folds, predictions = walk_forward_backtest(matches, n_workers=1)
+    assert folds['year'].tolist() == [2002, 2006, 2010]
+    assert predictions['prob'].between(0, 1).all()
+    parallel_folds, parallel_predictions = walk_forward_backtest(matches, n_workers=2)
+    pd.testing.assert_frame_equal(folds, parallel_folds)
+    pd.testing.assert_frame_equal(predictions, parallel_predictions)
@@ -0,0 +1,40 @@
+import pytest
+
+from benchmarks.suite import BENCHMARKS, compare, load_baselines, run_suite, save_baselines
+from models.registry import registry
+
+
+def test_suite_runs_on_small_tables(tmp_path):
+    original = registry._specs['match_model']
+    results = run_suite(scale=0.05, names=list(BENCHMARKS), repeat=1)
+    assert set(results) == set(BENCHMARKS)
+    assert all(r['seconds'] > 0 and r['per_second'] > 0 for r in results.values())
+    # The synthetic artifacts are only registered while the suite runs
+    assert registry._specs['match_model'] == original
+
+    path = tmp_path / 'baselines.json'
+    save_baselines(results, 0.05, path)
+    assert load_baselines(path)['scales']['0.05']['results'].keys() == results.keys()
+
+
+def test_unknown_benchmark_is_rejected():
+    with pytest.raises(ValueError):
+        run_suite(names=['nope'])
+
+
+def test_slowdowns_beyond_threshold_are_regressions():
+    baselines = {
+        'threshold': 0.25,
+        'thresholds': {'noisy': 1.0},
+        'scales': {'10': {'results': {'fast': {'seconds': 1.0}, 'noisy': {'seconds': 1.0}}}},
+    }
+    results = {'fast': {'seconds': 1.3}, 'noisy': {'seconds': 1.9}, 'new': {'seconds': 5.0}}
+    assert compare(results, baselines, 10) == [('fast', 1.0, 1.3, 0.25)]
+    # An explicit threshold applies to every benchmark
+    assert [r[0] for r in compare(results, baselines, 10, threshold=0.5)] == ['noisy']
+    assert compare(results, baselines, 100) == []
+
+
+@pytest.mark.parametrize('scale', ['1', '10', '100'])
+def test_every_benchmark_has_a_committed_baseline(scale):
+    assert set(load_baselines()['scales'][scale]['results']) == set(BENCHMARKS)
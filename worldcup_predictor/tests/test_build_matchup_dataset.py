@@ -0,0 +1,88 @@
+import pandas as pd
+import pytest
+
+from data.build_matchup_dataset import build_matchup_dataset, feature_cols
+from features.elo import EloRatings
+
+
+def write_inputs(tmp_path):
+    teams = pd.DataFrame({
+        'team': ['Brazil', 'France', 'Italy'],
+        'avg_goals_for': [2.0, 1.5, 1.0],
+        'avg_goals_against': [0.5, 1.0, 0.8],
+        'win_rate': [0.7, 0.5, 0.4],
+        'recent_form': [2.2, 1.2, 1.0],
+    })
+    matches = pd.DataFrame({
+        'home_team_name': ['Brazil', 'France', 'Atlantis', 'Italy'],
+        'away_team_name': ['France', 'Italy', 'Brazil', 'Brazil'],
+        'home_team_goals': [2, 1, 0, 1],
+        'away_team_goals': [1, 1, 3, 0],
+    })
+    teams.to_csv(tmp_path / 'team_features.csv', index=False)
+    matches.to_csv(tmp_path / 'matches.csv', index=False)
+    return teams.set_index('team')
+
+
+def test_both_orientations_for_known_teams(tmp_path):
+    team_stats = write_inputs(tmp_path)
+    out = tmp_path / 'matchup.csv'
+    n_rows = build_matchup_dataset(tmp_path / 'matches.csv', tmp_path / 'team_features.csv', out)
+    df = pd.read_csv(out)
+
+    # The match involving an unknown team is skipped
+    assert n_rows == len(df) == 6
+    assert list(zip(df['team_a'], df['team_b']))[:2] == [('Brazil', 'France'), ('France', 'Brazil')]
+    assert df['label'].tolist() == [1, 0, 0, 0, 1, 0]
+    expected = team_stats.loc['Italy', feature_cols] - team_stats.loc['Brazil', feature_cols]
+    assert df.loc[4, [f'diff_{c}' for c in feature_cols]].tolist() == pytest.approx(expected.tolist())
+
+
+def test_streaming_matches_single_pass(tmp_path):
+    write_inputs(tmp_path)
+    whole, streamed = tmp_path / 'whole.csv', tmp_path / 'streamed.csv'
+    build_matchup_dataset(tmp_path / 'matches.csv', tmp_path / 'team_features.csv', whole)
+    build_matchup_dataset(tmp_path / 'matches.csv', tmp_path / 'team_features.csv', streamed, chunksize=1)
+    assert whole.read_text() == streamed.read_text()
+
+
+def test_ranking_diffs_as_of_match_date(tmp_path):
+    write_inputs(tmp_path)
+    matches = pd.read_csv(tmp_path / 'matches.csv')
+    matches['datetime'] = ['1990-06-10 15:00', '1994-06-20 15:00', '1998-06-12 15:00', '2002-06-03 15:00']
+    matches['home_team_initials'] = ['BRA', 'FRA', 'ATL', 'ITA']
+    matches['away_team_initials'] = ['FRA', 'ITA', 'BRA', 'BRA']
+    matches.to_csv(tmp_path / 'matches.csv', index=False)
+    pd.DataFrame({
+        'country_abrv': ['BRA', 'FRA', 'ITA', 'BRA', 'ITA'],
+        'rank_date': ['1993-08-08', '1993-08-08', '1993-08-08', '2002-05-15', '2002-05-15'],
+        'rank': [8.0, 15.0, 2.0, 2.0, 6.0],
+        'total_points': [50.0, 40.0, 58.0, 60.0, 55.0],
+    }).to_csv(tmp_path / 'rankings.csv', index=False)
+
+    out = tmp_path / 'matchup.csv'
+    build_matchup_dataset(tmp_path / 'matches.csv', tmp_path / 'team_features.csv', out,
+                          chunksize=2, rankings_path=tmp_path / 'rankings.csv')
+    df = pd.read_csv(out)
+    # 1990 predates the first ranking
+    assert df.loc[:1, 'diff_rank'].isna().all()
+    assert df.loc[2:5, 'diff_rank'].tolist() == [13.0, -13.0, 4.0, -4.0]
+    assert df.loc[4:5, 'diff_total_points'].tolist() == [-5.0, 5.0]
+
+
+def test_elo_diffs_use_pre_match_ratings(tmp_path):
+    write_inputs(tmp_path)
+    matches = pd.read_csv(tmp_path / 'matches.csv')
+    matches['datetime'] = ['1990-06-10 15:00', '1990-06-14 15:00', '1990-06-18 15:00', '1990-06-22 15:00']
+    matches.to_csv(tmp_path / 'matches.csv', index=False)
+    ratings = EloRatings.from_matches(matches)
+    ratings.save(tmp_path / 'elo.npz')
+
+    out = tmp_path / 'matchup.csv'
+    build_matchup_dataset(tmp_path / 'matches.csv', tmp_path / 'team_features.csv', out, elo_path=tmp_path / 'elo.npz')
+    df = pd.read_csv(out)
+    # Everyone starts level, so the first match has no rating difference
+    assert df.loc[:1, 'diff_elo'].tolist() == [0.0, 0.0]
+    before_last = EloRatings.from_matches(matches.iloc[:3])
+    expected = before_last.rating('Italy') - before_last.rating('Brazil')
+    assert df.loc[4:5, 'diff_elo'].tolist() == pytest.approx([expected, -expected])
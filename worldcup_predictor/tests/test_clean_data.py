@@ -1 +1,35 @@
-# Placeholder for tests for clean_data.py 
\ No newline at end of file
+import pandas as pd
+
+import data.clean_data as clean_data
+from data.clean_data import clean_all, infer_date_formats, normalize_date_column
+
+
+def test_infers_every_layout_in_a_mixed_column():
+    values = pd.Series(['13 Jul 1930 - 15:00 ', '17 June 1970 - 16:00 ', '05 Jun 2002 - 20:30 '])
+    assert set(infer_date_formats(values)) == {'%d %b %Y - %H:%M', '%d %B %Y - %H:%M'}
+
+
+def test_normalizes_to_iso_and_reports_bad_rows():
+    col = pd.Series(['13 Jul 1930 - 15:00 ', None, '17 June 1970 - 16:00 ', 'TBD', '13 Jul 1930 - 15:00 '])
+    normalized, formats, bad = normalize_date_column(col)
+    assert normalized.tolist() == ['1930-07-13 15:00:00', None, '1970-06-17 16:00:00', 'TBD', '1930-07-13 15:00:00']
+    assert bad.tolist() == [False, False, False, True, False]
+
+
+def test_date_only_columns_stay_date_only():
+    normalized, formats, bad = normalize_date_column(pd.Series(['31/12/1992', '08/08/1993', '13/01/1994']))
+    assert formats == ['%d/%m/%Y']
+    assert normalized.tolist() == ['1992-12-31', '1993-08-08', '1994-01-13']
+    assert not bad.any()
+
+
+def test_clean_all_cleans_each_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(clean_data, 'PROCESSED_DIR', str(tmp_path))
+    pd.DataFrame({'Team Name': ['Brazil', 'Brazil', None], 'Match Date': ['2022-11-24'] * 3}).to_csv(tmp_path / 'a.csv', index=False)
+    pd.DataFrame({'Player': ['Messi'], 'Birth Date': ['24/06/1987']}).to_csv(tmp_path / 'b.csv', index=False)
+
+    assert clean_all(['a.csv', 'b.csv'], n_workers=1) == ['a_cleaned', 'b_cleaned']
+    a = pd.read_csv(tmp_path / 'a_cleaned.csv')
+    assert a.columns.tolist() == ['team_name', 'match_date']
+    assert len(a) == 1
+    assert pd.read_csv(tmp_path / 'b_cleaned.csv')['birth_date'].tolist() == ['1987-06-24']
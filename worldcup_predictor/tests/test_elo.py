@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from features.elo import EloRatings, expected_score, margin_multiplier
+from models.match_predictor import predict_match_elo
+from models.registry import registry
+
+
+def make_results():
+    return pd.DataFrame({
+        'home_team_name': ['Brazil', 'France', 'Brazil', 'Italy', 'France'],
+        'away_team_name': ['France', 'Italy', 'Italy', 'Brazil', 'Brazil'],
+        'home_team_goals': [2.0, 0.0, 4.0, 1.0, np.nan],
+        'away_team_goals': [1.0, 0.0, 1.0, 1.0, np.nan],
+        'datetime': ['1970-06-01 15:00', '1970-06-05 15:00', '1970-06-21 12:00', '1974-06-10 16:00', '1974-06-20 16:00'],
+    })
+
+
+def test_single_match_update():
+    ratings = EloRatings.from_matches(make_results().iloc[:1], k_factor=40)
+    assert ratings.rating('Brazil') == pytest.approx(1520.0)
+    assert ratings.rating('France') == pytest.approx(1480.0)
+    assert ratings.rating('Spain') == 1500.0
+
+
+def test_margin_and_home_advantage():
+    assert margin_multiplier(np.array([0, 1, -2, 3, 5])).tolist() == [1.0, 1.0, 1.5, 1.75, 2.0]
+    matches = make_results().iloc[:1].assign(home_team_goals=1.0, away_team_goals=1.0)
+    # A home draw costs the favoured home side rating
+    ratings = EloRatings.from_matches(matches, home_advantage=100)
+    assert ratings.rating('Brazil') < 1500 < ratings.rating('France')
+    neutral = EloRatings.from_matches(matches.assign(neutral=True), home_advantage=100)
+    assert neutral.rating('Brazil') == neutral.rating('France') == 1500
+    assert expected_score(1600, 1500) == pytest.approx(0.640, abs=1e-3)
+
+
+def test_incremental_updates_match_single_pass(tmp_path):
+    results = make_results()
+    full = EloRatings.from_matches(results)
+    ratings = EloRatings.from_matches(results.iloc[:2])
+    ratings.save(tmp_path / 'elo.npz')
+    ratings = EloRatings.load(tmp_path / 'elo.npz')
+    assert ratings.update(results.iloc[2:]) == {'Brazil', 'Italy'}
+    pd.testing.assert_frame_equal(ratings.ratings(), full.ratings())
+    with pytest.raises(ValueError):
+        ratings.update(results.iloc[:1])
+
+
+def test_ratings_as_of_date():
+    ratings = EloRatings.from_matches(make_results())
+    history = ratings.asof(['Brazil'] * 4 + ['Spain'], pd.to_datetime(
+        ['1960-01-01', '1970-06-01', '1970-06-21', '2000-01-01', '2000-01-01']))
+    after_first = EloRatings.from_matches(make_results().iloc[:1]).rating('Brazil')
+    after_third = EloRatings.from_matches(make_results().iloc[:3]).rating('Brazil')
+    assert history.tolist() == pytest.approx([1500.0, after_first, after_third, ratings.rating('Brazil'), 1500.0])
+    # Pre-match ratings leave out the matches played that day
+    assert ratings.asof(['Brazil'], pd.to_datetime(['1970-06-21']), before=True)[0] == pytest.approx(after_first)
+
+
+@pytest.fixture
+def elo_artifact(tmp_path):
+    path = tmp_path / 'elo.npz'
+    EloRatings.from_matches(make_results().replace({'Italy': 'Germany'})).save(path)
+    original_path = registry.path('elo_ratings')
+    registry.register('elo_ratings', EloRatings.load, str(path), optional=True)
+    yield
+    registry.register('elo_ratings', EloRatings.load, original_path, optional=True)
+
+
+def test_predict_match_elo(artifacts, elo_artifact):
+    result = predict_match_elo('Brazil', 'Spain')
+    assert result['team_b_elo'] == 1500.0
+    assert result['team_a_elo'] > 1500 and result['team_a_expected_score'] > 0.5
@@ -1 +1,105 @@
-# Placeholder for tests for feature_engineering.py 
\ No newline at end of file
+import itertools
+
+import pandas as pd
+import pytest
+
+from data.storage import write_file
+from features.elo import EloRatings, update_elo_ratings
+from features.feature_engineering import (
+    add_strength_columns,
+    compute_team_features,
+    compute_team_state,
+    save_team_state,
+    team_initials,
+    team_state_to_features,
+    update_team_features,
+    update_team_state,
+)
+
+
+def make_matches(n=40, seed=0):
+    teams = ['Brazil', 'France', 'Italy', 'Spain', 'Ghana']
+    fixtures = list(itertools.permutations(teams, 2))
+    goals = pd.Series(range(n)).sample(frac=1, random_state=seed).to_numpy()
+    dates = pd.date_range('2014-06-12 13:00', periods=n, freq='D')
+    return pd.DataFrame({
+        'home_team_name': [fixtures[i % len(fixtures)][0] for i in range(n)],
+        'away_team_name': [fixtures[i % len(fixtures)][1] for i in range(n)],
+        'home_team_goals': (goals % 4).astype(float),
+        'away_team_goals': ((goals * 7) % 3).astype(float),
+        # Both date styles found in WorldCupMatches
+        'datetime': [d.strftime('%d %b %Y - %H:%M ') if i % 2 else d.strftime('%d %B %Y - %H:%M ')
+                     for i, d in enumerate(dates)],
+    })
+
+
+def test_state_reproduces_full_features():
+    matches = make_matches()
+    expected = compute_team_features(matches)
+    pd.testing.assert_frame_equal(team_state_to_features(compute_team_state(matches)), expected,
+                                  check_exact=True, check_dtype=False)
+
+
+@pytest.mark.parametrize('cut', [0, 1, 17, 39])
+def test_incremental_updates_match_full_recompute(cut):
+    matches = make_matches()
+    state = compute_team_state(matches.iloc[:cut]) if cut else {}
+    new = matches.iloc[cut:]
+    # Matches can arrive in small, unordered batches
+    for start in range(0, len(new), 3):
+        affected = update_team_state(state, new.iloc[start:start + 3].iloc[::-1])
+        batch = new.iloc[start:start + 3]
+        assert affected == set(batch['home_team_name']) | set(batch['away_team_name'])
+    pd.testing.assert_frame_equal(team_state_to_features(state), compute_team_features(matches),
+                                  check_exact=True, check_dtype=False)
+
+
+def test_update_team_features_persists_state(tmp_path):
+    matches = make_matches()
+    state_path = tmp_path / 'state.json'
+    features_path = tmp_path / 'team_features.csv'
+    save_team_state(compute_team_state(matches.iloc[:30]), state_path)
+    update_team_features(matches.iloc[30:35], state_path, features_path)
+    update_team_features(matches.iloc[35:], state_path, features_path)
+
+    full_path = tmp_path / 'full.csv'
+    compute_team_features(matches).to_csv(full_path, index=False)
+    assert features_path.read_text() == full_path.read_text()
+
+
+def test_reapplied_matches_are_skipped():
+    matches = make_matches()
+    teams = lambda batch: set(batch['home_team_name']) | set(batch['away_team_name'])
+    state = compute_team_state(matches.iloc[:30])
+    # Overlapping batches only count the matches not seen before
+    assert update_team_state(state, matches.iloc[25:35]) == teams(matches.iloc[30:35])
+    assert update_team_state(state, matches.iloc[30:]) == teams(matches.iloc[35:])
+    assert update_team_state(state, matches) == set()
+    pd.testing.assert_frame_equal(team_state_to_features(state), compute_team_features(matches),
+                                  check_exact=True, check_dtype=False)
+
+
+def test_strength_columns_are_current_and_survive_updates(tmp_path):
+    matches = make_matches()
+    initials = {team: team[:3].upper() for team in ['Brazil', 'France', 'Italy', 'Spain', 'Ghana']}
+    matches['home_team_initials'] = matches['home_team_name'].map(initials)
+    matches['away_team_initials'] = matches['away_team_name'].map(initials)
+    rankings_path = tmp_path / 'rankings.csv'
+    pd.DataFrame({'country_abrv': ['BRA', 'BRA', 'FRA'], 'rank_date': ['2010-01-01', '2020-01-01', '2020-01-01'],
+                  'rank': [3.0, 1.0, 2.0], 'total_points': [900.0, 1000.0, 950.0]}).to_csv(rankings_path, index=False)
+    elo_path = tmp_path / 'elo.npz'
+    EloRatings.from_matches(matches.iloc[:30]).save(elo_path)
+
+    team_df = add_strength_columns(compute_team_features(matches.iloc[:30]), team_initials(matches),
+                                   str(rankings_path), str(elo_path)).set_index('team')
+    assert team_df.loc['Brazil', 'rank'] == 1.0 and team_df.loc['France', 'total_points'] == 950.0
+    assert team_df['rank'].isna().sum() == 3
+    assert team_df.loc['Spain', 'elo'] == EloRatings.load(elo_path).rating('Spain')
+
+    state_path, features_path = tmp_path / 'state.json', tmp_path / 'team_features.csv'
+    save_team_state(compute_team_state(matches.iloc[:30]), state_path)
+    write_file(team_df.reset_index(), str(features_path))
+    update_elo_ratings(matches.iloc[30:], elo_path)
+    updated = update_team_features(matches.iloc[30:], state_path, features_path, elo_path).set_index('team')
+    assert updated.loc['Brazil', 'rank'] == 1.0
+    assert updated.loc['Spain', 'elo'] == EloRatings.from_matches(matches).rating('Spain')
@@ -1 +1,192 @@
-# Placeholder for tests for fetch_data.py 
\ No newline at end of file
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import pandas as pd
+import pytest
+
+import data.clean_data as clean_data
+import data.fetch_data as fetch_data
+from data.fetch_data import IngestionClient, RateLimiter, api_token, append_changed_matches, ingest_matches
+
+
+def make_match(match_id, stage, last_updated='2026-06-01T10:00:00Z', home_goals=None):
+    return {
+        'id': match_id, 'utcDate': '2026-06-11T19:00:00Z', 'status': 'TIMED', 'stage': stage,
+        'lastUpdated': last_updated, 'homeTeam': {'name': f'Home {match_id}'}, 'awayTeam': {'name': f'Away {match_id}'},
+        'score': {'fullTime': {'home': home_goals, 'away': None}},
+    }
+
+
+class StandInAPI:
+    """Local stand-in for the matches endpoint: ETag per stage, 304s, and injectable 503s."""
+
+    def __init__(self):
+        self.matches = {'GROUP_STAGE': [make_match(1, 'GROUP_STAGE'), make_match(2, 'GROUP_STAGE')],
+                        'FINAL': [make_match(3, 'FINAL')]}
+        self.failures = {}
+        self.log = []
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stage = parse_qs(urlparse(self.path).query)['stage'][0]
+                body = json.dumps({'matches': api.matches.get(stage, [])}).encode()
+                etag = f'"{hash(body)}"'
+                api.log.append((stage, self.headers.get('If-None-Match'), self.headers.get('X-Auth-Token')))
+                if api.failures.get(stage, 0) > 0:
+                    api.failures[stage] -= 1
+                    self.send_response(503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                elif self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                else:
+                    self.send_response(200)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/v4'
+
+
+@pytest.fixture
+def api():
+    api = StandInAPI()
+    thread = threading.Thread(target=api.server.serve_forever, daemon=True)
+    thread.start()
+    yield api
+    api.server.shutdown()
+    api.server.server_close()
+
+
+def ingest(api, tmp_path, **options):
+    options = {'rate': 1000, 'period': 1.0, 'backoff': 0.0, 'token': 'secret', 'cache_dir': str(tmp_path / 'cache'),
+               **options}
+    return asyncio.run(ingest_matches(path=str(tmp_path / 'qualifiers_2026.csv'), stages=['GROUP_STAGE', 'FINAL'],
+                                      base_url=api.url, **options))
+
+
+def test_unchanged_data_costs_one_304_per_page(api, tmp_path):
+    assert ingest(api, tmp_path) == 3
+    first = (tmp_path / 'qualifiers_2026.csv').read_text()
+    assert pd.read_csv(tmp_path / 'qualifiers_2026.csv')['id'].tolist() == [1, 2, 3]
+
+    api.log.clear()
+    assert ingest(api, tmp_path) == 0
+    assert len(api.log) == 2 and all(etag is not None and token == 'secret' for _, etag, token in api.log)
+    assert (tmp_path / 'qualifiers_2026.csv').read_text() == first
+
+
+def test_only_changed_matches_are_appended(api, tmp_path):
+    ingest(api, tmp_path)
+    api.matches['GROUP_STAGE'][1] = make_match(2, 'GROUP_STAGE', '2026-06-11T21:00:00Z', home_goals=2)
+    api.matches['FINAL'].append(make_match(4, 'FINAL'))
+    assert ingest(api, tmp_path) == 2
+
+    stored = pd.read_csv(tmp_path / 'qualifiers_2026.csv')
+    assert stored['id'].tolist() == [1, 2, 3, 2, 4]
+    assert stored['score.fullTime.home'].tolist()[3] == 2
+
+
+def test_missing_csv_is_fetched_in_full(api, tmp_path):
+    ingest(api, tmp_path)
+    (tmp_path / 'qualifiers_2026.csv').unlink()
+    api.log.clear()
+    assert ingest(api, tmp_path) == 3
+    assert all(etag is None for _, etag, _ in api.log)
+    assert pd.read_csv(tmp_path / 'qualifiers_2026.csv')['id'].tolist() == [1, 2, 3]
+
+
+def test_cache_is_only_stored_after_the_append(api, tmp_path, monkeypatch):
+    def fail(matches, path):
+        raise OSError("disk full")
+
+    (tmp_path / 'qualifiers_2026.csv').write_text('id,lastUpdated\n')
+    monkeypatch.setattr(fetch_data, 'append_changed_matches', fail)
+    with pytest.raises(OSError):
+        ingest(api, tmp_path)
+    monkeypatch.undo()
+    assert ingest(api, tmp_path) == 3
+
+
+def test_output_files_sharing_a_cache_do_not_share_validators(api, tmp_path):
+    ingest(api, tmp_path)
+    other = tmp_path / 'other'
+    other.mkdir()
+    (other / 'qualifiers_2026.csv').write_text('id,lastUpdated\n')
+    assert ingest(api, other, cache_dir=str(tmp_path / 'cache')) == 3
+
+
+def test_token_is_only_sent_to_the_api(api, tmp_path):
+    async def fetch():
+        async with IngestionClient(base_url=api.url, token='secret', cache_dir=str(tmp_path), rate=1000,
+                                   period=1.0) as client:
+            await client.get_json('/competitions/2000/matches', {'stage': 'FINAL'})
+            await client.get_json(api.url.replace('127.0.0.1', 'localhost') + '/injuries', {'stage': 'FINAL'})
+
+    asyncio.run(fetch())
+    assert [token for _, _, token in api.log] == ['secret', None]
+
+
+def test_api_token_is_required(monkeypatch):
+    monkeypatch.delenv('FOOTBALL_DATA_API_KEY', raising=False)
+    with pytest.raises(ValueError, match='FOOTBALL_DATA_API_KEY'):
+        api_token()
+
+
+def test_transient_errors_are_retried(api, tmp_path):
+    api.failures['FINAL'] = 2
+    assert ingest(api, tmp_path) == 3
+    assert [stage for stage, _, _ in api.log].count('FINAL') == 3
+
+    api.failures['FINAL'] = 5
+    with pytest.raises(httpx.HTTPStatusError):
+        ingest(api, tmp_path, retries=1, cache_dir=str(tmp_path / 'other_cache'))
+
+
+def test_cache_survives_a_new_client(api, tmp_path):
+    async def fetch():
+        async with IngestionClient(base_url=api.url, cache_dir=str(tmp_path), rate=1000, period=1.0) as client:
+            return await client.get_json('/competitions/2000/matches', {'stage': 'FINAL'}), client.stats
+
+    (data, changed), _ = asyncio.run(fetch())
+    (cached, unchanged), stats = asyncio.run(fetch())
+    assert changed and not unchanged
+    assert cached == data and stats == {'requests': 1, 'not_modified': 1, 'retries': 0}
+
+
+def test_rate_limiter_spaces_requests():
+    async def run():
+        limiter = RateLimiter(rate=10, period=0.5)
+        start = time.monotonic()
+        await asyncio.gather(*(limiter.wait() for _ in range(5)))
+        return time.monotonic() - start
+
+    assert 0.19 <= asyncio.run(run()) < 0.5
+
+
+def test_appended_rows_keep_the_file_layout_and_clean_keeps_the_latest(tmp_path, monkeypatch):
+    path = tmp_path / 'qualifiers_2026.csv'
+    pd.DataFrame({'id': [1, 2], 'lastUpdated': ['a', 'a'], 'homeTeam.name': ['X', 'Y']}).to_csv(path, index=False)
+    fetched = pd.DataFrame({'lastUpdated': ['a', 'b'], 'id': [1, 2], 'homeTeam.name': ['X', 'Z'], 'extra': [0, 0]})
+    assert append_changed_matches(fetched, str(path)) == 1
+    assert pd.read_csv(path).values.tolist() == [[1, 'a', 'X'], [2, 'a', 'Y'], [2, 'b', 'Z']]
+
+    monkeypatch.setattr(clean_data, 'PROCESSED_DIR', str(tmp_path))
+    clean_data.clean_csv_file('qualifiers_2026.csv')
+    assert pd.read_csv(tmp_path / 'qualifiers_2026_cleaned.csv')['hometeam.name'].tolist() == ['X', 'Z']
@@ -0,0 +1,112 @@
+import functools
+import json
+import pickle
+
+import numpy as np
+import pytest
+
+from monitoring.instrumentation import Instrumentation, instruments
+from pipeline.runner import Stage, run_pipeline
+
+
+@pytest.fixture
+def recorder():
+    recorder = Instrumentation()
+    recorder.configure()
+    return recorder
+
+
+@pytest.fixture
+def global_instruments():
+    instruments.configure(trace_memory=True)
+    instruments.reset()
+    yield instruments
+    instruments.configure(enabled=False)
+    instruments.reset()
+
+
+def test_disabled_recorder_records_nothing():
+    recorder = Instrumentation()
+    with recorder.span('stage:x') as span:
+        recorder.add_rows(rows_in=10)
+    assert span is None
+    assert recorder.report() == {}
+
+
+def test_rows_count_towards_enclosing_spans(recorder):
+    @recorder.instrumented('predict', rows_in=len, rows_out=len)
+    def predict(rows):
+        return rows[:2]
+
+    with recorder.span('stage:outer') as span:
+        recorder.add_rows(rows_in=100)
+        predict([1, 2, 3])
+        predict([4, 5, 6])
+        span.add_rows(rows_out=7)
+
+    report = recorder.report()
+    assert report['predict']['calls'] == 2
+    assert (report['predict']['rows_in'], report['predict']['rows_out']) == (6, 4)
+    assert (report['stage:outer']['rows_in'], report['stage:outer']['rows_out']) == (106, 11)
+    assert report['stage:outer']['total_seconds'] >= report['predict']['total_seconds']
+
+
+def test_failed_calls_are_counted(recorder):
+    with pytest.raises(KeyError):
+        with recorder.span('load:model'):
+            raise KeyError('model')
+    assert recorder.report()['load:model']['errors'] == 1
+
+
+def test_peak_memory_covers_nested_spans():
+    recorder = Instrumentation()
+    recorder.configure(trace_memory=True)
+    with recorder.span('outer'):
+        with recorder.span('inner'):
+            block = np.ones(2_000_000)
+            del block
+    recorder.configure(enabled=False)
+    report = recorder.report()
+    assert report['inner']['peak_memory_bytes'] >= 16_000_000
+    assert report['outer']['peak_memory_bytes'] >= report['inner']['peak_memory_bytes']
+
+
+def test_profiles_survive_export_and_merge():
+    worker = Instrumentation()
+    worker.configure(profile=['stage:sort'])
+    with worker.span('stage:sort'):
+        sorted(np.random.default_rng(0).random(10_000).tolist())
+
+    parent = Instrumentation()
+    parent.merge(pickle.loads(pickle.dumps(worker.export())))
+    parent.merge(pickle.loads(pickle.dumps(worker.export())))
+    record = parent.report()['stage:sort']
+    assert record['calls'] == 2
+    assert any('sorted' in row['function'] for row in record['profile'])
+
+
+def test_reports(recorder, tmp_path):
+    with recorder.span('stage:clean "raw"') as span:
+        span.add_rows(rows_in=3, rows_out=2)
+
+    text = recorder.to_prometheus()
+    assert '# TYPE worldcup_span_calls_total counter' in text
+    assert 'worldcup_span_rows_in_total{span="stage:clean \\"raw\\""} 3' in text
+    assert 'peak_memory_bytes' not in text
+
+    recorder.write_report(str(tmp_path / 'run.json'))
+    spans = json.loads((tmp_path / 'run.json').read_text())['spans']
+    assert spans['stage:clean "raw"']['rows_out'] == 2
+
+
+def write_file(path, text):
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_pipeline_stages_are_recorded(global_instruments, tmp_path, n_workers):
+    out = str(tmp_path / 'out.txt')
+    stages = [Stage('write', functools.partial(write_file, out, 'x'), [], [out])]
+    run_pipeline(stages, tmp_path / 'state.json', n_workers=n_workers)
+    assert global_instruments.report()['stage:write']['calls'] == 1
@@ -0,0 +1,89 @@
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import synthetic_lineups
+from features.match_events import (
+    build_event_features,
+    parse_event_tokens,
+    parse_events,
+    player_match_features,
+    whole_match_chunks,
+)
+
+
+def make_lineups():
+    rows = [
+        # matchid, team, line-up, shirt, player, event
+        (1, 'FRA', 'S', 9, 'Just FONTAINE', "G10' G67' O80'"),
+        (1, 'FRA', 'N', 14, 'Jean VINCENT', "I80' Y85'"),
+        (1, 'FRA', 'N', 15, 'Roger MARCHE', None),
+        (1, 'PAR', 'S', 1, 'Samuel AGUILAR', "R30'"),
+        (1, 'PAR', 'S', 5, 'Jorge LINO', "W44' P90+3'"),
+        (2, 'FRG', 'S', 10, 'Helmut RAHN', "G84' G105'"),
+        (2, 'FRG', 'N', 11, 'Hans SCHAEFER', "IH46'"),
+        (2, 'HUN', 'S', 9, 'Ferenc PUSKAS', "MP20' Y60' RSY75'"),
+    ]
+    return pd.DataFrame(rows, columns=['matchid', 'team_initials', 'line-up', 'shirt_number', 'player_name', 'event'])
+
+
+def test_tokens_are_split_into_events():
+    tokens = parse_event_tokens(pd.Series(["G43' G87'", None, "Y90+2' X", "OG12'"], index=[10, 11, 12, 13]))
+    assert tokens.index.tolist() == [0, 0, 2, 3]
+    assert tokens['event'].tolist() == ['goal', 'goal', 'yellow_card', 'own_goal']
+    assert tokens['minute'].tolist() == [43, 87, 90, 12]
+    assert tokens['added'].tolist() == [0, 0, 2, 0]
+
+
+def test_event_table_keeps_player_keys():
+    events = parse_events(make_lineups())
+    assert len(events) == 14
+    fontaine = events[events['player_name'] == 'Just FONTAINE']
+    assert fontaine['event'].tolist() == ['goal', 'goal', 'sub_out']
+    assert set(fontaine['matchid']) == {1} and set(fontaine['shirt_number']) == {9}
+
+
+def test_minutes_and_counts_per_player():
+    features = player_match_features(make_lineups()).set_index('player_name')
+    assert features.loc['Just FONTAINE', ['goals', 'late_goals', 'minutes']].tolist() == [2, 0, 80]
+    assert features.loc['Jean VINCENT', ['played', 'started', 'minutes', 'yellow_cards']].tolist() == [1, 0, 10, 1]
+    assert features.loc['Roger MARCHE', ['played', 'minutes']].tolist() == [0, 0]
+    assert features.loc['Samuel AGUILAR', ['red_cards', 'minutes']].tolist() == [1, 30]
+    assert features.loc['Jorge LINO', ['goals', 'penalty_goals', 'own_goals', 'late_goals']].tolist() == [1, 1, 1, 1]
+    # Match 2 has a goal in minute 105, so it went to extra time
+    assert features.loc['Helmut RAHN', 'minutes'] == 120
+    assert features.loc['Hans SCHAEFER', 'minutes'] == 74
+    assert features.loc['Ferenc PUSKAS', ['missed_penalties', 'yellow_cards', 'red_cards', 'minutes']].tolist() == [1, 1, 1, 75]
+
+
+@pytest.mark.parametrize('chunksize', [1, 3, 1000])
+def test_chunks_never_split_a_match(chunksize):
+    lineups = make_lineups()
+    chunks = list(whole_match_chunks(lineups.iloc[i:i + chunksize] for i in range(0, len(lineups), chunksize)))
+    assert [chunk['matchid'].unique().tolist() for chunk in chunks] == [[1], [2]]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), lineups)
+
+
+def test_aggregates_do_not_depend_on_chunk_size(tmp_path):
+    lineups = synthetic_lineups(44 * 30)
+    matches = pd.DataFrame({
+        'matchid': range(30), 'year': [1930 + 4 * (i // 10) for i in range(30)],
+        'home_team_name': 'Alpha', 'away_team_name': 'Beta', 'home_team_initials': 'AAA', 'away_team_initials': 'BBB',
+    })
+    lineups.to_csv(tmp_path / 'WorldCupPlayers_cleaned.csv', index=False)
+    matches.to_csv(tmp_path / 'WorldCupMatches_cleaned.csv', index=False)
+
+    def build(chunksize):
+        return build_event_features(
+            str(tmp_path / 'WorldCupPlayers_cleaned.csv'), str(tmp_path / 'WorldCupMatches_cleaned.csv'),
+            str(tmp_path / 'match_events.csv'), str(tmp_path / 'player_event_features.csv'),
+            str(tmp_path / 'team_event_features.csv'), chunksize=chunksize)
+
+    players, teams = build(len(lineups))
+    streamed_players, streamed_teams = build(100)
+    pd.testing.assert_frame_equal(streamed_players, players)
+    pd.testing.assert_frame_equal(streamed_teams, teams)
+    assert set(teams['team']) == {'Alpha', 'Beta'}
+    assert teams['n_matches'].tolist() == [30, 30]
+    assert players['goals'].sum() == teams['goals_per_match'].sum() * 30
+    assert (players['first_year'] >= 1930).all() and (players['last_year'] <= 1938).all()
+    assert len(pd.read_csv(tmp_path / 'match_events.csv')) == len(parse_events(lineups))
@@ -1,46 +1,89 @@
-import joblib
 import pandas as pd
 import numpy as np
-import os
+import pytest
 
-MODEL_PATH = os.path.join(os.path.dirname(__file__), '../models/match_model.pkl')
-TEAM_FEATURES_PATH = os.path.join(os.path.dirname(__file__), '../data/processed/team_features.csv')
+from models import match_predictor
+from models.probability_matrix import win_probs
+from models.team_index import FEATURE_COLUMNS, TeamIndex
 
-model = joblib.load(MODEL_PATH)
-team_features = pd.read_csv(TEAM_FEATURES_PATH)
+feature_cols = FEATURE_COLUMNS
 
-feature_cols = ['avg_goals_for', 'avg_goals_against', 'win_rate', 'recent_form']
 
-def get_team_features(team_name):
-    row = team_features[team_features['team'].str.lower() == team_name.lower()]
-    if row.empty:
-        raise ValueError(f"Team '{team_name}' not found in team features.")
-    return row[feature_cols].values[0]
-
-def symmetric_win_probability(team_a, team_b):
-    features_a = get_team_features(team_a)
-    features_b = get_team_features(team_b)
-    input_ab = features_a - features_b
-    input_ba = features_b - features_a
-    prob_ab = model.predict_proba(input_ab.reshape(1, -1))[0][1]
-    prob_ba = model.predict_proba(input_ba.reshape(1, -1))[0][1]
+def symmetric_win_probability(model, index, team_a, team_b):
+    features_a = index.row(team_a)
+    features_b = index.row(team_b)
+    prob_ab, prob_ba = win_probs(model, np.vstack([features_a - features_b, features_b - features_a]))
     prob_team_a_win = (prob_ab + (1 - prob_ba)) / 2
-    prob_team_b_win = 1 - prob_team_a_win
-    return prob_team_a_win, prob_team_b_win
-
-if __name__ == "__main__":
-    pairs = [
-        ("Argentina", "France"),
-        ("Brazil", "Germany"),
-        ("England", "Spain"),
-    ]
-    for team_a, team_b in pairs:
-        try:
-            prob_a, prob_b = symmetric_win_probability(team_a, team_b)
-            print(f"{team_a} vs {team_b}: {team_a} win probability: {prob_a:.2%}, {team_b} win probability: {prob_b:.2%}")
-            # Test order invariance
-            prob_b_rev, prob_a_rev = symmetric_win_probability(team_b, team_a)
-            print(f"{team_b} vs {team_a}: {team_b} win probability: {prob_b_rev:.2%}, {team_a} win probability: {prob_a_rev:.2%}")
-            assert np.isclose(prob_a, prob_a_rev, atol=1e-2), "Order invariance failed!"
-        except Exception as e:
-            print(f"Error for {team_a} vs {team_b}: {e}") 
\ No newline at end of file
+    return prob_team_a_win, 1 - prob_team_a_win
+
+
+def test_index_lookup_is_case_insensitive(team_features):
+    index = TeamIndex.from_frame(team_features)
+    assert index.team_id('argentina') == index.team_id('ARGENTINA ') == 0
+    assert np.array_equal(index.row('Spain'), team_features.loc[5, feature_cols].to_numpy(dtype=float))
+    assert index.features.flags['C_CONTIGUOUS']
+    with pytest.raises(ValueError):
+        index.team_id('Atlantis')
+
+
+def test_index_resolves_aliases():
+    index = TeamIndex(['USA', 'Korea Republic', 'Iran', 'IR Iran', 'Germany', 'Germany FR'])
+    assert index.canonical_name('United States') == 'USA'
+    assert index.canonical_name('south korea') == 'Korea Republic'
+    assert index.canonical_name('West Germany') == 'Germany FR'
+    # A real team name is never shadowed by an alias
+    assert index.canonical_name('Iran') == 'Iran'
+
+
+def test_prediction_lookups_never_guess():
+    index = TeamIndex(['Brazil', 'Netherlands', 'Nigeria', 'German DR', 'Germany', 'Korea Republic', 'Korea DPR'])
+    for name in ['Brasil', 'Niger', 'Germany DR', 'Korea']:
+        assert name not in index
+        with pytest.raises(ValueError, match='Did you mean'):
+            index.team_id(name)
+    assert 'brazil' in index and index.canonical_name('east germany') == 'German DR'
+
+
+def test_resolve_matches_misspelt_teams():
+    index = TeamIndex(['Brazil', 'Netherlands', 'Poland', 'USA'])
+    assert index.resolve('Brasil') == 'Brazil'
+    assert index.resolve('Holand') == 'Netherlands'
+    assert index.resolve('Atlantis') is None
+
+
+@pytest.mark.parametrize('team_a, team_b', [("Argentina", "France"), ("Brazil", "Germany"), ("England", "Spain")])
+def test_order_invariance(model, team_features, team_a, team_b):
+    index = TeamIndex.from_frame(team_features)
+    prob_a, prob_b = symmetric_win_probability(model, index, team_a, team_b)
+    prob_b_rev, prob_a_rev = symmetric_win_probability(model, index, team_b, team_a)
+    assert np.isclose(prob_a, prob_a_rev, atol=1e-2), "Order invariance failed!"
+    assert np.isclose(prob_a + prob_b, 1)
+
+
+def test_import_does_not_load_artifacts():
+    assert 'match_model' not in vars(match_predictor)
+    assert 'team_features_df' not in vars(match_predictor)
+
+
+def test_predict_matches_agrees_with_single_predictions(artifacts):
+    pairs = [('Argentina', 'France'), ('spain', 'BRAZIL'), ('England', 'Germany')] * 50
+    batch = match_predictor.predict_matches(pairs)
+    assert len(batch) == len(pairs)
+    for (team_a, team_b), prob in zip(pairs[:3], batch['team_a_win_prob']):
+        single = match_predictor.predict_match(team_a, team_b)
+        assert single['team_a_win_prob'] == round(prob, 3)
+    assert np.allclose(batch['team_a_win_prob'] + batch['team_b_win_prob'], 1)
+    assert match_predictor.team_features_df['team'].tolist()[0] == 'Argentina'
+
+
+def test_models_the_engine_cannot_compile_are_scored_by_sklearn(artifacts, model):
+    from sklearn.linear_model import LogisticRegression
+    from models.registry import registry
+
+    X = pd.DataFrame(np.random.default_rng(0).normal(size=(200, 4)), columns=model.feature_names_in_)
+    linear = LogisticRegression().fit(X, X.iloc[:, 2] > 0)
+    registry.register('match_model', lambda: linear)
+    assert registry.get('match_engine') is None
+    prob = match_predictor.predict_match('Argentina', 'France')['team_a_win_prob']
+    index = registry.get('team_index')
+    assert prob == round(win_probs(linear, (index.row('Argentina') - index.row('France'))[None, :])[0], 3)
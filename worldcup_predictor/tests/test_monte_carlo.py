@@ -0,0 +1,197 @@
+import numpy as np
+import pytest
+
+from simulation.monte_carlo import (
+    MAX_MARGIN,
+    TournamentForecast,
+    bracket_order,
+    build_outcome_table,
+    monte_carlo_tournament,
+    seed_bracket,
+    simulate_group_matrix,
+    simulate_group_stage,
+    simulate_knockout_stage,
+    stage_names,
+    tournament_layout,
+    tournament_win_probabilities,
+)
+
+
+def strength_probs(teams, draw=0.2):
+    # Stronger teams (lower index) win with a logistic edge
+    strength = -np.arange(len(teams), dtype=float)
+    p = 1 / (1 + np.exp(-(strength[:, None] - strength[None, :])))
+    return np.stack([p * (1 - draw), np.full_like(p, draw), (1 - p) * (1 - draw)], axis=-1)
+
+
+def dominant_probs(teams):
+    # Lower index always beats higher index
+    n = len(teams)
+    i, j = np.indices((n, n))
+    probs = np.zeros((n, n, 3))
+    probs[..., 0] = i < j
+    probs[..., 2] = i > j
+    probs[..., 1] = i == j
+    return probs
+
+
+def test_bracket_order_keeps_top_seeds_apart():
+    order = bracket_order(8)
+    assert sorted(order) == list(range(8))
+    # Seeds 1 and 2 sit in different halves
+    assert (0 in order[:4]) != (1 in order[:4])
+    assert list(order[:2]) == [0, 7]
+
+
+def test_layout_for_48_team_format():
+    groups = {chr(65 + g): [f'T{4 * g + k}' for k in range(4)] for g in range(12)}
+    teams, group_ids, bracket_size, n_best_thirds = tournament_layout(groups)
+    assert len(teams) == 48
+    assert group_ids.shape == (12, 4)
+    assert bracket_size == 32
+    assert n_best_thirds == 8
+    assert stage_names(bracket_size) == ['advance', 'round_of_16', 'quarterfinal', 'semifinal', 'final', 'winner']
+
+
+def test_no_first_round_pair_from_one_group():
+    groups = {chr(65 + g): [f'T{4 * g + k}' for k in range(4)] for g in range(12)}
+    teams, group_ids, bracket_size, n_best_thirds = tournament_layout(groups)
+    finish, key = simulate_group_matrix(group_ids, build_outcome_table(teams, strength_probs(teams)), 2000,
+                                        np.random.default_rng(0))
+    seeds = seed_bracket(group_ids, finish, key, n_best_thirds)
+    assert (np.sort(seeds[:, :12], axis=1) == np.sort(finish[:, :, 0], axis=1)).all()
+    pairs = seeds[:, bracket_order(bracket_size)].reshape(2000, -1, 2) // 4
+    assert (pairs[..., 0] != pairs[..., 1]).all()
+
+
+def test_seeding_does_not_depend_on_group_letters():
+    groups = {chr(65 + g): [f'T{4 * g + k}' for k in range(4)] for g in range(12)}
+    teams, group_ids, _, n_best_thirds = tournament_layout(groups)
+    finish, key = simulate_group_matrix(group_ids, build_outcome_table(teams, strength_probs(teams)), 500,
+                                        np.random.default_rng(1))
+    order = np.random.default_rng(2).permutation(12)
+    seeds = seed_bracket(group_ids, finish, key, n_best_thirds)
+    relettered = seed_bracket(group_ids[order], finish[:, order], key[:, order], n_best_thirds)
+    assert (seeds == relettered).all()
+
+
+def test_uneven_groups_rejected():
+    with pytest.raises(ValueError):
+        tournament_layout({'A': ['a', 'b', 'c', 'd'], 'B': ['e', 'f', 'g']})
+
+
+def test_stage_probabilities_are_consistent():
+    groups = {chr(65 + g): [f'T{4 * g + k}' for k in range(4)] for g in range(12)}
+    teams, _, _, _ = tournament_layout(groups)
+    results = monte_carlo_tournament(groups, strength_probs(teams), n_simulations=5000,
+                                     seed=1, chunk_size=1500)
+    totals = results.sum()
+    assert totals.to_dict() == pytest.approx({'advance': 32, 'round_of_16': 16, 'quarterfinal': 8,
+                                              'semifinal': 4, 'final': 2, 'winner': 1})
+    # Reaching a later stage is never more likely than reaching an earlier one
+    assert (results.diff(axis=1).iloc[:, 1:] <= 1e-12).all().all()
+    assert results.index[0] == 'T0'
+
+
+def test_dominant_team_always_wins():
+    groups = {'A': ['a', 'b', 'c', 'd'], 'B': ['e', 'f', 'g', 'h']}
+    teams, _, _, _ = tournament_layout(groups)
+    results = monte_carlo_tournament(groups, dominant_probs(teams), n_simulations=200, seed=0)
+    assert results.loc['a', 'winner'] == 1.0
+    # Runner-up of A beats the winner of B in the other semifinal
+    assert results.loc['b', 'final'] == 1.0
+    assert results.loc[['c', 'd', 'g', 'h'], 'advance'].sum() == 0
+
+
+def test_single_tournament_helpers():
+    groups = {'A': ['a', 'b', 'c', 'd']}
+    standings = simulate_group_stage(groups, dominant_probs(['a', 'b', 'c', 'd']), rng=np.random.default_rng(0))
+    assert standings == {'A': ['a', 'b', 'c', 'd']}
+    match_probs = {('x', 'y'): {'home_win': 1.0, 'draw': 0.0, 'away_win': 0.0}}
+    assert simulate_knockout_stage(['x', 'y'], match_probs, rng=np.random.default_rng(0)) == 'x'
+
+
+def test_goals_scored_breaks_ties_on_points_and_goal_difference():
+    # a, b and c all have 3 points; a and c both have +1 goal difference, a scored more
+    table = np.zeros((3, 3, 2 * MAX_MARGIN + 1))
+    for home, away, margin in [(0, 1, 3), (2, 0, 2), (1, 2, 1)]:
+        table[home, away, MAX_MARGIN + margin] = 1
+        table[away, home, MAX_MARGIN - margin] = 1
+    for seed in range(20):
+        standings = simulate_group_stage({'A': ['a', 'b', 'c']}, table, rng=np.random.default_rng(seed))
+        assert standings == {'A': ['a', 'c', 'b']}
+
+
+def test_knockout_accepts_any_number_of_teams():
+    teams = ['a', 'b', 'c', 'd', 'e']
+    assert simulate_knockout_stage(teams, dominant_probs(teams), rng=np.random.default_rng(0)) == 'a'
+    assert simulate_knockout_stage(['solo'], {}) == 'solo'
+    with pytest.raises(ValueError):
+        simulate_knockout_stage([], {})
+
+
+def test_seed_sequence_argument_is_not_consumed():
+    groups = {chr(65 + g): [f'T{4 * g + k}' for k in range(4)] for g in range(2)}
+    teams, _, _, _ = tournament_layout(groups)
+    seed = np.random.SeedSequence(3)
+    first = monte_carlo_tournament(groups, strength_probs(teams), n_simulations=500, seed=seed)
+    again = monte_carlo_tournament(groups, strength_probs(teams), n_simulations=500, seed=seed)
+    assert first.equals(again)
+    wins = tournament_win_probabilities(groups, strength_probs(teams), n_simulations=500, seed=3)
+    assert wins == first['winner'].to_dict()
+
+
+def test_dict_probs_fill_reverse_orientation():
+    match_probs = {('a', 'b'): {'home_win': 0.6, 'draw': 0.3, 'away_win': 0.1}}
+    table = build_outcome_table(['a', 'b'], match_probs)
+    centre = table.shape[-1] // 2
+    assert table[1, 0, :centre].sum() == pytest.approx(0.6)
+    assert table[1, 0, centre] == pytest.approx(0.3)
+    assert table.sum(axis=-1) == pytest.approx(np.ones((2, 2)))
+
+
+def test_seeded_runs_are_reproducible():
+    groups = {chr(65 + g): [f'T{4 * g + k}' for k in range(4)] for g in range(4)}
+    teams, _, _, _ = tournament_layout(groups)
+    probs = strength_probs(teams)
+    first = monte_carlo_tournament(groups, probs, n_simulations=3000, seed=7, chunk_size=1000)
+    again = monte_carlo_tournament(groups, probs, n_simulations=3000, seed=7, chunk_size=1000)
+    other = monte_carlo_tournament(groups, probs, n_simulations=3000, seed=8, chunk_size=1000)
+    assert first.equals(again)
+    assert not first.equals(other)
+
+
+def test_parallel_runs_are_reproducible():
+    groups = {chr(65 + g): [f'T{4 * g + k}' for k in range(4)] for g in range(4)}
+    teams, _, _, _ = tournament_layout(groups)
+    probs = strength_probs(teams)
+    first = monte_carlo_tournament(groups, probs, n_simulations=3001, seed=11, n_workers=2)
+    again = monte_carlo_tournament(groups, probs, n_simulations=3001, seed=11, n_workers=2)
+    assert first.equals(again)
+    assert first.sum().to_dict() == pytest.approx({'advance': 8, 'semifinal': 4, 'final': 2, 'winner': 1})
+
+
+def test_forecast_extension_reuses_chunks():
+    groups = {chr(65 + g): [f'T{4 * g + k}' for k in range(4)] for g in range(8)}
+    teams, _, _, _ = tournament_layout(groups)
+    probs = strength_probs(teams)
+
+    straight = TournamentForecast(groups, probs, seed=5, chunk_size=1000)
+    assert list(straight.extend(2500)) == [1000, 2000, 2500]
+
+    stepped = TournamentForecast(groups, probs, seed=5, chunk_size=1000)
+    for total in stepped.extend(2500):
+        if total == 1000:
+            break  # cancelled after the first chunk
+    first_chunk = stepped.chunks[0][1].copy()
+    assert stepped.n_simulations == 1000
+    list(stepped.extend(1500))
+    list(stepped.extend(2500))
+    assert np.array_equal(stepped.chunks[0][1], first_chunk)
+    assert np.array_equal(stepped.counts(), straight.counts())
+
+    results = stepped.results()
+    assert np.allclose(results['advance'].sum(), 16)
+    margin = stepped.margin_of_error()
+    assert margin.shape == results.shape
+    assert (margin.to_numpy() >= 0).all() and margin['winner'].max() < 0.05
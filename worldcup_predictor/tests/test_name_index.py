@@ -0,0 +1,52 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from models.name_index import NameIndex, fuzzy_merge
+
+
+def test_exact_forms_and_aliases():
+    index = NameIndex(['Aaron Connolly', 'Lionel MESSI', 'Germany FR'], aliases={'West Germany': 'Germany FR'})
+    assert index.resolve('aaronconnolly') == 0
+    assert index.resolve('  lionel messi ') == 1
+    assert index.resolve('west germany') == 2
+    # Misspelt aliases are matched through the n-gram index as well
+    assert index.resolve('west germnay') == 2
+
+
+def test_candidates_are_ranked():
+    index = NameIndex(['Thomas MULLER', 'Gerd MULLER', 'Thomas HAESSLER', 'Toni KROOS'])
+    candidates = index.candidates('Muller Thomas', k=3)
+    assert [name for name, _, _ in candidates][:1] == ['Thomas MULLER']
+    assert candidates[0][2] == 1.0
+    assert [score for _, _, score in candidates] == sorted((score for _, _, score in candidates), reverse=True)
+    assert index.resolve('Thomas Mueller') == 0
+    assert index.resolve('Zinedine Zidane') is None
+
+
+def test_ties_are_not_resolved():
+    index = NameIndex(['Mario SOSA', 'Mario SOTO'])
+    assert index.resolve('Mario SO') is None
+
+
+def test_queries_are_fast_on_large_indexes():
+    rng = np.random.default_rng(0)
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+    names = [' '.join(''.join(rng.choice(letters, rng.integers(4, 9))) for _ in range(2)) for _ in range(30_000)]
+    index = NameIndex(names)
+    query = names[1234][:-1] + 'x'
+    started = time.perf_counter()
+    for _ in range(100):
+        best = index.candidates(query, k=5)
+    assert (time.perf_counter() - started) / 100 < 0.02
+    assert best[0][1] == 1234
+
+
+def test_fuzzy_merge_joins_differently_spelt_names():
+    stats = pd.DataFrame({'player_name': ['Aaron Connolly', 'Kylian Mbappé', 'Nobody Known'], 'goals': [1, 8, 0]})
+    injuries = pd.DataFrame({'p_id2': ['aaronconnolly', 'kylianmbappe'], 'days_injured': [161, 20]})
+    merged = fuzzy_merge(stats, injuries, 'player_name', 'p_id2')
+    assert merged['p_id2'].tolist()[:2] == ['aaronconnolly', 'kylianmbappe']
+    assert merged['days_injured'].tolist()[:2] == [161, 20]
+    assert pd.isna(merged.loc[2, 'days_injured'])
@@ -0,0 +1,112 @@
+import functools
+import os
+
+import pytest
+
+from pipeline.runner import SRC_DIR, Stage, default_stages, run_pipeline, stage_dependencies
+
+
+def copy_upper(src, dst, log):
+    with open(src) as f:
+        text = f.read()
+    with open(dst, 'w') as f:
+        f.write(text.upper())
+    with open(log, 'a') as f:
+        f.write(f"{dst}\n")
+
+
+def concat(srcs, dst, log):
+    parts = []
+    for src in srcs:
+        with open(src) as f:
+            parts.append(f.read())
+    with open(dst, 'w') as f:
+        f.write('|'.join(parts))
+    with open(log, 'a') as f:
+        f.write(f"{dst}\n")
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    (tmp_path / 'a.txt').write_text('a')
+    (tmp_path / 'b.txt').write_text('b')
+    log = tmp_path / 'log.txt'
+    p = {name: str(tmp_path / name) for name in ['a.txt', 'b.txt', 'A.txt', 'B.txt', 'AB.txt']}
+    stages = [
+        Stage('join', functools.partial(concat, [p['A.txt'], p['B.txt']], p['AB.txt'], log), [p['A.txt'], p['B.txt']], [p['AB.txt']]),
+        Stage('upper_a', functools.partial(copy_upper, p['a.txt'], p['A.txt'], log), [p['a.txt']], [p['A.txt']]),
+        Stage('upper_b', functools.partial(copy_upper, p['b.txt'], p['B.txt'], log), [p['b.txt']], [p['B.txt']]),
+    ]
+    return tmp_path, stages, log
+
+
+def test_dependencies_follow_paths(pipeline):
+    _, stages, _ = pipeline
+    assert stage_dependencies(stages) == {'join': {'upper_a', 'upper_b'}, 'upper_a': set(), 'upper_b': set()}
+
+
+def test_only_changed_stages_rerun(pipeline):
+    tmp_path, stages, log = pipeline
+    state = tmp_path / 'state.json'
+    assert set(run_pipeline(stages, state).values()) == {'ran'}
+    assert (tmp_path / 'AB.txt').read_text() == 'A|B'
+
+    assert set(run_pipeline(stages, state).values()) == {'skipped'}
+
+    (tmp_path / 'b.txt').write_text('bb')
+    status = run_pipeline(stages, state)
+    assert status == {'upper_a': 'skipped', 'upper_b': 'ran', 'join': 'ran'}
+    assert (tmp_path / 'AB.txt').read_text() == 'A|BB'
+
+    # Rewriting an input with the same content is not a change
+    (tmp_path / 'a.txt').write_text('a')
+    assert set(run_pipeline(stages, state).values()) == {'skipped'}
+    assert len(log.read_text().splitlines()) == 5
+
+
+def test_tampered_output_is_rebuilt(pipeline):
+    tmp_path, stages, _ = pipeline
+    state = tmp_path / 'state.json'
+    run_pipeline(stages, state)
+    (tmp_path / 'AB.txt').write_text('edited')
+    assert run_pipeline(stages, state)['join'] == 'ran'
+    assert (tmp_path / 'AB.txt').read_text() == 'A|B'
+
+
+def test_independent_stages_in_worker_processes(pipeline):
+    tmp_path, stages, _ = pipeline
+    status = run_pipeline(stages, tmp_path / 'state.json', n_workers=2)
+    assert set(status.values()) == {'ran'}
+    assert (tmp_path / 'AB.txt').read_text() == 'A|B'
+
+
+def test_cycles_are_rejected(tmp_path):
+    a, b = str(tmp_path / 'a'), str(tmp_path / 'b')
+    with pytest.raises(ValueError, match='cycle'):
+        stage_dependencies([Stage('x', print, [a], [b]), Stage('y', print, [b], [a])])
+
+
+def test_code_dependencies_are_fingerprinted(pipeline):
+    tmp_path, stages, _ = pipeline
+    state = tmp_path / 'state.json'
+    helper = tmp_path / 'helper.py'
+    helper.write_text('SCALE = 1\n')
+    stages[0].code = [str(helper)]
+    run_pipeline(stages, state)
+    helper.write_text('SCALE = 2\n')
+    assert run_pipeline(stages, state) == {'upper_a': 'skipped', 'upper_b': 'skipped', 'join': 'ran'}
+
+    # Modules a stage imports from src/ count as its code
+    matchup = next(stage for stage in default_stages() if stage.name == 'matchup')
+    sources = [os.path.relpath(path, SRC_DIR) for path in matchup.source_files()]
+    assert {'data/build_matchup_dataset.py', 'data/storage.py', 'features/elo.py', 'features/rankings.py'} <= set(sources)
+
+
+def test_missing_optional_output_does_not_rerun(pipeline):
+    tmp_path, stages, _ = pipeline
+    state = tmp_path / 'state.json'
+    stages[0].optional_outputs = [str(tmp_path / 'never_written.txt')]
+    run_pipeline(stages, state)
+    assert set(run_pipeline(stages, state).values()) == {'skipped'}
+    (tmp_path / 'never_written.txt').write_text('stray')
+    assert run_pipeline(stages, state)['join'] == 'ran'
@@ -0,0 +1,80 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from models.probability_matrix import FEATURE_COLUMNS, ProbabilityMatrix, cache_key
+
+
+@pytest.fixture
+def artifacts(tmp_path):
+    rng = np.random.default_rng(0)
+    teams = pd.DataFrame(rng.random((6, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+    teams.insert(0, 'team', ['Brazil', 'France', 'Germany', 'Italy', 'Spain', 'USA'])
+    features_path = tmp_path / 'team_features.csv'
+    teams.to_csv(features_path, index=False)
+
+    X = pd.DataFrame(rng.normal(size=(200, 4)), columns=[f'diff_{c}' for c in FEATURE_COLUMNS])
+    y = (X['diff_win_rate'] + 0.3 * rng.normal(size=200) > 0).astype(int)
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    model_path = tmp_path / 'match_model.pkl'
+    joblib.dump(model, model_path)
+    return model, teams, str(model_path), str(features_path), str(tmp_path / 'cache')
+
+
+def test_matches_pairwise_symmetrized_predictions(artifacts):
+    model, teams, _, _, _ = artifacts
+    matrix = ProbabilityMatrix.from_model(model, teams)
+    features = teams.set_index('team')[FEATURE_COLUMNS]
+    columns = model.feature_names_in_
+    for team_a, team_b in [('Brazil', 'France'), ('USA', 'Italy')]:
+        ab = pd.DataFrame([features.loc[team_a].values - features.loc[team_b].values], columns=columns)
+        ba = pd.DataFrame([features.loc[team_b].values - features.loc[team_a].values], columns=columns)
+        expected = (model.predict_proba(ab)[0][1] + 1 - model.predict_proba(ba)[0][1]) / 2
+        assert matrix.win_prob(team_a, team_b) == pytest.approx(expected)
+    assert np.allclose(matrix.matrix + matrix.matrix.T, 1)
+    assert matrix.win_prob('brazil', 'FRANCE') == matrix.win_prob('Brazil', 'France')
+
+
+def test_unknown_team_raises(artifacts):
+    model, teams, _, _, _ = artifacts
+    with pytest.raises(ValueError):
+        ProbabilityMatrix.from_model(model, teams).win_prob('Brazil', 'Atlantis')
+
+
+def test_cache_reused_until_inputs_change(artifacts):
+    _, teams, model_path, features_path, cache_dir = artifacts
+    first = ProbabilityMatrix.load(model_path, features_path, cache_dir)
+    cached = os.listdir(cache_dir)
+    assert cached == [f'prob_matrix_{cache_key(model_path, features_path)}.npz']
+
+    again = ProbabilityMatrix.load(model_path, features_path, cache_dir)
+    assert again.teams == first.teams
+    assert np.array_equal(again.matrix, first.matrix)
+    assert os.listdir(cache_dir) == cached
+
+    teams.loc[0, 'win_rate'] = 5.0
+    teams.to_csv(features_path, index=False)
+    ProbabilityMatrix.load(model_path, features_path, cache_dir)
+    assert len(os.listdir(cache_dir)) == 2
+
+
+def test_match_probs_layout_for_simulator(artifacts):
+    model, teams, _, _, _ = artifacts
+    matrix = ProbabilityMatrix.from_model(model, teams)
+    probs = matrix.match_probs(['Spain', 'Brazil'])
+    assert probs.shape == (2, 2, 3)
+    assert probs[0, 1, 0] == pytest.approx(matrix.win_prob('Spain', 'Brazil'))
+    assert np.allclose(probs.sum(axis=-1), 1)
+
+
+def test_to_frame_grid(artifacts):
+    model, teams, _, _, _ = artifacts
+    matrix = ProbabilityMatrix.from_model(model, teams)
+    grid = matrix.to_frame(['usa', 'Brazil'])
+    assert grid.index.tolist() == grid.columns.tolist() == ['USA', 'Brazil']
+    assert grid.loc['USA', 'Brazil'] == matrix.win_prob('USA', 'Brazil')
+    assert matrix.to_frame().shape == (6, 6)
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from features.rankings import RankingIndex
+
+
+def make_rankings():
+    return pd.DataFrame({
+        'country_abrv': ['BRA', 'GER', 'BRA', 'GER', 'BRA', 'ARG'],
+        'rank_date': ['1994-06-01', '1994-06-01', '1998-06-01', '1998-06-01', '2002-06-01', '2002-06-01'],
+        'rank': [3.0, 1.0, 1.0, 2.0, 2.0, 5.0],
+        'total_points': [60.0, 65.0, 70.0, 68.0, 66.0, 55.0],
+    })
+
+
+def test_latest_ranking_on_or_before_each_date():
+    index = RankingIndex.from_frame(make_rankings())
+    result = index.asof(
+        ['BRA', 'BRA', 'BRA', 'GER', 'ARG', 'ARG', 'XXX', 'BRA', 'GER'],
+        pd.to_datetime(['1994-06-01', '1997-12-31', '2030-01-01', '1999-01-01', '1998-06-01', '2002-07-01',
+                        '2000-01-01', None, '1990-01-01']))
+    assert result[:4, 0].tolist() == [3.0, 3.0, 2.0, 2.0]
+    # ARG's first ranking is after 1998; unknown codes, missing dates and pre-history are NaN
+    assert np.isnan(result[4]).all() and result[5].tolist() == [5.0, 55.0]
+    assert np.isnan(result[6:]).all()
+
+
+def test_matches_merge_asof_on_random_queries():
+    rng = np.random.default_rng(0)
+    n_rankings, n_queries = 2_000, 20_000
+    rankings = pd.DataFrame({
+        'country_abrv': rng.choice([f'C{i:02d}' for i in range(50)], n_rankings),
+        'rank_date': pd.Timestamp('1993-01-01') + pd.to_timedelta(rng.integers(0, 10_000, n_rankings), unit='D'),
+        'rank': rng.integers(1, 200, n_rankings).astype(float),
+        'total_points': rng.random(n_rankings) * 1000,
+    }).drop_duplicates(['country_abrv', 'rank_date'])
+    queries = pd.DataFrame({
+        'country_abrv': rng.choice([f'C{i:02d}' for i in range(55)], n_queries),
+        'date': pd.Timestamp('1990-01-01') + pd.to_timedelta(rng.integers(0, 14_000, n_queries), unit='D'),
+    })
+
+    result = RankingIndex.from_frame(rankings).asof(queries['country_abrv'], queries['date'])
+    expected = pd.merge_asof(queries.reset_index().sort_values('date'), rankings.sort_values('rank_date'),
+                             left_on='date', right_on='rank_date', by='country_abrv').sort_values('index')
+    np.testing.assert_array_equal(result, expected[['rank', 'total_points']].to_numpy())
@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from models.award_leaderboard import METRIC_MODELS
+from models.registry import AWARD_MODELS, ArtifactRegistry
+
+
+def test_artifacts_load_once_on_first_use(tmp_path):
+    path = tmp_path / 'table.csv'
+    pd.DataFrame({'a': [1, 2]}).to_csv(path, index=False)
+    calls = []
+
+    def loader(p):
+        calls.append(p)
+        return pd.read_csv(p)
+
+    registry = ArtifactRegistry()
+    registry.register('table', loader, str(path))
+    assert not registry.is_loaded('table')
+    assert registry.get('table') is registry.get('table')
+    assert calls == [str(path)]
+
+
+def test_missing_optional_artifact_resolves_to_none(tmp_path):
+    registry = ArtifactRegistry()
+    registry.register('cards', pd.read_csv, str(tmp_path / 'missing.pkl'), optional=True)
+    with pytest.warns(UserWarning):
+        assert registry.get('cards') is None
+
+
+def test_missing_required_artifact_raises(tmp_path):
+    registry = ArtifactRegistry()
+    registry.register('model', pd.read_csv, str(tmp_path / 'missing.pkl'))
+    with pytest.raises(FileNotFoundError):
+        registry.get('model')
+    with pytest.raises(KeyError):
+        registry.get('unknown')
+
+
+def test_reregistering_invalidates_dependents():
+    registry = ArtifactRegistry()
+    registry.register('base', lambda: 1)
+    registry.register('derived', lambda: registry.get('base') + 1, depends=['base'])
+    assert registry.get('derived') == 2
+    registry.register('base', lambda: 10)
+    assert not registry.is_loaded('derived')
+    assert registry.get('derived') == 11
+
+
+def test_importing_the_predictor_loads_no_model_modules():
+    # A fresh interpreter: this process has long imported scipy and sklearn
+    src = os.path.join(os.path.dirname(__file__), '../src')
+    code = ("import sys; import models.match_predictor; "
+            "print(','.join(m for m in ('scipy', 'sklearn.linear_model', 'models.tree_engine', 'models.scoreline_model', "
+            "'models.award_leaderboard') if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], cwd=src, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ''
+
+
+def test_award_models_match_the_leaderboard_metrics():
+    assert set(AWARD_MODELS) == set(METRIC_MODELS.values())
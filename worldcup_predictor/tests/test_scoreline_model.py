@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from scipy.stats import poisson
+
+from benchmarks.synthetic import synthetic_matches
+from models.scoreline_model import ScorelineModel, dixon_coles_tau
+from simulation.monte_carlo import monte_carlo_tournament
+
+
+@pytest.fixture
+def scorelines():
+    return ScorelineModel(['Brazil', 'France', 'Ghana', 'Japan'], attack=[0.4, 0.3, -0.1, -0.2],
+                          defence=[0.3, 0.2, -0.2, 0.0], intercept=0.2, rho=-0.1)
+
+
+def test_score_matrix_is_dixon_coles(scorelines):
+    matrix = scorelines.score_matrix(np.array([0]), np.array([2]))[0]
+    rate_a, rate_b = np.exp(0.2 + 0.4 + 0.2), np.exp(0.2 - 0.1 - 0.3)
+    expected = np.outer(poisson.pmf(np.arange(11), rate_a), poisson.pmf(np.arange(11), rate_b))
+    expected[:2, :2] *= dixon_coles_tau(np.arange(2)[:, None], np.arange(2)[None, :], rate_a, rate_b, -0.1)
+    np.testing.assert_allclose(matrix, expected / expected.sum())
+
+
+def test_outcomes_and_margins_are_consistent(scorelines):
+    ids = np.arange(4)
+    outcomes = scorelines.outcome_probs(ids[:, None], ids[None, :])
+    margins = scorelines.margin_probs(ids[:, None], ids[None, :])
+    np.testing.assert_allclose(outcomes.sum(axis=-1), 1)
+    np.testing.assert_allclose(margins.sum(axis=-1), 1)
+    np.testing.assert_allclose(margins[..., 5], outcomes[..., 1])
+    np.testing.assert_allclose(margins[..., 6:].sum(axis=-1), outcomes[..., 0])
+    # Swapping the sides mirrors the distribution
+    np.testing.assert_allclose(outcomes[..., 0], outcomes.transpose(1, 0, 2)[..., 2])
+    np.testing.assert_allclose(margins, margins.transpose(1, 0, 2)[..., ::-1])
+    assert outcomes[0, 2, 0] > outcomes[0, 2, 2]
+
+
+def test_fit_recovers_team_strength(tmp_path):
+    matches = synthetic_matches(2000, 10, seed=1)
+    # Team 00000 scores two extra goals a game on average
+    matches.loc[matches['home_team_name'] == 'Team 00000', 'home_team_goals'] += 2
+    matches.loc[matches['away_team_name'] == 'Team 00000', 'away_team_goals'] += 2
+    model = ScorelineModel.fit(matches)
+    assert model.ratings()['team'].iloc[0] == 'Team 00000'
+
+    path = tmp_path / 'scoreline_model.npz'
+    model.save(path)
+    loaded = ScorelineModel.load(path)
+    assert loaded.predict_match('Team 00000', 'Team 00003') == model.predict_match('Team 00000', 'Team 00003')
+    probs = loaded.fixture_probs('Team 00000', 'Team 00003')
+    assert probs['home_win'] > probs['away_win'] and sum(probs.values()) == pytest.approx(1)
+
+
+def test_margin_table_feeds_the_simulator(scorelines):
+    groups = {'A': ['Brazil', 'France'], 'B': ['Ghana', 'Japan']}
+    teams = [team for group in groups.values() for team in group]
+    results = monte_carlo_tournament(groups, scorelines.match_probs(teams), n_simulations=2000, seed=0)
+    assert results['winner'].sum() == pytest.approx(1)
+    assert results.index[0] == 'Brazil'
@@ -0,0 +1,82 @@
+import os
+
+import pandas as pd
+import pytest
+
+from data import storage
+from data.storage import TableWriter, iter_table, read_table, write_table
+
+
+@pytest.fixture
+def ranking():
+    return pd.DataFrame({
+        'rank': [1.0, 2.0, 3.0],
+        'country_full': ['Brazil', 'France', 'Italy'],
+        'rank_change': [0, 1, -1],
+        'confederation': ['CONMEBOL', 'UEFA', 'UEFA'],
+        'rank_date': ['1992-12-31', '1992-12-31', '1993-08-08'],
+    })
+
+
+def test_roundtrip_applies_schema_and_projects_columns(tmp_path, ranking):
+    name = 'fifa_ranking-2024-06-20_cleaned'
+    write_table(ranking, name, processed_dir=tmp_path)
+    assert os.path.exists(tmp_path / f'{name}.parquet')
+    assert os.path.exists(tmp_path / f'{name}.csv')
+
+    df = read_table(name, processed_dir=tmp_path)
+    assert pd.api.types.is_datetime64_any_dtype(df['rank_date'])
+    assert isinstance(df['confederation'].dtype, pd.CategoricalDtype)
+    assert df['rank_change'].dtype == 'int32'
+    # The caller's frame is left untouched
+    assert ranking['rank_date'].dtype != df['rank_date'].dtype
+
+    assert list(read_table(name, columns=['country_full', 'rank'], processed_dir=tmp_path).columns) == ['country_full', 'rank']
+
+
+def test_hand_edited_csv_takes_precedence(tmp_path, ranking):
+    name = 'fifa_ranking-2024-06-20_cleaned'
+    write_table(ranking, name, processed_dir=tmp_path)
+    edited = ranking.assign(country_full=['Brazil', 'France', 'Spain'])
+    edited.to_csv(tmp_path / f'{name}.csv', index=False)
+    parquet_path = tmp_path / f'{name}.parquet'
+    mtime = os.path.getmtime(tmp_path / f'{name}.csv')
+    os.utime(parquet_path, (mtime - 10, mtime - 10))
+
+    df = read_table(name, processed_dir=tmp_path)
+    assert df['country_full'].tolist() == ['Brazil', 'France', 'Spain']
+    assert isinstance(df['confederation'].dtype, pd.CategoricalDtype)
+
+
+def test_csv_only_without_pyarrow(tmp_path, ranking, monkeypatch):
+    monkeypatch.setattr(storage, 'pq', None)
+    name = 'fifa_ranking-2024-06-20_cleaned'
+    write_table(ranking, name, processed_dir=tmp_path, export_csv=False)
+    assert not os.path.exists(tmp_path / f'{name}.parquet')
+    assert read_table(name, processed_dir=tmp_path)['rank_change'].dtype == 'int32'
+
+
+def test_chunked_writer_matches_single_write(tmp_path):
+    df = pd.DataFrame({'team_a': list('abcde'), 'team_b': list('edcba'), 'label': [1, 0, 1, 0, 0]})
+    with TableWriter('matchup_dataset', df.columns, processed_dir=tmp_path) as writer:
+        for start in range(0, len(df), 2):
+            writer.write(df.iloc[start:start + 2])
+    assert writer.n_rows == 5
+
+    chunks = list(iter_table('matchup_dataset', 2, processed_dir=tmp_path))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), read_table('matchup_dataset', processed_dir=tmp_path))
+    assert read_table('matchup_dataset', processed_dir=tmp_path)['team_a'].tolist() == list('abcde')
+
+
+def test_failed_write_keeps_the_previous_table(tmp_path):
+    df = pd.DataFrame({'team_a': list('abc'), 'team_b': list('cba'), 'label': [1, 0, 1]})
+    write_table(df, 'matchup_dataset', processed_dir=tmp_path)
+    with pytest.raises(RuntimeError):
+        with TableWriter('matchup_dataset', df.columns, processed_dir=tmp_path) as writer:
+            writer.write(df.iloc[:1])
+            raise RuntimeError("interrupted")
+
+    assert sorted(os.listdir(tmp_path)) == ['matchup_dataset.csv', 'matchup_dataset.parquet']
+    assert read_table('matchup_dataset', processed_dir=tmp_path)['team_a'].tolist() == list('abc')
+    assert pd.read_csv(tmp_path / 'matchup_dataset.csv')['team_a'].tolist() == list('abc')
@@ -0,0 +1,62 @@
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.model_selection import KFold
+
+from data.storage import write_table
+from models import train
+from models.probability_matrix import ProbabilityMatrix
+from models.team_index import model_feature_columns
+
+
+def test_tuning_writes_leaderboard_and_returns_bare_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(train, 'TUNING_DIR', str(tmp_path))
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(600, 3)), columns=['a', 'b', 'c'])
+    y = (X['a'] + 0.5 * rng.normal(size=600) > 0).astype(int)
+    space = [
+        {'model': [RandomForestClassifier(random_state=0)], 'model__n_estimators': [5, 10], 'model__max_depth': [2, 4]},
+        {'model': [ExtraTreesClassifier(random_state=0)], 'model__n_estimators': [5, 10]},
+    ]
+    folds = list(KFold(n_splits=3, shuffle=True, random_state=0).split(X))
+
+    best = train.tune_model('toy', X, y, space, 'neg_log_loss', folds, n_jobs=1, n_candidates=6)
+
+    assert isinstance(best, (RandomForestClassifier, ExtraTreesClassifier))
+    assert list(best.feature_names_in_) == ['a', 'b', 'c']
+    leaderboard = pd.read_csv(tmp_path / 'toy_leaderboard.csv')
+    # Successive halving: fewer candidates survive into each later round, on more rows
+    per_round = leaderboard.groupby('round').agg(candidates=('family', 'size'), rows=('n_rows', 'first'))
+    assert per_round['candidates'].is_monotonic_decreasing and per_round['rows'].is_monotonic_increasing
+    assert per_round['candidates'].iloc[0] == 6
+    assert leaderboard.iloc[0]['round'] == leaderboard['round'].max()
+
+
+def test_match_model_uses_ranking_and_elo_diffs_when_teams_have_them(tmp_path, monkeypatch):
+    monkeypatch.setattr(train, 'PROCESSED_DIR', str(tmp_path))
+    monkeypatch.setattr(train, 'MODELS_DIR', str(tmp_path))
+    rng = np.random.default_rng(0)
+    teams = pd.DataFrame(rng.normal(size=(6, 4)), columns=['avg_goals_for', 'avg_goals_against', 'win_rate',
+                                                            'recent_form'])
+    teams.insert(0, 'team', list('ABCDEF'))
+    teams['rank'] = [1.0, 2.0, 3.0, 4.0, 5.0, np.nan]
+    teams['elo'] = np.linspace(1600, 1400, 6)
+    matchup = pd.DataFrame(rng.normal(size=(400, 7)), columns=train.MATCH_FEATURES + train.STRENGTH_FEATURES)
+    # Matches before the first ranking
+    matchup.loc[:99, ['diff_rank', 'diff_total_points']] = np.nan
+    matchup['label'] = (matchup['diff_elo'] > 0).astype(int)
+    write_table(teams, 'team_features', processed_dir=tmp_path)
+    write_table(matchup, 'matchup_dataset', processed_dir=tmp_path)
+
+    train.train_match_model(n_jobs=1)
+
+    model = joblib.load(tmp_path / 'match_model.pkl')
+    # total_points is not in team_features, so its diff cannot be predicted with
+    assert list(model.feature_names_in_) == train.MATCH_FEATURES + ['diff_rank', 'diff_elo']
+    assert model_feature_columns(model) == ['avg_goals_for', 'avg_goals_against', 'win_rate', 'recent_form',
+                                            'rank', 'elo']
+    # An unranked team is scored through the model's learned missing-value routes
+    matrix = ProbabilityMatrix.from_model(model, teams)
+    assert np.isfinite(matrix.matrix).all()
+    assert matrix.win_prob('A', 'F') > 0.5
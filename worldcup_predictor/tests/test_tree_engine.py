@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import (
+    ExtraTreesClassifier,
+    ExtraTreesRegressor,
+    GradientBoostingRegressor,
+    RandomForestClassifier,
+    RandomForestRegressor,
+)
+from sklearn.dummy import DummyRegressor
+from sklearn.linear_model import LinearRegression, LogisticRegression
+
+from models.tree_engine import FlatEnsemble, boosting_init
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 4))
+    y = X[:, 0] - 0.5 * X[:, 1] + 0.3 * rng.normal(size=400)
+    return X, y
+
+
+@pytest.mark.parametrize('forest', [RandomForestClassifier, ExtraTreesClassifier])
+def test_forest_classifier_probabilities_are_identical(data, forest):
+    X, y = data
+    model = forest(n_estimators=30, random_state=0).fit(X, y > 0)
+    engine = FlatEnsemble.from_model(model)
+    X_new = np.random.default_rng(1).normal(size=(500, 4))
+    assert np.array_equal(engine.predict_proba(X_new), model.predict_proba(X_new))
+    assert np.array_equal(engine.predict(X_new), model.predict(X_new))
+    assert np.array_equal(engine.predict_proba(X_new[0]), model.predict_proba(X_new[:1]))
+
+
+def test_missing_values_follow_the_learned_direction(data):
+    X, y = data
+    X = X.copy()
+    X[::5, 1] = np.nan
+    model = RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y > 0)
+    X_new = np.random.default_rng(2).normal(size=(200, 4))
+    X_new[::3, 1] = np.nan
+    assert np.array_equal(FlatEnsemble.from_model(model).predict_proba(X_new), model.predict_proba(X_new))
+
+
+@pytest.mark.parametrize('forest', [RandomForestClassifier, ExtraTreesClassifier])
+def test_infinite_and_missing_inputs_stop_at_leaves(data, forest):
+    X, y = data
+    X = X.copy()
+    X[::7, 2] = np.nan
+    model = forest(n_estimators=20, random_state=0).fit(X, y > 0)
+    engine = FlatEnsemble.from_model(model)
+    X_new = np.random.default_rng(3).normal(size=(200, 4))
+    X_new[::2, 0] = -np.inf
+    X_new[1::4, 1] = np.inf
+    X_new[::3, 2] = np.nan
+    assert engine.left_is_next
+    leaves = engine.apply(X_new)
+    assert np.array_equal(engine.left[leaves], leaves)
+    # sklearn rejects infinities; they route like the most extreme finite values
+    finite = np.where(np.isinf(X_new), np.sign(X_new) * 1e30, X_new)
+    assert np.array_equal(engine.predict_proba(X_new), model.predict_proba(finite))
+
+
+@pytest.mark.parametrize('model', [
+    GradientBoostingRegressor(n_estimators=50, random_state=0),
+    GradientBoostingRegressor(n_estimators=20, max_leaf_nodes=6, learning_rate=0.3, random_state=0),
+    RandomForestRegressor(n_estimators=20, random_state=0),
+    ExtraTreesRegressor(n_estimators=20, min_samples_leaf=3, random_state=0),
+])
+def test_regressors_are_identical(data, model):
+    X, y = data
+    model.fit(X, y)
+    engine = FlatEnsemble.from_model(model)
+    assert np.array_equal(engine.predict(X), model.predict(X))
+
+
+@pytest.mark.parametrize('init, expected', [
+    (None, lambda y: y.mean()),
+    ('zero', lambda y: 0.0),
+    (DummyRegressor(strategy='median'), np.median),
+])
+def test_boosting_init_comes_from_the_public_init_estimator(data, init, expected):
+    X, y = data
+    model = GradientBoostingRegressor(n_estimators=10, init=init, random_state=0).fit(X, y)
+    assert boosting_init(model) == pytest.approx(expected(y))
+    assert np.array_equal(FlatEnsemble.from_model(model).predict(X), model.predict(X))
+
+
+def test_non_constant_boosting_init_rejected(data):
+    X, y = data
+    model = GradientBoostingRegressor(n_estimators=5, init=LinearRegression()).fit(X, y)
+    assert not FlatEnsemble.supports(model)
+    with pytest.raises(ValueError):
+        FlatEnsemble.from_model(model)
+
+
+def test_save_and_load_round_trip(data, tmp_path):
+    X, y = data
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y > 0)
+    path = tmp_path / 'match_model.npz'
+    FlatEnsemble.from_model(model).save(path)
+    engine = FlatEnsemble.load(path)
+    assert engine.kind == 'forest_classifier'
+    assert np.array_equal(engine.predict_proba(X), model.predict_proba(X))
+
+
+def test_unsupported_model_rejected(data):
+    X, y = data
+    with pytest.raises(ValueError):
+        FlatEnsemble.from_model(LogisticRegression().fit(X, y > 0))